@@ -0,0 +1,42 @@
+"""
+Throughput of :func:`iexdata.hist.decode_parallel` by number of worker processes on a synthetic HIST capture.
+
+Usage (from the repository root):
+    python -m benchmarks.hist_decode [--segments 20000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from iexdata.hist import decode_parallel
+from test.hist_samples import sample_segments, write_pcap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segments', type=int, default=20000, help='number of IEX-TP segments (15 messages each)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--format', choices=('npy', 'parquet'), default=None)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'deep.pcap')
+        write_pcap(path, sample_segments(args.segments))
+        size = os.path.getsize(path)
+        print(f'{size / 1e6:.1f} MB, {args.segments * 15} messages, {os.cpu_count()} cpus')
+        for workers in args.workers:
+            output = os.path.join(directory, f'out-{workers}')
+            started = time.perf_counter()
+            counts = decode_parallel(path, output, workers=workers, format=args.format)
+            elapsed = time.perf_counter() - started
+            print(f'{workers:3d} workers: {elapsed:7.2f} s {size / 1e6 / elapsed:8.1f} MB/s '
+                  f'{sum(counts.values()) / elapsed / 1e6:6.2f} M messages/s')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+"""
+Asyncio variants of all REST endpoints sharing a single pooled :class:`iexdata.aio.client.AsyncClient`.
+
+Requires the optional ``aiohttp`` dependency (``pip install iex-data[aio]``).
+"""
+from iexdata.aio.client import AsyncClient, get_client, set_client
+from iexdata.aio.common import get_json, gather_symbols
+from iexdata.aio.stream import AsyncWebSocketClient
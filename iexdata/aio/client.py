@@ -0,0 +1,134 @@
+"""
+Asyncio HTTP client used by the coroutine endpoint functions in :mod:`iexdata.aio.endpoints`.
+
+Requires the optional ``aiohttp`` dependency (``pip install iex-data[aio]``).
+"""
+import asyncio
+import time
+from typing import Optional
+
+import aiohttp
+import ujson as json
+
+from iexdata import instrument
+from iexdata.client import BASE_URL, RateLimitError, parse_retry_after
+from iexdata.ratelimit import TokenBucket, Usage
+from iexdata.singleflight import AsyncSingleFlight
+
+
+class AsyncClient:
+
+    def __init__(self, base_url: str = BASE_URL, limit: int = 100, limit_per_host: int = 0, keep_alive: bool = True,
+                 timeout: float = 10., session: Optional[aiohttp.ClientSession] = None,
+                 rate_limiter: Optional[TokenBucket] = None, coalesce: bool = True):
+        """
+        :param base_url: Prefix for all requested urls. Point this to a local server for testing.
+        :param limit: Maximum number of simultaneously open connections.
+        :param limit_per_host: Maximum number of simultaneously open connections per host, 0 for no limit.
+        :param keep_alive: Reuse connections between requests.
+        :param timeout: Total timeout per request in seconds.
+        :param session: Use given session instead of creating one lazily on first use.
+        :param rate_limiter: Take a token from this bucket before every request, see :mod:`iexdata.ratelimit`.
+        :param coalesce: Let concurrent :meth:`get_json` calls for the same url share a single request and its
+                         decoded result, see :mod:`iexdata.singleflight`.
+        """
+        self.base_url = base_url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.usage = Usage()
+        self.flights = AsyncSingleFlight() if coalesce else None
+        self._session = session
+        self._loop = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, (re-)created for the running event loop if necessary."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or (self._loop is not None and self._loop is not loop):
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             force_close=not self.keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector, json_serialize=json.dumps,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._loop = loop
+        return self._session
+
+    def url(self, url: str, filter: str = '') -> str:
+        """Build the absolute url for given endpoint path and filter."""
+        url = self.base_url + url
+        if filter:
+            url += '{sep}filter={filter}'.format(sep='&' if '?' in url else '?', filter=filter)
+        return url
+
+    async def get_json(self, url: str, filter: str = ''):
+        """Get a JSON from IEX market data API with given filters applied.
+
+        Concurrent calls for the same url and filter share a single request unless coalescing is disabled.
+        """
+        if self.flights is None:
+            return await self._fetch_json(url, filter)
+        return await self.flights.do(self.url(url, filter), self._fetch_json, url, filter)
+
+    async def _fetch_json(self, url: str, filter: str):
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.reserve()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self.rate_limiter.reserve()
+        started = time.perf_counter() if instrument.hooks else None
+        async with self.session.get(self.url(url, filter)) as resp:
+            server = time.perf_counter() - started if started is not None else None
+            body = await resp.read()
+            self.usage.record(url, resp.status, len(body))
+            text = body.decode(resp.charset or 'utf-8', errors='replace')
+            if started is not None:
+                instrument.emit('request', endpoint=Usage.endpoint(url), status=resp.status,
+                                seconds=time.perf_counter() - started, server=server, bytes=len(body))
+            if resp.status == 200:
+                if started is None:
+                    return json.loads(text)
+                started = time.perf_counter()
+                value = json.loads(text)
+                instrument.emit('decode', endpoint=Usage.endpoint(url), seconds=time.perf_counter() - started)
+                return value
+            if resp.status == 429:
+                retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                if self.rate_limiter is not None and retry_after is not None:
+                    self.rate_limiter.penalize(retry_after)
+                raise RateLimitError(f'Response {resp.status}', text, retry_after=retry_after)
+            raise RuntimeError(f'Response {resp.status}', text)
+
+    async def close(self):
+        """Close the session and all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+_client = None
+
+
+def get_client() -> AsyncClient:
+    """Return the client used by the coroutine endpoint functions, creating a default one on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncClient()
+    return _client
+
+
+def set_client(client: Optional[AsyncClient]) -> Optional[AsyncClient]:
+    """Replace the client used by the coroutine endpoint functions and return the previous one.
+
+    Passing None resets to a lazily created default client.
+    """
+    global _client
+    previous, _client = _client, client
+    return previous
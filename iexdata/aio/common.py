@@ -0,0 +1,55 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable
+
+from iexdata.aio.client import AsyncClient, get_client
+from iexdata.client import RateLimitError
+
+
+async def get_json(url, filter='', client: AsyncClient = None):
+    """Get a JSON from IEX market data API with given filters applied.
+
+    The request is issued through given client, or the shared client returned by :func:`iexdata.aio.client.get_client`.
+    """
+    client = get_client() if client is None else client
+    return await client.get_json(url, filter)
+
+
+async def gather_symbols(endpoint: Callable[[str], Awaitable], symbols: Iterable[str], max_in_flight: int = 16,
+                         retries: int = 3, backoff: float = .5) -> Dict[str, object]:
+    """Call given coroutine endpoint once per symbol with at most `max_in_flight` requests running concurrently.
+
+    If the API signals rate limiting (429), all pending requests are held back for the announced Retry-After period
+    (or an exponential backoff if none is given) before the throttled request is retried.
+
+    Args:
+        endpoint: Coroutine function accepting a single symbol, e.g. :func:`iexdata.aio.endpoints.marketdata.book`
+        symbols: Tickers to request
+        max_in_flight: Maximum number of concurrent requests
+        retries: Number of retries per symbol after being rate limited
+        backoff: Initial backoff in seconds if the server does not send a Retry-After header
+
+    Returns:
+        dict: Result per symbol
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+    unthrottled = asyncio.Event()
+    unthrottled.set()
+
+    async def fetch(symbol):
+        for attempt in range(retries + 1):
+            await unthrottled.wait()
+            async with semaphore:
+                try:
+                    return await endpoint(symbol)
+                except RateLimitError as e:
+                    if attempt == retries:
+                        raise
+                    delay = backoff * 2 ** attempt if e.retry_after is None else e.retry_after
+            if unthrottled.is_set():
+                unthrottled.clear()
+                await asyncio.sleep(delay)
+                unthrottled.set()
+
+    symbols = list(dict.fromkeys(symbols))
+    results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+    return dict(zip(symbols, results))
@@ -0,0 +1,113 @@
+"""
+Coroutine variants of :mod:`iexdata.endpoints.marketdata`.
+
+Note: The order of function definitions follows the API documentation and should be maintained accordingly.
+      This eases tracking of API changes.
+"""
+import asyncio
+from datetime import datetime
+from typing import Union, List, Iterable
+
+from iexdata.aio.common import get_json
+from iexdata.common import string_or_date, symbol_batches
+from iexdata.endpoints.marketdata import MAX_DEEP_SYMBOLS
+
+
+async def _per_symbol(path: str, symbol: Union[None, str, Iterable[str]], batch_size: int = MAX_DEEP_SYMBOLS,
+                      keyed: bool = True):
+    """Coroutine variant of :func:`iexdata.endpoints.marketdata._per_symbol`, requesting all batches concurrently."""
+    if symbol is None:
+        return await get_json(path)
+    if isinstance(symbol, str):
+        return await get_json(path + '?symbols=' + symbol)
+    if not isinstance(symbol, (list, tuple, set, frozenset)):
+        raise TypeError(f'Cannot use type {type(symbol)}')
+    batches = list(symbol_batches(symbol, max_symbols=batch_size))
+    responses = await asyncio.gather(*(get_json(path + '?symbols=' + ','.join(batch)) for batch in batches))
+    result = {}
+    for batch, data in zip(batches, responses):
+        if keyed:
+            result.update(data)
+        else:
+            result[batch[0]] = data
+    return result
+
+
+async def tops(symbols: Union[None, str, List[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.tops`."""
+    symbols = [symbols] if isinstance(symbols, str) else symbols
+    if symbols:
+        return await get_json('tops?symbols=' + ','.join(symbols) + '%2b')
+    return await get_json('tops')
+
+
+async def last(symbols: Union[str, List[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.last`."""
+    symbols = [symbols] if isinstance(symbols, str) else symbols
+    if symbols:
+        return await get_json('tops/last?symbols=' + ','.join(symbols) + '%2b')
+    return await get_json('tops/last')
+
+
+async def hist(date: Union[None, str, datetime] = None):
+    """See :func:`iexdata.endpoints.marketdata.hist`."""
+    if date is None:
+        return await get_json('hist')
+    else:
+        date = string_or_date(date)
+        return await get_json('hist?date=' + date)
+
+
+async def deep(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.deep`."""
+    return await _per_symbol('deep', symbol, batch_size=1, keyed=False)
+
+
+async def book(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.book`."""
+    return await _per_symbol('deep/book', symbol)
+
+
+async def trades(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.trades`."""
+    return await _per_symbol('deep/trades', symbol)
+
+
+async def system_event():
+    """See :func:`iexdata.endpoints.marketdata.system_event`."""
+    return await get_json('deep/system-event')
+
+
+async def trading_status(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.trading_status`."""
+    return await _per_symbol('deep/trading-status', symbol)
+
+
+async def operational_halt_status(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.operational_halt_status`."""
+    return await _per_symbol('deep/op-halt-status', symbol)
+
+
+async def short_sell_price_test_status(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.short_sell_price_test_status`."""
+    return await _per_symbol('deep/ssr-status', symbol)
+
+
+async def security_event(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.security_event`."""
+    return await _per_symbol('deep/security-event', symbol)
+
+
+async def trade_break(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.trade_break`."""
+    return await _per_symbol('deep/trade-breaks', symbol)
+
+
+async def auction(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.auction`."""
+    return await _per_symbol('deep/auction', symbol)
+
+
+async def official_price(symbol: Union[None, str, Iterable[str]] = None):
+    """See :func:`iexdata.endpoints.marketdata.official_price`."""
+    return await _per_symbol('deep/official-price', symbol)
@@ -0,0 +1,9 @@
+"""
+Coroutine variants of :mod:`iexdata.endpoints.markets`.
+"""
+from iexdata.aio.common import get_json
+
+
+async def market(filter: str = ''):
+    """See :func:`iexdata.endpoints.markets.market`."""
+    return await get_json('market', filter=filter)
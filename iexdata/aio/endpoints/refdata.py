@@ -0,0 +1,45 @@
+"""
+Coroutine variants of :mod:`iexdata.endpoints.refdata`.
+"""
+import datetime
+from typing import Union
+
+from iexdata.aio.common import get_json
+from iexdata.common import string_or_date
+
+
+async def symbols(filter: str = ''):
+    """See :func:`iexdata.endpoints.refdata.symbols`."""
+    return await get_json('ref-data/symbols', filter)
+
+
+async def corporate_actions(date: Union[str, datetime.date, None] = None, filter: str = ''):
+    """See :func:`iexdata.endpoints.refdata.corporate_actions`."""
+    if date:
+        date = string_or_date(date)
+        return await get_json('ref-data/daily-list/corporate-actions/' + date, filter)
+    return await get_json('ref-data/daily-list/corporate-actions', filter)
+
+
+async def dividends(date: Union[str, datetime.date, None] = None, filter: str = ''):
+    """See :func:`iexdata.endpoints.refdata.dividends`."""
+    if type(date) is str:
+        date = string_or_date(date)
+        return await get_json('ref-data/daily-list/dividends/' + date, filter)
+    return await get_json('ref-data/daily-list/dividends', filter)
+
+
+async def next_day_ex_date(date: Union[str, datetime.date, None] = None, filter: str = ''):
+    """See :func:`iexdata.endpoints.refdata.next_day_ex_date`."""
+    if date:
+        date = string_or_date(date)
+        return await get_json('ref-data/daily-list/next-day-ex-date/' + date, filter)
+    return await get_json('ref-data/daily-list/next-day-ex-date', filter)
+
+
+async def symbol_directory(date: Union[str, datetime.date, None] = None, filter: str = ''):
+    """See :func:`iexdata.endpoints.refdata.symbol_directory`."""
+    if date:
+        date = string_or_date(date)
+        return await get_json('ref-data/daily-list/symbol-directory/' + date, filter)
+    return await get_json('ref-data/daily-list/symbol-directory', filter)
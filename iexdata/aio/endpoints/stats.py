@@ -0,0 +1,48 @@
+"""
+Coroutine variants of :mod:`iexdata.endpoints.stats`.
+
+Note: The order of function definitions follows the API documentation and should be maintained accordingly.
+      This eases tracking of API changes.
+"""
+from datetime import datetime
+from typing import Union
+
+from iexdata.aio.common import get_json
+from iexdata.common import string_or_date
+
+
+async def intraday(filter: str = ''):
+    """See :func:`iexdata.endpoints.stats.intraday`."""
+    return await get_json('stats/intraday', filter=filter)
+
+
+async def recent(filter: str = ''):
+    """See :func:`iexdata.endpoints.stats.recent`."""
+    return await get_json('stats/recent', filter=filter)
+
+
+async def records(filter: str = ''):
+    """See :func:`iexdata.endpoints.stats.records`."""
+    return await get_json('stats/records', filter=filter)
+
+
+async def historical_summary(date: Union[None, str, datetime] = None, filter: str = ''):
+    """See :func:`iexdata.endpoints.stats.historical_summary`."""
+    if date:
+        if isinstance(date, str):
+            return await get_json('stats/historical?date=' + date, filter=filter)
+        elif isinstance(date, datetime):
+            return await get_json('stats/historical?date=' + date.strftime('%Y%m'), filter=filter)
+        else:
+            raise TypeError(f"Can't handle type : {str(type(date))}. Filter: {filter}")
+    return await get_json('stats/historical', filter=filter)
+
+
+async def historical_daily(date=None, last='', filter: str = ''):
+    """See :func:`iexdata.endpoints.stats.historical_daily`."""
+    if date:
+        date = string_or_date(date)
+        return await get_json('stats/historical/daily?date=' + date, filter=filter)
+    elif last:
+        return await get_json('stats/historical/daily?last=' + last, filter=filter)
+    return await get_json('stats/historical/daily', filter=filter)
@@ -0,0 +1,182 @@
+"""
+Native asyncio client for the IEX DEEP websocket.
+
+Speaks the socket.io (v2, engine.io v3) protocol directly over an aiohttp websocket, without polling.
+
+Example:
+    >>> async with AsyncWebSocketClient(symbols={'AAPL'}, channels={Channel.TRADES}) as client:
+    ...     async for message in client:
+    ...         print(message)
+"""
+import asyncio
+from typing import Iterable, Optional, Set, Union
+
+import aiohttp
+import ujson as json
+
+from iexdata.stream import Channel, subscription_frames
+
+NAMESPACE = '/1.0/deep'
+
+
+def _parse(packet: str):
+    """Split an engine.io text packet into (engine.io type, socket.io type, namespace, payload)."""
+    if not packet or packet[0] != '4' or len(packet) < 2:
+        return packet[:1], None, None, packet[1:]
+    kind, rest, namespace = packet[1], packet[2:], '/'
+    if rest.startswith('/'):
+        end = rest.find(',')
+        namespace, rest = (rest, '') if end < 0 else (rest[:end], rest[end + 1:])
+    return '4', kind, namespace, rest.lstrip('0123456789')
+
+
+class AsyncWebSocketClient:
+
+    def __init__(self, symbols: Union[None, str, Iterable[str]] = None, channels: Optional[Set[Channel]] = None,
+                 url: str = 'https://ws-api.iextrading.com', max_queue: int = 10000,
+                 session: Optional[aiohttp.ClientSession] = None):
+        """
+        :param symbols: Single symbol, or set of symbols to subscribe to on connect.
+        :param channels: The channels of interest.
+        :param url: The IEX websocket URL to use
+        :param max_queue: Maximum number of received, but not yet consumed messages. If the consumer falls behind,
+                          the client stops reading from the socket until there is space again.
+        :param session: Use given session instead of creating a new one.
+        """
+        channels = {Channel.ALL} if channels is None else channels
+        symbols = set() if symbols is None else symbols
+        self.symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        self.channels = {channels} if isinstance(channels, Channel) else set(channels)
+        self.url = url
+        self.max_queue = max_queue
+        self.received = 0
+
+        self._session = session
+        self._own_session = session is None
+        self._ws = None
+        self._queue = None  # created in the running loop by connect, queues bind to a loop on Python 3.7
+        self._tasks = []
+        self._connected = None
+        self._eof = False
+
+    def _endpoint(self) -> str:
+        base = self.url.replace('https://', 'wss://', 1).replace('http://', 'ws://', 1).rstrip('/')
+        return base + '/socket.io/?EIO=3&transport=websocket'
+
+    async def connect(self, timeout: float = 10.):
+        """Open the websocket, join the DEEP namespace and subscribe to the configured symbols and channels."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        self._eof = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._connected = asyncio.get_running_loop().create_future()
+        self._ws = await self._session.ws_connect(self._endpoint(), autoping=True)
+        handshake = json.loads((await self._ws.receive_str(timeout=timeout))[1:])
+        self._tasks = [asyncio.ensure_future(self._read()),
+                       asyncio.ensure_future(self._ping(handshake.get('pingInterval', 25000) / 1000.))]
+        await self._ws.send_str('40' + NAMESPACE + ',')
+        await asyncio.wait_for(asyncio.shield(self._connected), timeout)
+        if self.symbols:
+            await self._emit('subscribe', self.symbols, self.channels)
+
+    async def _emit(self, event: str, symbols: Iterable[str], channels: Iterable[Channel]):
+        for frame in subscription_frames(symbols, channels):
+            await self._ws.send_str('42' + NAMESPACE + ',' + json.dumps([event, frame]))
+
+    async def subscribe(self, symbols: Union[str, Iterable[str]], channels: Optional[Set[Channel]] = None):
+        """Subscribe to additional symbols (and channels) on the open connection.
+
+        Only subscriptions not active yet are sent to the server.
+        """
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        channels = set() if channels is None else {channels} if isinstance(channels, Channel) else set(channels)
+        added_symbols, added_channels = symbols - self.symbols, channels - self.channels
+        self.symbols |= added_symbols
+        self.channels |= added_channels
+        await self._emit('subscribe', added_symbols, self.channels)
+        await self._emit('subscribe', self.symbols - added_symbols, added_channels)
+
+    async def unsubscribe(self, symbols: Union[str, Iterable[str]]):
+        """Stop receiving messages of given symbols without reconnecting."""
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        removed = symbols & self.symbols
+        self.symbols -= removed
+        await self._emit('unsubscribe', removed, self.channels)
+
+    async def set_channels(self, channels: Union[Channel, Iterable[Channel]]):
+        """Change the channels of all subscribed symbols, only added and removed channels are sent to the server."""
+        channels = {channels} if isinstance(channels, Channel) else set(channels)
+        added, removed = channels - self.channels, self.channels - channels
+        self.channels = channels
+        await self._emit('unsubscribe', self.symbols, removed)
+        await self._emit('subscribe', self.symbols, added)
+
+    async def _read(self):
+        try:
+            async for frame in self._ws:
+                if frame.type != aiohttp.WSMsgType.TEXT:
+                    break
+                eio, kind, namespace, payload = _parse(frame.data)
+                if eio == '1':
+                    break
+                if eio != '4' or namespace != NAMESPACE:
+                    continue
+                if kind == '2':
+                    event, *args = json.loads(payload)
+                    if event == 'message' and args:
+                        self.received += 1
+                        # blocks reading from the socket while the consumer is behind
+                        await self._queue.put(args[0])
+                elif kind == '0' and not self._connected.done():
+                    self._connected.set_result(True)
+                elif kind in '14':
+                    break
+        finally:
+            if not self._connected.done():
+                self._connected.set_exception(ConnectionError('Connection closed during handshake'))
+            self._eof = True
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass  # the consumer will notice the end of stream once the queue is drained
+
+    async def _ping(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self._ws.send_str('2')
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._queue is None:
+            raise RuntimeError('Not connected')
+        if self._eof and self._queue.empty():
+            raise StopAsyncIteration
+        data = await self._queue.get()
+        if data is None:
+            raise StopAsyncIteration
+        return json.loads(data) if isinstance(data, str) else data
+
+    async def close(self):
+        """Leave the namespace, close the socket and cancel all background tasks."""
+        if self._ws is not None and not self._ws.closed:
+            try:
+                await self._ws.send_str('41' + NAMESPACE + ',')
+            except ConnectionError:
+                pass
+            await self._ws.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
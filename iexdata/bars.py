@@ -0,0 +1,242 @@
+"""
+Incremental OHLCV bars built from trades.
+
+:class:`BarBuilder` aggregates trades of the TRADES channel (or of :func:`iexdata.endpoints.marketdata.trades`) into
+fixed interval bars with open, high, low, close, volume, VWAP and trade count per symbol. The open bar and a ring
+buffer of the last closed bars of every symbol are held in preallocated NumPy arrays, and every batch of trades is
+aggregated with a handful of vectorized operations.
+
+Bars close on clock boundaries: as soon as a trade of a later interval arrives for any symbol, all open bars of
+earlier intervals are closed and passed to the `on_bar` callback. Call :meth:`BarBuilder.advance` (or
+:meth:`BarBuilder.start` a timer) to close bars by wall clock time while no trades arrive. Closed bars are final: a
+late trade of an already closed interval (e.g. when symbols are handled by several dispatch workers) is added to the
+bar of the latest interval instead, and counted in :attr:`BarBuilder.late`.
+
+Requires the optional ``numpy`` dependency (``pip install iex-data[columnar]``).
+
+Example:
+    >>> builder = BarBuilder(interval=60, on_bar=print)
+    >>> client = WebSocketClient(symbols={'AAPL', 'SNAP'}, channels={Channel.TRADES}, on_batch=builder.on_batch)
+"""
+import threading
+import time
+from typing import Callable, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+
+BAR = np.dtype([('symbol', 'U16'), ('start', 'M8[ms]'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'),
+                ('close', 'f8'), ('volume', 'i8'), ('vwap', 'f8'), ('count', 'i8')])
+"""Dtype of the bars returned by :meth:`BarBuilder.bars` and passed to the `on_bar` callback."""
+
+_STATE = np.dtype([('start', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+                   ('volume', 'i8'), ('notional', 'f8'), ('count', 'i8')])
+_EMPTY = np.iinfo(np.int64).min
+
+
+class BarBuilder:
+
+    def __init__(self, interval: float = 60., history: int = 120, on_bar: Callable[[np.ndarray], None] = None,
+                 capacity: int = 1024):
+        """
+        :param interval: Bar length in seconds, e.g. 1, 60 or 300.
+        :param history: Number of closed bars kept per symbol.
+        :param on_bar: Callback to be invoked with an array of :data:`BAR` records whenever bars close.
+        :param capacity: Number of symbols to allocate state for initially, grown on demand.
+        """
+        self.interval = int(round(interval * 1000))
+        self.history = history
+        self.on_bar = on_bar
+        self.clock = _EMPTY  # start of the latest interval seen, ms since epoch
+        self.late = 0  # trades of already closed intervals, added to the latest interval
+        self._rows = {}
+        self._symbols = np.empty(capacity, dtype=BAR['symbol'])
+        self._open = np.zeros(capacity, dtype=_STATE)
+        self._open['start'] = _EMPTY
+        self._closed = np.zeros((capacity, history), dtype=_STATE)
+        self._head = np.zeros(capacity, dtype=np.int64)  # number of closed bars written per symbol
+        self._lock = threading.RLock()
+        self.__timer = None
+        self.__terminate = threading.Event()
+
+    def _row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self._rows)
+            self._rows[symbol] = row
+            if row >= len(self._open):
+                size = 2 * len(self._open)
+                self._open = np.resize(self._open, size)
+                self._open['start'][row:] = _EMPTY
+                closed = np.zeros((size, self.history), dtype=_STATE)
+                closed[:row] = self._closed
+                self._closed = closed
+                self._head = np.resize(self._head, size)
+                self._head[row:] = 0
+                self._symbols = np.resize(self._symbols, size)
+            self._symbols[row] = symbol
+        return row
+
+    def update(self, symbols: Union[np.ndarray, List[str]], prices, sizes, timestamps):
+        """Add trades given as arrays of symbols, prices, sizes and timestamps (ms since epoch, or datetime64).
+
+        Trades of a symbol must be passed in order, trades older than the open bar of their symbol are added to it,
+        trades of already closed intervals to the bar of the latest interval.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return
+        sizes = np.asarray(sizes, dtype=np.int64)
+        timestamps = np.asarray(timestamps)
+        timestamps = timestamps.astype('M8[ms]').astype(np.int64) if timestamps.dtype.kind == 'M' else \
+            timestamps.astype(np.int64)
+        names, inverse = np.unique(np.asarray(symbols), return_inverse=True)
+        with self._lock:
+            rows = np.array([self._row(str(name)) for name in names], dtype=np.int64)[inverse]
+            self._update(rows, prices, sizes, timestamps)
+
+    def _update(self, rows: np.ndarray, prices: np.ndarray, sizes: np.ndarray, timestamps: np.ndarray):
+        starts = timestamps - timestamps % self.interval
+        self.late += int(np.count_nonzero(starts < self.clock))
+        starts = np.maximum(np.maximum(starts, self.clock), self._open['start'][rows])
+        order = np.lexsort((starts, rows))  # stable, keeps the trade order within a bar
+        rows, starts, prices, sizes = rows[order], starts[order], prices[order], sizes[order]
+
+        # aggregate the trades per (symbol, bar)
+        first = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (starts[1:] != starts[:-1])])
+        last = np.r_[first[1:], len(rows)] - 1
+        bars = np.zeros(len(first), dtype=_STATE)
+        bars['start'] = starts[first]
+        bars['open'] = prices[first]
+        bars['high'] = np.maximum.reduceat(prices, first)
+        bars['low'] = np.minimum.reduceat(prices, first)
+        bars['close'] = prices[last]
+        bars['volume'] = np.add.reduceat(sizes, first)
+        bars['notional'] = np.add.reduceat(prices * sizes, first)
+        bars['count'] = np.diff(np.r_[first, len(rows)])
+        bar_rows = rows[first]
+
+        # merge the first new bar of every symbol into its open bar if both cover the same interval
+        new_symbol = np.r_[True, bar_rows[1:] != bar_rows[:-1]]
+        current = self._open[bar_rows[new_symbol]]
+        same = current['start'] == bars['start'][new_symbol]
+        merge = np.flatnonzero(new_symbol)[same]
+        current = current[same]
+        bars['open'][merge] = current['open']
+        bars['high'][merge] = np.maximum(bars['high'][merge], current['high'])
+        bars['low'][merge] = np.minimum(bars['low'][merge], current['low'])
+        for field in ('volume', 'notional', 'count'):
+            bars[field][merge] += current[field]
+
+        # open bars replaced by a later one close, as do all but the last new bar of every symbol
+        replaced = bar_rows[new_symbol][~same & (self._open['start'][bar_rows[new_symbol]] != _EMPTY)]
+        last_of_symbol = np.r_[bar_rows[1:] != bar_rows[:-1], True]
+        closed_rows = np.concatenate([replaced, bar_rows[~last_of_symbol]])
+        closed = np.concatenate([self._open[replaced], bars[~last_of_symbol]])
+        self._open[bar_rows[last_of_symbol]] = bars[last_of_symbol]
+
+        self.clock = max(self.clock, int(starts.max()))
+        self._close(closed_rows, closed, advance=True)
+
+    def _close(self, rows: np.ndarray, bars: np.ndarray, advance: bool = False):
+        """Append closed bars to the history and, if `advance`, also close all open bars before the clock."""
+        if advance:
+            starts = self._open['start'][:len(self._rows)]
+            stale = np.flatnonzero((starts != _EMPTY) & (starts < self.clock))
+            rows = np.concatenate([rows, stale])
+            bars = np.concatenate([bars, self._open[stale]])
+            self._open['start'][stale] = _EMPTY
+        if not len(rows):
+            return
+        order = np.lexsort((bars['start'], rows))
+        rows, bars = rows[order], bars[order]
+        # position of every bar among the closed bars of its symbol in this call
+        first = np.r_[0, np.flatnonzero(rows[1:] != rows[:-1]) + 1]
+        rank = np.arange(len(rows)) - np.repeat(first, np.diff(np.r_[first, len(rows)]))
+        self._closed[rows, (self._head[rows] + rank) % self.history] = bars
+        np.add.at(self._head, rows, 1)
+        if self.on_bar is not None:
+            self.on_bar(self._to_bars(rows, bars))
+
+    def _to_bars(self, rows: np.ndarray, states: np.ndarray) -> np.ndarray:
+        result = np.empty(len(rows), dtype=BAR)
+        result['symbol'] = self._symbols[rows]
+        result['start'] = states['start'].astype('M8[ms]')
+        for field in ('open', 'high', 'low', 'close', 'volume', 'count'):
+            result[field] = states[field]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result['vwap'] = states['notional'] / states['volume']
+        return result
+
+    def advance(self, now: Optional[float] = None):
+        """Close all open bars whose interval ended before `now` (seconds since epoch, defaults to the current time)."""
+        now = int((time.time() if now is None else now) * 1000)
+        with self._lock:
+            self.clock = max(self.clock, now - now % self.interval)
+            self._close(np.empty(0, dtype=np.int64), np.empty(0, dtype=_STATE), advance=True)
+
+    def on_batch(self, messages: Union[List[Mapping], Mapping[str, object]]):
+        """Add the trades of a list of decoded stream messages, or of the column batches delivered with
+        ``batch_columns=True``. Messages of other types are ignored.
+
+        Can be passed as `on_batch` callback to :class:`iexdata.stream.WebSocketClient`.
+        """
+        if isinstance(messages, Mapping):
+            trades = messages.get('trades')
+            if trades is not None and len(trades['symbol']):
+                self.update(trades['symbol'], trades['price'], trades['size'], trades['timestamp'])
+            return
+        trades = [m for m in messages if m.get('messageType') == 'trades' and m.get('data')]
+        if trades:
+            self.update([m['symbol'] for m in trades], [m['data']['price'] for m in trades],
+                        [m['data']['size'] for m in trades], [m['data']['timestamp'] for m in trades])
+
+    def on_message(self, message: Mapping):
+        """Add the trade of a single decoded stream message, see :meth:`on_batch`."""
+        self.on_batch([message])
+
+    def add_trades(self, trades: Mapping[str, Iterable[Mapping]]):
+        """Add the result of :func:`iexdata.endpoints.marketdata.trades` (trades keyed by symbol), oldest first."""
+        symbols, prices, sizes, timestamps = [], [], [], []
+        for symbol, records in trades.items():
+            for record in sorted(records, key=lambda r: r['timestamp']):
+                symbols.append(symbol)
+                prices.append(record['price'])
+                sizes.append(record['size'])
+                timestamps.append(record['timestamp'])
+        self.update(symbols, prices, sizes, timestamps)
+
+    def current(self, symbol: str) -> Optional[np.ndarray]:
+        """The open bar of given symbol, None if there is none."""
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None or self._open['start'][row] == _EMPTY:
+                return None
+            return self._to_bars(np.array([row]), self._open[row:row + 1])[0]
+
+    def bars(self, symbol: str, n: Optional[int] = None) -> np.ndarray:
+        """The last `n` (default all kept) closed bars of given symbol, oldest first."""
+        with self._lock:
+            row = self._rows.get(symbol)
+            if row is None:
+                return np.empty(0, dtype=BAR)
+            count = min(int(self._head[row]), self.history, self.history if n is None else n)
+            positions = (self._head[row] - count + np.arange(count)) % self.history
+            return self._to_bars(np.full(count, row), self._closed[row, positions])
+
+    def start(self):
+        """Close bars on wall clock boundaries from a timer thread."""
+        self.__timer = threading.Thread(target=self.__run, daemon=True)
+        self.__timer.start()
+
+    def __run(self):
+        interval = self.interval / 1000
+        while not self.__terminate.wait(interval - time.time() % interval):
+            self.advance()
+
+    def stop(self, join=True, timeout=None):
+        """Terminate the timer thread."""
+        self.__terminate.set()
+        if join and self.__timer is not None and self.__timer.is_alive():
+            self.__timer.join(timeout=timeout)
+            if self.__timer.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
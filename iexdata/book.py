@@ -0,0 +1,169 @@
+"""
+In-memory order books maintained from DEEP `book` messages.
+
+Example:
+    >>> books = BookManager()
+    >>> client = WebSocketClient(symbols={'AAPL'}, channels={Channel.BOOK}, on_batch=books.on_batch,
+    ...                          on_resync=books.on_resync)
+    >>> books['AAPL'].best_bid()
+"""
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import chain
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+Level = Tuple[float, int]
+
+
+class BookSide:
+    """Price levels of one side of a book, kept sorted in compact arrays with the best level at the end.
+
+    Levels are located by binary search. Inserting or removing a level shifts the (few) worse levels in memory.
+    """
+
+    def __init__(self, bids: bool, max_levels: Optional[int] = None):
+        self.bids = bids
+        self.max_levels = max_levels
+        # sort keys are the prices for bids and the negated prices for asks, so the best level is always last
+        self._keys = array('d')
+        self._sizes = array('q')
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _key(self, price: float) -> float:
+        return price if self.bids else -price
+
+    def update(self, price: float, size: int):
+        """Set the aggregated size at given price, a size of zero removes the level."""
+        key = self._key(price)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            if size:
+                self._sizes[i] = size
+            else:
+                del self._keys[i]
+                del self._sizes[i]
+        elif size:
+            self._keys.insert(i, key)
+            self._sizes.insert(i, size)
+            if self.max_levels is not None and len(self._keys) > self.max_levels:
+                # drop the worst level
+                del self._keys[0]
+                del self._sizes[0]
+
+    def replace(self, levels: Iterable[Mapping]):
+        """Replace all levels with given price levels (dicts with 'price' and 'size')."""
+        levels = sorted((self._key(level['price']), level['size']) for level in levels if level['size'])
+        if self.max_levels is not None:
+            levels = levels[-self.max_levels:]
+        self._keys = array('d', (key for key, _ in levels))
+        self._sizes = array('q', (size for _, size in levels))
+
+    def best(self) -> Optional[Level]:
+        """The best (price, size) level or None if the side is empty."""
+        if not self._keys:
+            return None
+        return self._key(self._keys[-1]), self._sizes[-1]
+
+    def top(self, n: int) -> List[Level]:
+        """The best `n` levels, best first."""
+        start = max(0, len(self._keys) - n)
+        return [(self._key(k), s) for k, s in zip(reversed(self._keys[start:]), reversed(self._sizes[start:]))]
+
+
+class OrderBook:
+
+    def __init__(self, symbol: str, max_levels: Optional[int] = None):
+        """
+        :param symbol: The ticker of this book.
+        :param max_levels: Maximum number of levels kept per side, worse levels are dropped.
+        """
+        self.symbol = symbol
+        self.bids = BookSide(bids=True, max_levels=max_levels)
+        self.asks = BookSide(bids=False, max_levels=max_levels)
+        self.timestamp = None
+
+    def apply(self, data: Mapping):
+        """Apply the payload of a DEEP message.
+
+        Book snapshots (with 'bids' and 'asks' lists of price levels) replace the whole book, price level updates
+        (with 'side', 'price' and 'size') change a single level.
+        """
+        if 'bids' in data or 'asks' in data:
+            bids, asks = data.get('bids') or (), data.get('asks') or ()
+            self.bids.replace(bids)
+            self.asks.replace(asks)
+            self.timestamp = max((level.get('timestamp') or 0 for level in chain(bids, asks)), default=self.timestamp)
+        else:
+            side = self.bids if str(data['side'])[:1].upper() in ('B', '8') else self.asks
+            side.update(data['price'], data['size'])
+            self.timestamp = data.get('timestamp', self.timestamp)
+
+    def best_bid(self) -> Optional[Level]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Level]:
+        return self.asks.best()
+
+    def depth(self, n: int = 5) -> dict:
+        """The best `n` bid and ask levels as lists of (price, size), best first."""
+        return {'bids': self.bids.top(n), 'asks': self.asks.top(n)}
+
+
+class BookManager:
+    """Order books for many symbols, bounded to the `max_symbols` most recently updated ones."""
+
+    def __init__(self, max_symbols: int = 10000, max_levels: Optional[int] = 100):
+        """
+        :param max_symbols: Maximum number of books, the least recently updated book is evicted first.
+        :param max_levels: Maximum number of levels kept per side and book.
+        """
+        self.max_symbols = max_symbols
+        self.max_levels = max_levels
+        self._books = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._books)
+
+    def __contains__(self, symbol: str):
+        return symbol in self._books
+
+    def __getitem__(self, symbol: str) -> OrderBook:
+        return self._books[symbol]
+
+    def get(self, symbol: str) -> Optional[OrderBook]:
+        return self._books.get(symbol)
+
+    def book(self, symbol: str) -> OrderBook:
+        """Return the book of given symbol, creating it if necessary."""
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = OrderBook(symbol, self.max_levels)
+                while len(self._books) > self.max_symbols:
+                    self._books.popitem(last=False)
+            else:
+                self._books.move_to_end(symbol)
+            return book
+
+    def on_message(self, message: Mapping):
+        """Apply a decoded DEEP stream message, messages not affecting the book are ignored.
+
+        Can be passed as `on_message` callback to :class:`iexdata.stream.WebSocketClient`.
+        """
+        if message.get('messageType') in ('book', 'pricelevelupdate') and message.get('data'):
+            self.book(message['symbol']).apply(message['data'])
+
+    def on_batch(self, messages: List[Mapping]):
+        """Apply a list of decoded DEEP stream messages, see :meth:`on_message`."""
+        for message in messages:
+            self.on_message(message)
+
+    def on_resync(self, snapshot: Mapping):
+        """Replace the books with the REST snapshots passed to the `on_resync` callback of the stream client."""
+        for symbol, data in (snapshot.get('book') or {}).items():
+            self.book(symbol).apply(data)
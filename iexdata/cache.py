@@ -0,0 +1,201 @@
+"""
+Response caches for :class:`iexdata.client.Client`.
+
+Reference data and historical statistics change hourly, daily or never. A client configured with a cache serves
+repeated requests from it until the entry expires according to the publish schedule of the respective endpoint, see
+:func:`expires`.
+
+Example:
+    >>> from iexdata.client import Client, set_client
+    >>> set_client(Client(cache=SQLiteCache('~/.cache/iexdata.sqlite')))
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import ujson as json
+
+try:
+    from zoneinfo import ZoneInfo
+
+    EASTERN = ZoneInfo('America/New_York')
+except Exception:  # python < 3.9 or no tz database available, ignore daylight saving time
+    EASTERN = timezone(timedelta(hours=-5))
+
+# Sentinel expiry for entries that never expire.
+NEVER = float('inf')
+
+
+class Cache:
+    """Base class of all cache backends, counting hits and misses."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, now: float = None) -> Tuple[bool, object]:
+        """Return a (found, value) tuple for given key, ignoring entries that expired before `now`."""
+        now = time.time() if now is None else now
+        found, value = self._get(key, now)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found, value
+
+    def set(self, key: str, value, expires: float):
+        """Store value for given key until the `expires` timestamp (seconds since epoch, or :data:`NEVER`)."""
+        raise NotImplementedError()
+
+    def clear(self):
+        """Remove all entries."""
+        raise NotImplementedError()
+
+    def stats(self) -> dict:
+        """Hit and miss counters of this cache."""
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _get(self, key: str, now: float) -> Tuple[bool, object]:
+        raise NotImplementedError()
+
+
+class MemoryCache(Cache):
+    """Thread safe in-memory LRU cache.
+
+    Cached results are shared between all callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        super().__init__()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(Cache):
+    """LRU cache persisted in a sqlite database, which can be shared by several processes."""
+
+    def __init__(self, path: str, maxsize: int = 4096):
+        super().__init__()
+        self.path = os.path.expanduser(path)
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connection() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS cache '
+                        '(key TEXT PRIMARY KEY, value TEXT, expires REAL, accessed REAL)')
+            con.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+
+    def _connection(self) -> sqlite3.Connection:
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=30)
+        return con
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _get(self, key, now):
+        with self._connection() as con:
+            row = con.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return False, None
+            if row[1] <= now:
+                con.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return False, None
+            con.execute('UPDATE cache SET accessed = ? WHERE key = ?', (time.time(), key))
+        return True, json.loads(row[0])
+
+    def set(self, key, value, expires):
+        with self._connection() as con:
+            con.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)', (key, json.dumps(value), expires, time.time()))
+            con.execute('DELETE FROM cache WHERE key IN '
+                        '(SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)', (self.maxsize,))
+
+    def clear(self):
+        with self._connection() as con:
+            con.execute('DELETE FROM cache')
+
+
+def _at(now: datetime, hour: int, minute: int = 0) -> datetime:
+    """Next occurrence of given wall clock time (ET) after `now`."""
+    t = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return t if t > now else t + timedelta(days=1)
+
+
+def _hourly(now: datetime, first: Tuple[int, int], last: Tuple[int, int]) -> datetime:
+    """Next full hour while inside the daily publish window [first, last], else the next start of the window."""
+    start = now.replace(hour=first[0], minute=first[1], second=0, microsecond=0)
+    end = now.replace(hour=last[0], minute=last[1], second=0, microsecond=0)
+    inside = start <= now < end if start < end else (now >= start or now < end)
+    if inside:
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return _at(now, *first)
+
+
+_DATED = re.compile(r'(?:/|date=)(\d{6,8})\b')
+
+# (pattern, schedule) tuples, the first matching pattern determines the expiry of a not past-dated url.
+SCHEDULES = (
+    (re.compile(r'^ref-data/symbols'), lambda now: _at(now, 7, 45)),
+    (re.compile(r'^ref-data/daily-list/symbol-directory'), lambda now: _hourly(now, (20, 30), (18, 0))),
+    (re.compile(r'^ref-data/daily-list/'), lambda now: _hourly(now, (8, 0), (18, 0))),
+    (re.compile(r'^stats/historical'), lambda now: _at(now, 0, 0)),
+)
+
+
+def expires(url: str, now: float = None) -> Optional[float]:
+    """Determine until when the response of given endpoint url may be cached.
+
+    Requests for a past date (YYYYMMDD) or month (YYYYMM) never expire. Current reference data expires when the next
+    update is published, current historical stats at midnight ET.
+
+    Args:
+        url: Endpoint path relative to the API base url, e.g. 'ref-data/symbols'
+        now: Current time in seconds since epoch
+
+    Returns:
+        float: Expiry timestamp, :data:`NEVER`, or None if the response must not be cached at all
+    """
+    for pattern, schedule in SCHEDULES:
+        if pattern.match(url):
+            break
+    else:
+        return None
+    now = datetime.fromtimestamp(time.time() if now is None else now, EASTERN)
+    dated = _DATED.search(url)
+    if dated:
+        date = dated.group(1)
+        today = now.strftime('%Y%m%d')[:len(date)]
+        if date < today:
+            return NEVER
+    return schedule(now).timestamp()
@@ -0,0 +1,261 @@
+"""
+Compact binary capture and replay of DEEP stream messages.
+
+A capture file starts with :data:`MAGIC`, followed by length prefixed records::
+
+    <u4 payload length> <i8 receive time ns> <u1 record type> <u1 symbol length> <symbol> <payload>
+
+Trades and trade breaks are stored as fixed size binary records, all other message types as the JSON of their `data`
+payload. Every `index_every` records the (time, offset) of the next record is appended to a sidecar index file
+(`<path>.idx`), which allows replay to start at a given time without scanning the capture. The index time is the latest
+receive time written so far, so the index stays sorted even if several stream workers append messages out of order.
+
+Example:
+    >>> with CaptureWriter('deep.cap') as capture:
+    ...     client = WebSocketClient(symbols={'AAPL'}, on_message=print, capture=capture)
+    >>> ReplayClient('deep.cap', on_message=print, speed=10).start()
+"""
+import mmap
+import struct
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+import ujson as json
+
+from iexdata.stream import Channel
+
+MAGIC = b'IEXCAP1\n'
+
+_HEADER = struct.Struct('<IqBB')
+_INDEX = struct.Struct('<qQ')
+_TRADE = struct.Struct('<dIqqB')
+_TRADE_FLAGS = ('isISO', 'isOddLot', 'isOutsideRegularHours', 'isSinglePriceCross', 'isTradeThroughExempt')
+_TRADE_FIELDS = frozenset(('price', 'size', 'tradeId', 'timestamp') + _TRADE_FLAGS)
+
+# record type codes, message types stored with a typed binary record have the high bit set
+MESSAGE_TYPES = ('tradingstatus', 'auction', 'ophaltstatus', 'ssr', 'securityevent', 'book', 'systemevent',
+                 'officialprice', 'pricelevelupdate', 'quoteupdate')
+TRADE_TYPES = ('trades', 'tradebreak')
+_MESSAGE_FIELDS = frozenset(('symbol', 'messageType', 'data'))
+_TYPED = 0x80
+_RAW = 0xff  # complete message as JSON
+
+
+def _encode(message: Mapping) -> Tuple[int, bytes, bytes]:
+    kind = message.get('messageType')
+    symbol = (message.get('symbol') or '').encode()
+    data = message.get('data')
+    plain = bool(symbol) and message.keys() == _MESSAGE_FIELDS  # restored exactly by _decode
+    if plain and kind in TRADE_TYPES and isinstance(data, Mapping) and data.keys() == _TRADE_FIELDS:
+        flags = sum(1 << i for i, flag in enumerate(_TRADE_FLAGS) if data[flag])
+        payload = _TRADE.pack(data['price'], data['size'], data['tradeId'], data['timestamp'], flags)
+        return _TYPED | TRADE_TYPES.index(kind), symbol, payload
+    if plain and kind in MESSAGE_TYPES:
+        return MESSAGE_TYPES.index(kind), symbol, json.dumps(data).encode()
+    return _RAW, symbol, json.dumps(message).encode()
+
+
+def _decode(kind: int, symbol: bytes, payload: bytes) -> dict:
+    if kind == _RAW:
+        return json.loads(payload)
+    if kind & _TYPED:
+        price, size, trade_id, timestamp, flags = _TRADE.unpack(payload)
+        data = {'price': price, 'size': size, 'tradeId': trade_id, 'timestamp': timestamp}
+        data.update((flag, bool(flags >> i & 1)) for i, flag in enumerate(_TRADE_FLAGS))
+        kind = TRADE_TYPES[kind & ~_TYPED]
+    else:
+        data = json.loads(payload)
+        kind = MESSAGE_TYPES[kind]
+    return {'symbol': symbol.decode(), 'messageType': kind, 'data': data}
+
+
+class CaptureWriter:
+
+    def __init__(self, path: str, index_every: int = 1000):
+        """
+        :param path: Capture file to append to, created if it does not exist.
+        :param index_every: Add a time index entry every this many records.
+        """
+        self.path = path
+        self.index_every = index_every
+        self.records = 0
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._index = open(path + '.idx', 'ab')
+        self._latest = 0  # latest receive time written, continued from an existing index
+        if self._index.tell() >= _INDEX.size:
+            with open(path + '.idx', 'rb') as f:
+                f.seek(-_INDEX.size, 2)
+                self._latest = _INDEX.unpack(f.read(_INDEX.size))[0]
+        self._lock = threading.Lock()
+
+    def write(self, message: Union[str, Mapping], received: Optional[int] = None):
+        """Append a single (raw or decoded) message received at given time (ns since epoch, defaults to now)."""
+        self.write_many([message], received)
+
+    def write_many(self, messages: Iterable[Union[str, Mapping]],
+                   received: Union[None, int, Sequence[int]] = None):
+        """Append messages received at given time, or at the given time of every message (ns since epoch, defaults
+        to now)."""
+        received = time.time_ns() if received is None else received
+        times = iter(received) if isinstance(received, Sequence) else None
+        with self._lock:
+            for message in messages:
+                if times is not None:
+                    received = next(times)
+                kind, symbol, payload = _encode(json.loads(message) if isinstance(message, str) else message)
+                self._latest = max(self._latest, received)
+                if self.records % self.index_every == 0:
+                    self._index.write(_INDEX.pack(self._latest, self._file.tell()))
+                self._file.write(_HEADER.pack(len(payload), received, kind, len(symbol)))
+                self._file.write(symbol)
+                self._file.write(payload)
+                self.records += 1
+
+    # allow passing the writer as stream callback
+    on_message = write
+
+    def on_batch(self, messages: List[Mapping]):
+        self.write_many(messages)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _start_offset(path: str, start: Optional[int]) -> int:
+    """Offset of the last index entry before `start` (ns since epoch), all earlier records were received before it.
+
+    Records received exactly at `start` may precede an index entry of the same time, so that entry is not used.
+    """
+    if start is None:
+        return len(MAGIC)
+    try:
+        with open(path + '.idx', 'rb') as f:
+            entries = [entry for entry in _INDEX.iter_unpack(f.read())]
+    except FileNotFoundError:
+        return len(MAGIC)
+    i = bisect_left([t for t, _ in entries], start)
+    return entries[i - 1][1] if i else len(MAGIC)
+
+
+def read_capture(path: str, start: Optional[int] = None) -> Iterator[Tuple[int, dict]]:
+    """Yield (receive time ns, message) tuples of a capture file from a memory map, optionally starting at given time
+    (ns since epoch)."""
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f'Not a capture file: {path}')
+            offset, end = _start_offset(path, start), len(data)
+            while offset + _HEADER.size <= end:
+                length, received, kind, symbol_length = _HEADER.unpack_from(data, offset)
+                offset += _HEADER.size
+                symbol = data[offset:offset + symbol_length]
+                offset += symbol_length
+                payload = data[offset:offset + length]
+                offset += length
+                if start is None or received >= start:
+                    yield received, _decode(kind, symbol, payload)
+
+
+class ReplayClient:
+    """Replays a capture file with the callback API of :class:`iexdata.stream.WebSocketClient`."""
+
+    def __init__(self, path: str, symbols: Union[None, str, Set[str]] = None, channels: Set[Channel] = None,
+                 on_message=None, on_connect=None, on_disconnect=None, on_batch=None, speed: Optional[float] = 1.,
+                 start: Optional[int] = None, batch_size: int = 1000):
+        """
+        :param path: The capture file to replay.
+        :param symbols: Only replay messages of this symbol or these symbols, all if None.
+        :param channels: Only replay messages of these channels, all if None or containing :attr:`Channel.ALL`.
+        :param on_message: Callback to be invoked for every message
+        :param on_connect: Callback to be invoked when the replay starts
+        :param on_disconnect: Callback to be invoked when the replay ends
+        :param on_batch: Callback to be invoked with lists of messages instead of `on_message`
+        :param speed: Replay at this multiple of the recorded pace, None or 0 to replay as fast as possible.
+        :param start: Skip messages received before this time (ns since epoch).
+        :param batch_size: Maximum number of messages per `on_batch` call.
+        """
+        self.path = path
+        self.symbols = None if symbols is None else {symbols} if isinstance(symbols, str) else set(symbols)
+        channels = None if channels is None else {channels} if isinstance(channels, Channel) else set(channels)
+        self.channels = None if channels is None or Channel.ALL in channels else {c.value for c in channels}
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.on_batch = on_batch
+        self.speed = speed
+        self.start_time = start
+        self.batch_size = batch_size
+        self.received = 0
+        self.__thread = threading.Thread(target=self.__run)
+        self.__terminate = threading.Event()
+
+    def start(self):
+        self.__thread.start()
+
+    def __run(self):
+        if self.on_connect is not None:
+            self.on_connect()
+        batch, first, started = [], None, time.monotonic()
+        for received, message in read_capture(self.path, self.start_time):
+            if self.__terminate.is_set():
+                break
+            if self.symbols is not None and message['symbol'] not in self.symbols:
+                continue
+            if self.channels is not None and message['messageType'] not in self.channels:
+                continue
+            if self.speed:
+                first = received if first is None else first
+                delay = (received - first) / 1e9 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    self.__deliver(batch)
+                    batch = []
+                    if self.__terminate.wait(delay):
+                        break
+            self.received += 1
+            batch.append(message)
+            if len(batch) >= self.batch_size:
+                self.__deliver(batch)
+                batch = []
+        self.__deliver(batch)
+        if self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def __deliver(self, batch: List[dict]):
+        if not batch:
+            return
+        if self.on_batch is not None:
+            self.on_batch(batch)
+        elif self.on_message is not None:
+            for message in batch:
+                self.on_message(message)
+
+    def join(self, timeout=None):
+        """Wait until the replay finished."""
+        self.__thread.join(timeout=timeout)
+
+    def stop(self, join=True, timeout=None):
+        """Terminate the replay."""
+        self.__terminate.set()
+        if join and self.__thread.is_alive():
+            self.__thread.join(timeout=timeout)
+            if self.__thread.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
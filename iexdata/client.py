@@ -0,0 +1,227 @@
+"""
+HTTP client used by all REST endpoint functions.
+
+A single :class:`Client` keeps a pooled :class:`requests.Session` alive, so consecutive endpoint calls reuse already
+established TCP/TLS connections instead of performing a new handshake per request.
+"""
+import time
+from typing import Callable, Iterator, Mapping, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from iexdata import instrument
+from iexdata.cache import Cache, expires
+from iexdata.jsonstream import iter_items
+from iexdata.ratelimit import TokenBucket, Usage
+from iexdata.singleflight import SingleFlight
+
+BASE_URL = 'https://api.iextrading.com/1.0/'
+
+
+class RateLimitError(RuntimeError):
+    """Raised when the API responds with 429 (Too Many Requests)."""
+
+    def __init__(self, *args, retry_after: Optional[float] = None):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse the seconds variant of a Retry-After header, returns None if absent or not a number."""
+    try:
+        return max(0., float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class Conditional(NamedTuple):
+    """Result of a conditional request, `value` is None if the resource was not modified."""
+    modified: bool
+    value: object
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class Client:
+
+    def __init__(self, base_url: str = BASE_URL, pool_connections: int = 4, pool_maxsize: int = 16,
+                 keep_alive: bool = True, timeout: Union[None, float, Tuple[float, float]] = (3.05, 10),
+                 retries: int = 3, backoff_factor: float = 0.2, session: Optional[requests.Session] = None,
+                 cache: Optional[Cache] = None, cache_policy: Callable[[str], Optional[float]] = expires,
+                 rate_limiter: Optional[TokenBucket] = None, rate_limit_retries: int = 3, coalesce: bool = True):
+        """
+        :param base_url: Prefix for all requested urls. Point this to a local server for testing.
+        :param pool_connections: Number of connection pools (one per host) to cache.
+        :param pool_maxsize: Maximum number of connections kept alive per host.
+        :param keep_alive: Reuse connections between requests. If False, every request opens a new connection.
+        :param timeout: Connect and read timeout in seconds, either a single value or a (connect, read) tuple.
+        :param retries: Number of retries for connection errors and 5xx responses.
+        :param backoff_factor: Exponential backoff factor between retries, see :class:`urllib3.util.retry.Retry`.
+        :param session: Use given session instead of creating a new one.
+        :param cache: Serve repeated requests from given cache, see :mod:`iexdata.cache`.
+        :param cache_policy: Maps an endpoint url to the expiry timestamp of its response, None to not cache it.
+        :param rate_limiter: Take a token from this bucket before every request, see :mod:`iexdata.ratelimit`.
+        :param rate_limit_retries: Number of retries after a 429 (Too Many Requests) response, waiting for the
+                                   announced Retry-After period (or an exponential backoff) first.
+        :param coalesce: Let concurrent :meth:`get_json` calls for the same url share a single request and its
+                         decoded result, see :mod:`iexdata.singleflight`.
+        """
+        self.base_url = base_url
+        self.cache = cache
+        self.cache_policy = cache_policy
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self.rate_limit_retries = rate_limit_retries
+        self.usage = Usage()
+        self.flights = SingleFlight() if coalesce else None
+
+        self.session = requests.Session() if session is None else session
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=backoff_factor,
+                      status_forcelist=(500, 502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def url(self, url: str, filter: str = '') -> str:
+        """Build the absolute url for given endpoint path and filter."""
+        url = self.base_url + url
+        if filter:
+            url += '{sep}filter={filter}'.format(sep='&' if '?' in url else '?', filter=filter)
+        return urlparse(url).geturl()
+
+    def get(self, url: str, filter: str = '', stream: bool = False,
+            headers: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """Issue a GET request for given endpoint path and return the raw response.
+
+        Honours the rate limiter and retries throttled requests, the response of the last attempt is returned.
+        """
+        for attempt in range(self.rate_limit_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            started = time.perf_counter() if instrument.hooks else None
+            resp = self.session.get(self.url(url, filter), proxies=None, timeout=self.timeout, stream=stream,
+                                    headers=headers)
+            # streamed bodies are not read here, count them by their announced length
+            size = int(resp.headers.get('Content-Length') or 0) if stream else len(resp.content)
+            self.usage.record(url, resp.status_code, size)
+            if started is not None:
+                instrument.emit('request', endpoint=Usage.endpoint(url), status=resp.status_code,
+                                seconds=time.perf_counter() - started, server=resp.elapsed.total_seconds(), bytes=size)
+            if resp.status_code != 429 or attempt == self.rate_limit_retries:
+                return resp
+            delay = parse_retry_after(resp.headers.get('Retry-After'))
+            delay = self.backoff_factor * 2 ** attempt if delay is None else delay
+            resp.close()
+            if self.rate_limiter is not None:
+                # hold back the requests of all threads sharing the limiter
+                self.rate_limiter.penalize(delay)
+            else:
+                time.sleep(delay)
+
+    @staticmethod
+    def _raise_for(resp: requests.Response):
+        if resp.status_code == 429:
+            raise RateLimitError(f'Response {resp.status_code}', resp.text,
+                                 retry_after=parse_retry_after(resp.headers.get('Retry-After')))
+        raise RuntimeError(f'Response {resp.status_code}', resp.text)
+
+    @staticmethod
+    def _decode(url: str, resp: requests.Response):
+        if not instrument.hooks:
+            return resp.json()
+        started = time.perf_counter()
+        value = resp.json()
+        instrument.emit('decode', endpoint=Usage.endpoint(url), seconds=time.perf_counter() - started)
+        return value
+
+    def get_json(self, url: str, filter: str = ''):
+        """Get a JSON from IEX market data API with given filters applied.
+
+        Concurrent calls for the same url and filter share a single request unless coalescing is disabled.
+        """
+        key = self.url(url, filter)
+        expiry = None if self.cache is None else self.cache_policy(url)
+        if expiry is not None:
+            found, value = self.cache.get(key)
+            if found:
+                return value
+        if self.flights is None:
+            return self._fetch_json(url, filter, key, expiry)
+        return self.flights.do(key, self._fetch_json, url, filter, key, expiry)
+
+    def _fetch_json(self, url: str, filter: str, key: str, expiry: Optional[float]):
+        resp = self.get(url, filter)
+        if resp.status_code == 200:
+            value = self._decode(url, resp)
+            if expiry is not None:
+                self.cache.set(key, value, expiry)
+            return value
+        self._raise_for(resp)
+
+    def get_json_if_modified(self, url: str, filter: str = '', etag: Optional[str] = None,
+                             last_modified: Optional[str] = None) -> Conditional:
+        """Get a JSON only if it changed since the response with given ETag and Last-Modified validators.
+
+        The server answers with an empty 304 (Not Modified) if the validators still match, servers not supporting
+        conditional requests simply return the full response. Responses are not cached.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        resp = self.get(url, filter, headers=headers)
+        if resp.status_code == 304:
+            return Conditional(False, None, etag, last_modified)
+        if resp.status_code == 200:
+            return Conditional(True, self._decode(url, resp), resp.headers.get('ETag'),
+                               resp.headers.get('Last-Modified'))
+        self._raise_for(resp)
+
+    def iter_json(self, url: str, filter: str = '', chunk_size: int = 1 << 16) -> Iterator:
+        """Like :meth:`get_json`, but yield the elements of the returned JSON array while they are downloaded.
+
+        Only a single chunk and the currently decoded element are held in memory. Responses are not cached.
+        """
+        with self.get(url, filter, stream=True) as resp:
+            if resp.status_code != 200:
+                self._raise_for(resp)
+            yield from iter_items(resp.iter_content(chunk_size))
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_client = None
+
+
+def get_client() -> Client:
+    """Return the client used by the endpoint functions, creating a default one on first use."""
+    global _client
+    if _client is None:
+        _client = Client()
+    return _client
+
+
+def set_client(client: Optional[Client]) -> Optional[Client]:
+    """Replace the client used by the endpoint functions and return the previous one.
+
+    Passing None resets to a lazily created default client.
+    """
+    global _client
+    previous, _client = _client, client
+    return previous
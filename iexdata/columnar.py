@@ -0,0 +1,132 @@
+"""
+Columnar conversion of tabular endpoint results.
+
+Endpoints supporting ``as_arrays=True`` return a dict of typed NumPy column arrays, ``as_frame=True`` returns a pandas
+DataFrame built from those columns. Numeric columns are filled in a single pass over the decoded records into a
+preallocated array of the schema dtype, so pandas neither needs to infer types from a list of dicts nor to create
+intermediate per-row objects.
+
+Requires the optional ``numpy`` (and for frames ``pandas``) dependency (``pip install iex-data[columnar]``).
+"""
+from itertools import chain
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+# Column kinds: prices and ratios as float64, sizes as int64, epoch millisecond timestamps as datetime64[ms],
+# ISO dates as datetime64[D], repetitive strings as categoricals.
+FLOAT = 'float64'
+INT = 'int64'
+BOOL = 'bool'
+MILLIS = 'datetime64[ms]'
+DATE = 'datetime64[D]'
+CATEGORY = 'category'
+STRING = 'str'
+
+TOPS = {
+    'symbol': CATEGORY, 'sector': CATEGORY, 'securityType': CATEGORY,
+    'bidPrice': FLOAT, 'bidSize': INT, 'askPrice': FLOAT, 'askSize': INT, 'lastUpdated': MILLIS,
+    'lastSalePrice': FLOAT, 'lastSaleSize': INT, 'lastSaleTime': MILLIS, 'volume': INT, 'marketPercent': FLOAT,
+}
+
+LAST = {'symbol': CATEGORY, 'price': FLOAT, 'size': INT, 'time': MILLIS}
+
+TRADES = {
+    'symbol': CATEGORY, 'price': FLOAT, 'size': INT, 'tradeId': INT, 'isISO': BOOL, 'isOddLot': BOOL,
+    'isOutsideRegularHours': BOOL, 'isSinglePriceCross': BOOL, 'isTradeThroughExempt': BOOL, 'timestamp': MILLIS,
+}
+
+TRADING_STATUS = {'symbol': CATEGORY, 'status': CATEGORY, 'reason': CATEGORY, 'timestamp': MILLIS}
+
+# Schemas of the `data` payload of tabular DEEP stream messages by message type.
+MESSAGE_SCHEMAS = {'trades': TRADES, 'tradebreak': TRADES, 'tradingstatus': TRADING_STATUS}
+
+SYMBOLS = {'symbol': STRING, 'name': STRING, 'date': DATE, 'isEnabled': BOOL, 'type': CATEGORY, 'iexId': STRING}
+
+DAILY_STATS = {
+    'date': DATE, 'volume': INT, 'routedVolume': INT, 'marketShare': FLOAT, 'isHalfday': BOOL, 'litVolume': INT,
+}
+
+
+def _floats(records: List[Mapping], field: str):
+    for r in records:
+        value = r.get(field)
+        yield np.nan if value is None else value
+
+
+def _column(records: List[Mapping], field: str, kind: str):
+    n = len(records)
+    if kind == FLOAT:
+        return np.fromiter(_floats(records, field), dtype=np.float64, count=n)
+    if kind == INT:
+        try:
+            return np.fromiter((r.get(field) for r in records), dtype=np.int64, count=n)
+        except TypeError:  # missing values, fall back to float with NaN
+            return np.fromiter(_floats(records, field), dtype=np.float64, count=n)
+    if kind == BOOL:
+        return np.fromiter((bool(r.get(field)) for r in records), dtype=np.bool_, count=n)
+    if kind == MILLIS:
+        values = np.fromiter((r.get(field) or 0 for r in records), dtype=np.int64, count=n).view('datetime64[ms]')
+        values[values == np.datetime64(0, 'ms')] = np.datetime64('NaT')
+        return values
+    if kind == DATE:
+        return np.array([r.get(field) or 'NaT' for r in records], dtype='datetime64[D]')
+    return np.array([r.get(field) or '' for r in records], dtype=np.str_)
+
+
+def to_arrays(records: Iterable[Mapping], schema: Mapping[str, str], **columns) -> Dict[str, np.ndarray]:
+    """Convert decoded records into typed column arrays according to given `schema` (field to column kind).
+
+    Categorical columns are returned as plain string arrays, use :func:`to_frame` for pandas categoricals. Additional
+    precomputed `columns` are added as is.
+    """
+    if isinstance(records, Mapping):
+        records = [records]
+    records = records if isinstance(records, list) else list(records)
+    return {field: columns[field] if field in columns else _column(records, field, kind)
+            for field, kind in schema.items()}
+
+
+def to_frame(records: Iterable[Mapping], schema: Mapping[str, str], **columns):
+    """Convert decoded records into a pandas DataFrame according to given `schema`, see :func:`to_arrays`."""
+    import pandas as pd
+    arrays = to_arrays(records, schema, **columns)
+    return pd.DataFrame({field: pd.Categorical(values) if schema[field] == CATEGORY else values
+                         for field, values in arrays.items()}, copy=False)
+
+
+def convert(records, schema: Mapping[str, str], as_arrays: bool = False, as_frame: bool = False, **columns):
+    """Return records as is, or converted to arrays or a frame if requested."""
+    if as_frame:
+        return to_frame(records, schema, **columns)
+    if as_arrays:
+        return to_arrays(records, schema, **columns)
+    return records
+
+
+def convert_keyed(result: Optional[Mapping[str, List[Mapping]]], schema: Mapping[str, str], as_arrays: bool = False,
+                  as_frame: bool = False):
+    """Like :func:`convert` for results keyed by symbol (e.g. DEEP trades), flattened with a 'symbol' column."""
+    if not (as_arrays or as_frame):
+        return result
+    result = result or {}
+    records = list(chain.from_iterable(result.values()))
+    symbol = np.repeat(np.array(list(result.keys()), dtype=np.str_), [len(v) for v in result.values()])
+    return convert(records, schema, as_arrays, as_frame, symbol=symbol)
+
+
+def message_columns(messages: List[Mapping]) -> Dict[str, object]:
+    """Group decoded DEEP stream messages by message type.
+
+    Messages of types listed in :data:`MESSAGE_SCHEMAS` are converted into column arrays of their `data` payload with
+    an additional symbol column, all other message types are kept as list of messages.
+    """
+    groups = {}
+    for message in messages:
+        groups.setdefault(message.get('messageType'), []).append(message)
+    for kind, group in groups.items():
+        schema = MESSAGE_SCHEMAS.get(kind)
+        if schema is not None:
+            symbol = np.array([m.get('symbol', '') for m in group], dtype=np.str_)
+            groups[kind] = to_arrays([m.get('data') or {} for m in group], schema, symbol=symbol)
+    return groups
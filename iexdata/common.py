@@ -1,21 +1,28 @@
 from __future__ import print_function
 
 from datetime import datetime
-from typing import Union
-from urllib.parse import urlparse
+from typing import Union, Iterable, Iterator, List
 
-import requests
+from iexdata.client import Client, get_client
 
+# Conservative bound for the length of a comma separated symbol list to stay well below common URL length limits.
+MAX_SYMBOLS_LENGTH = 1800
 
-def get_json(url, filter=''):
-    """Get a JSON from IEX market data API with given filters applied."""
-    url = 'https://api.iextrading.com/1.0/' + url
-    if filter:
-        url += '?filter={filter}'.format(filter=filter)
-    resp = requests.get(urlparse(url).geturl(), proxies=None)
-    if resp.status_code == 200:
-        return resp.json()
-    raise RuntimeError(f'Response {resp.status_code}', resp.text)
+
+def get_json(url, filter='', client: Client = None):
+    """Get a JSON from IEX market data API with given filters applied.
+
+    The request is issued through given client, or the shared pooled client returned by
+    :func:`iexdata.client.get_client`.
+    """
+    client = get_client() if client is None else client
+    return client.get_json(url, filter)
+
+
+def iter_json(url, filter='', client: Client = None) -> Iterator:
+    """Like :func:`get_json`, but yield the elements of the returned JSON array while they are downloaded."""
+    client = get_client() if client is None else client
+    return client.iter_json(url, filter)
 
 
 def string_or_date(s: Union[str, datetime]):
@@ -25,3 +32,17 @@ def string_or_date(s: Union[str, datetime]):
     elif isinstance(s, datetime):
         return s.strftime('%Y%m%d')
     raise TypeError(f'Neither datetime, nor string: {s}')
+
+
+def symbol_batches(symbols: Iterable[str], max_symbols: int, max_length: int = MAX_SYMBOLS_LENGTH) -> Iterator[List[str]]:
+    """Split given symbols into batches of at most `max_symbols` tickers whose comma separated form does not exceed
+    `max_length` characters. Duplicates are dropped, the order is preserved."""
+    batch, length = [], 0
+    for symbol in dict.fromkeys(symbols):
+        if batch and (len(batch) == max_symbols or length + 1 + len(symbol) > max_length):
+            yield batch
+            batch, length = [], 0
+        length += len(symbol) + (1 if batch else 0)
+        batch.append(symbol)
+    if batch:
+        yield batch
@@ -0,0 +1,181 @@
+"""
+Bounded hand-over of received stream messages from the socket thread to worker threads.
+
+Every worker owns a :class:`BoundedQueue`. Messages are routed to a worker by symbol, so all messages of a symbol are
+handled by the same thread in the order they were received.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Hashable, List, Optional
+
+from iexdata import instrument
+
+logger = logging.getLogger(__name__)
+
+
+class Overflow(Enum):
+    """What to do with a new message if the queue is full."""
+    BLOCK = 'block'
+    """Block the producer until there is space again."""
+    DROP_OLDEST = 'drop-oldest'
+    """Discard the oldest pending message."""
+    DROP_NEWEST = 'drop-newest'
+    """Discard the new message."""
+    COALESCE = 'coalesce'
+    """Replace the pending message with the same key (e.g. symbol and message type), else discard the oldest."""
+
+
+class BoundedQueue:
+
+    def __init__(self, maxsize: int = 10000, overflow: Overflow = Overflow.BLOCK):
+        """
+        :param maxsize: Maximum number of pending items.
+        :param overflow: Policy applied when putting an item into a full queue.
+        """
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self.coalesced = 0
+        self.delivered = 0
+        self.last_wait = 0.
+        self._entries = deque()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, key: Hashable, item, timeout: Optional[float] = None) -> bool:
+        """Add an item, returns False if it was discarded."""
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                if self.overflow is Overflow.BLOCK:
+                    if not self._not_full.wait_for(lambda: len(self._entries) < self.maxsize or self._closed, timeout):
+                        self.dropped += 1
+                        return False
+                elif self.overflow is Overflow.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.overflow is Overflow.COALESCE and key in self._latest:
+                    entry = self._latest[key]
+                    entry[1] = item
+                    self.coalesced += 1
+                    return True
+                else:
+                    self._pop()
+                    self.dropped += 1
+            entry = [key, item, time.monotonic()]
+            self._entries.append(entry)
+            if self.overflow is Overflow.COALESCE:
+                self._latest[key] = entry
+            self._not_empty.notify()
+            return True
+
+    def _pop(self):
+        entry = self._entries.popleft()
+        if self.overflow is Overflow.COALESCE and self._latest.get(entry[0]) is entry:
+            del self._latest[entry[0]]
+        return entry
+
+    def get_many(self, max_items: int, timeout: Optional[float] = None, linger: float = 0.) -> List:
+        """Remove and return up to `max_items` items.
+
+        Waits up to `timeout` seconds for the first item, then up to `linger` seconds for the batch to fill up.
+        """
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._entries or self._closed, timeout):
+                return []
+            if linger > 0 and len(self._entries) < max_items:
+                self._not_empty.wait_for(lambda: len(self._entries) >= max_items or self._closed, linger)
+            if self._entries:
+                self.last_wait = time.monotonic() - self._entries[0][2]
+            items = [self._pop()[1] for _ in range(min(max_items, len(self._entries)))]
+            self.delivered += len(items)
+            self._not_full.notify_all()
+            return items
+
+    def lag(self) -> float:
+        """Seconds the oldest pending item is waiting."""
+        with self._lock:
+            return time.monotonic() - self._entries[0][2] if self._entries else 0.
+
+    def close(self):
+        """Wake up all blocked producers and consumers."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+
+class Dispatcher:
+
+    def __init__(self, handler: Callable[[List], None], workers: int = 1, maxsize: int = 10000,
+                 overflow: Overflow = Overflow.BLOCK, batch_size: int = 1000, linger: float = 0.):
+        """
+        :param handler: Invoked on a worker thread with a list of items.
+        :param workers: Number of worker threads.
+        :param maxsize: Maximum number of pending items per worker.
+        :param overflow: Policy applied when a worker queue is full.
+        :param batch_size: Maximum number of items handed to a single handler call.
+        :param linger: Seconds to wait for a batch to fill up before handing it out.
+        """
+        self.handler = handler
+        self.batch_size = batch_size
+        self.linger = linger
+        self.errors = 0  # handler calls that raised
+        self.queues = [BoundedQueue(maxsize, overflow) for _ in range(workers)]
+        self._threads = [threading.Thread(target=self._work, args=(q,), daemon=True) for q in self.queues]
+        self._terminate = threading.Event()
+
+    def submit(self, route: Hashable, key: Hashable, item) -> bool:
+        """Queue an item on the worker responsible for `route` (e.g. the symbol)."""
+        return self.queues[hash(route) % len(self.queues)].put(key, item)
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self, queue: BoundedQueue):
+        while True:
+            items = queue.get_many(self.batch_size, timeout=.1, linger=self.linger)
+            if items:
+                if instrument.hooks:
+                    instrument.emit('dispatch', wait=queue.last_wait, size=len(items), depth=len(queue))
+                try:
+                    self.handler(items)
+                except Exception:
+                    # a failing batch must not stop the worker, or producers would block on its full queue
+                    self.errors += 1
+                    logger.exception('Handling %d items failed', len(items))
+            elif self._terminate.is_set():
+                break
+
+    def stop(self, timeout: Optional[float] = None):
+        """Deliver all pending items and terminate the workers."""
+        self._terminate.set()
+        for queue in self.queues:
+            queue.close()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout=timeout)
+
+    def is_alive(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def metrics(self) -> dict:
+        """Queue depth, drop, coalesce, handler error and lag (seconds the oldest pending item waits) over all
+        workers."""
+        return {
+            'delivered': sum(q.delivered for q in self.queues),
+            'errors': self.errors,
+            'queue_depth': sum(len(q) for q in self.queues),
+            'dropped': sum(q.dropped for q in self.queues),
+            'coalesced': sum(q.coalesced for q in self.queues),
+            'lag': max(q.lag() for q in self.queues),
+        }
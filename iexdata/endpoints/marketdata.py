@@ -5,12 +5,45 @@ Note: The order of function definitions follows the API documentation and should
       This eases tracking of API changes.
 """
 from datetime import datetime
-from typing import Union, List, Optional
+from typing import Union, List, Iterable
 
-from iexdata.common import get_json, string_or_date
+from iexdata.common import get_json, iter_json, string_or_date, symbol_batches
 
+# The DEEP endpoints accept at most 10 comma separated symbols per request.
+MAX_DEEP_SYMBOLS = 10
 
-def tops(symbols: Union[None, str, List[str]] = None):
+
+def _per_symbol(path: str, symbol: Union[None, str, Iterable[str]], batch_size: int = MAX_DEEP_SYMBOLS,
+                keyed: bool = True):
+    """Request a DEEP endpoint for none, a single or many symbols.
+
+    Many symbols are split into batches of at most `batch_size` tickers, one request per batch, and the per symbol
+    results are merged into a single dict keyed by symbol. If the endpoint response is not `keyed` by symbol already
+    (i.e. it only supports single symbol requests), the results are keyed by the requested ticker.
+    """
+    if symbol is None:
+        return get_json(path)
+    if isinstance(symbol, str):
+        return get_json(path + '?symbols=' + symbol)
+    if not isinstance(symbol, (list, tuple, set, frozenset)):
+        raise TypeError(f'Cannot use type {type(symbol)}')
+    result = {}
+    for batch in symbol_batches(symbol, max_symbols=batch_size):
+        data = get_json(path + '?symbols=' + ','.join(batch))
+        if keyed:
+            result.update(data)
+        else:
+            result[batch[0]] = data
+    return result
+
+
+def _check_stream(as_arrays: bool, as_frame: bool):
+    if as_arrays or as_frame:
+        raise ValueError('Streamed records cannot be returned as arrays or frame')
+
+
+def tops(symbols: Union[None, str, List[str]] = None, as_arrays: bool = False, as_frame: bool = False,
+         stream: bool = False):
     """TOPS provides IEX’s aggregated best quoted bid and offer position in near real time for all securities on
     IEX’s displayed limit order book. TOPS is ideal for developers needing both quote and trade data.
 
@@ -18,6 +51,10 @@ def tops(symbols: Union[None, str, List[str]] = None):
 
     Args:
         symbols; Ticker to request
+        as_arrays; Return typed column arrays, see :mod:`iexdata.columnar`
+        as_frame; Return a pandas DataFrame, see :mod:`iexdata.columnar`
+        stream; Return an iterator yielding the records while they are downloaded, cannot be combined with
+            `as_arrays` or `as_frame`
 
     Returns:
         dict: result
@@ -25,18 +62,29 @@ def tops(symbols: Union[None, str, List[str]] = None):
     See: https://iextrading.com/developer/docs/#tops
     """
     symbols = [symbols] if isinstance(symbols, str) else symbols
-    if symbols:
-        return get_json('tops?symbols=' + ','.join(symbols) + '%2b')
-    return get_json('tops')
-
-
-def last(symbols: Union[str, List[str]] = None):
+    url = 'tops?symbols=' + ','.join(symbols) + '%2b' if symbols else 'tops'
+    if stream:
+        _check_stream(as_arrays, as_frame)
+        return iter_json(url)
+    result = get_json(url)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert, TOPS
+        return convert(result, TOPS, as_arrays, as_frame)
+    return result
+
+
+def last(symbols: Union[None, str, List[str]] = None, as_arrays: bool = False, as_frame: bool = False,
+         stream: bool = False):
     """
     Last provides trade data for executions on IEX. It is a near real time, intraday API that provides IEX last sale
     price, size and time. Last is ideal for developers that need a lightweight stock quote.
 
     Args:
         symbols; Ticker to request
+        as_arrays; Return typed column arrays, see :mod:`iexdata.columnar`
+        as_frame; Return a pandas DataFrame, see :mod:`iexdata.columnar`
+        stream; Return an iterator yielding the records while they are downloaded, cannot be combined with
+            `as_arrays` or `as_frame`
 
     Returns:
         dict: result
@@ -44,9 +92,15 @@ def last(symbols: Union[str, List[str]] = None):
     See: https://iextrading.com/developer/docs/#last
     """
     symbols = [symbols] if isinstance(symbols, str) else symbols
-    if symbols:
-        return get_json('tops/last?symbols=' + ','.join(symbols) + '%2b')
-    return get_json('tops/last')
+    url = 'tops/last?symbols=' + ','.join(symbols) + '%2b' if symbols else 'tops/last'
+    if stream:
+        _check_stream(as_arrays, as_frame)
+        return iter_json(url)
+    result = get_json(url)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert, LAST
+        return convert(result, LAST, as_arrays, as_frame)
+    return result
 
 
 def hist(date: Union[None, str, datetime] = None):
@@ -70,7 +124,7 @@ def hist(date: Union[None, str, datetime] = None):
         return get_json('hist?date=' + date)
 
 
-def deep(symbol: Optional[str] = None):
+def deep(symbol: Union[None, str, Iterable[str]] = None):
     """
     DEEP is used to receive real-time depth of book quotations direct from IEX. The depth of book quotations received
     via DEEP provide an aggregated size of resting displayed orders at a price and side, and do not indicate the size
@@ -81,56 +135,50 @@ def deep(symbol: Optional[str] = None):
     orders matching on IEX will be reported. Routed executions will not be reported.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#deep
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep?symbols=' + symbol)
-    return get_json('deep')
+    return _per_symbol('deep', symbol, batch_size=1, keyed=False)
 
 
-def book(symbol: Optional[str] = None):
+def book(symbol: Union[None, str, Iterable[str]] = None):
     """Book shows IEX’s bids and asks for given symbols.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#book
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/book?symbols=' + symbol)
-    return get_json('deep/book')
+    return _per_symbol('deep/book', symbol)
 
 
-def trades(symbol: Optional[str] = None):
+def trades(symbol: Union[None, str, Iterable[str]] = None, as_arrays: bool = False, as_frame: bool = False):
     """
     Trade report messages are sent when an order on the IEX Order Book is executed in whole or in part. DEEP sends a
     Trade report message for every individual fill.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
+        as_arrays; Return typed column arrays with a symbol column, see :mod:`iexdata.columnar`
+        as_frame; Return a pandas DataFrame with a symbol column, see :mod:`iexdata.columnar`
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#trades
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/trades?symbols=' + symbol)
-    return get_json('deep/trades')
+    result = _per_symbol('deep/trades', symbol)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert_keyed, TRADES
+        return convert_keyed(result, TRADES, as_arrays, as_frame)
+    return result
 
 
 def system_event():
@@ -147,7 +195,7 @@ def system_event():
     return get_json('deep/system-event')
 
 
-def trading_status(symbol: Optional[str] = None):
+def trading_status(symbol: Union[None, str, Iterable[str]] = None):
     """
     The Trading status message is used to indicate the current trading status of a security. For IEX-listed
     securities, IEX acts as the primary market and has the authority to institute a trading halt or trading pause in a
@@ -171,21 +219,17 @@ def trading_status(symbol: Optional[str] = None):
     Trading pauses on non-IEX-listed securities will be treated simply as a halt.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#trading-status
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/trading-status?symbols=' + symbol)
-    return get_json('deep/trading-status')
+    return _per_symbol('deep/trading-status', symbol)
 
 
-def operational_halt_status(symbol: Optional[str] = None):
+def operational_halt_status(symbol: Union[None, str, Iterable[str]] = None):
     """
     The Exchange may suspend trading of one or more securities on IEX for operational reasons and indicates such
     operational halt using the Operational halt status message.
@@ -200,21 +244,17 @@ def operational_halt_status(symbol: Optional[str] = None):
     status for an individual security.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#operational-halt-status
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/op-halt-status?symbols=' + symbol)
-    return get_json('deep/op-halt-status')
+    return _per_symbol('deep/op-halt-status', symbol)
 
 
-def short_sell_price_test_status(symbol: Optional[str] = None):
+def short_sell_price_test_status(symbol: Union[None, str, Iterable[str]] = None):
     """
     In association with Rule 201 of Regulation SHO, the Short Sale Price Test Message is used to indicate when a
     short sale price test restriction is in effect for a security.
@@ -226,95 +266,75 @@ def short_sell_price_test_status(symbol: Optional[str] = None):
     The IEX Trading System will process orders based on the latest short sale price test restriction status.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#short-sale-price-test-status
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/ssr-status?symbols=' + symbol)
-    return get_json('deep/ssr-status')
+    return _per_symbol('deep/ssr-status', symbol)
 
 
-def security_event(symbol: Optional[str] = None):
+def security_event(symbol: Union[None, str, Iterable[str]] = None):
     """
     The Security event message is used to indicate events that apply to a security. A Security event message will
     be sent whenever such event occurs
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#security-event
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/security-event?symbols=' + symbol)
-    return get_json('deep/security-event')
+    return _per_symbol('deep/security-event', symbol)
 
 
-def trade_break(symbol: Optional[str] = None):
+def trade_break(symbol: Union[None, str, Iterable[str]] = None):
     """Trade break messages are sent when an execution on IEX is broken on that same trading day. Trade breaks are
     rare and only affect applications that rely upon IEX execution based data.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#trade-break
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/trade-breaks?symbols=' + symbol)
-    return get_json('deep/trade-breaks')
+    return _per_symbol('deep/trade-breaks', symbol)
 
 
-def auction(symbol: str = None):
+def auction(symbol: Union[None, str, Iterable[str]] = None):
     """
     DEEP broadcasts an Auction Information Message every one second between the Lock-in Time and the auction match
     for Opening and Closing Auctions, and during the Display Only Period for IPO, Halt, and Volatility Auctions.
     Only IEX listed securities are eligible for IEX Auctions.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#auction
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol:
-        return get_json('deep/auction?symbols=' + symbol)
-    return get_json('deep/auction')
+    return _per_symbol('deep/auction', symbol)
 
 
-def official_price(symbol: Optional[str] = None):
+def official_price(symbol: Union[None, str, Iterable[str]] = None):
     """The Official Price message is used to disseminate the IEX Official Opening and Closing Prices.
 
     These messages will be provided only for IEX Listed Securities.
 
     Args:
-        symbol; Ticker to request
+        symbol; Ticker or list of tickers to request
 
     Returns:
-        dict: result
+        dict: result, keyed by symbol if a list of tickers was requested
 
     See: https://iextrading.com/developer/docs/#official-price
     """
-    if symbol is not None and not isinstance(symbol, str):
-        raise TypeError(f'Cannot use type {type(symbol)}')
-    if symbol is not None:
-        return get_json('deep/official-price?symbols=' + symbol)
-    return get_json('deep/official-price')
+    return _per_symbol('deep/official-price', symbol)
@@ -4,23 +4,35 @@ Provide access to endpoints listed under https://iextrading.com/developer/docs/#
 import datetime
 from typing import Union
 
-from iexdata.common import get_json, string_or_date
+from iexdata.common import get_json, iter_json, string_or_date
 
 
-def symbols(filter: str = ''):
+def symbols(filter: str = '', as_arrays: bool = False, as_frame: bool = False, stream: bool = False):
     """
     This call returns an array of symbols IEX supports for trading. This list is updated daily as of 7:45 a.m. ET.
     Symbols may be added or removed by IEX after the list was produced.
 
     Args:
         filter: https://iextrading.com/developer/docs/#filter-results
+        as_arrays: Return typed column arrays, see :mod:`iexdata.columnar`
+        as_frame: Return a pandas DataFrame, see :mod:`iexdata.columnar`
+        stream: Return an iterator yielding the records while they are downloaded, cannot be combined with
+            `as_arrays` or `as_frame`
 
     Returns:
         dict: result
 
     See: https://iextrading.com/developer/docs/#symbols
     """
-    return get_json('ref-data/symbols', filter)
+    if stream:
+        if as_arrays or as_frame:
+            raise ValueError('Streamed records cannot be returned as arrays or frame')
+        return iter_json('ref-data/symbols', filter)
+    result = get_json('ref-data/symbols', filter)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert, SYMBOLS
+        return convert(result, SYMBOLS, as_arrays, as_frame)
+    return result
 
 
 def corporate_actions(date: Union[str, datetime.date, None] = None, filter: str = ''):
@@ -99,7 +111,7 @@ def next_day_ex_date(date: Union[str, datetime.date, None] = None, filter: str =
     return get_json('ref-data/daily-list/next-day-ex-date', filter)
 
 
-def symbol_directory(date: Union[str, datetime.date, None] = None, filter: str = ''):
+def symbol_directory(date: Union[str, datetime.date, None] = None, filter: str = '', stream: bool = False):
     """
     Args:This call returns an array of all IEX-listed securities and their corresponding data fields. The IEX-Listed
     Symbol Directory Daily List is initially generated and posted to the IEX website at 8:30 p.m. Eastern Time (ET)
@@ -108,13 +120,15 @@ def symbol_directory(date: Union[str, datetime.date, None] = None, filter: str =
     Args:
         date: Effective date
         filter: https://iextrading.com/developer/docs/#filter-results
+        stream: Return an iterator yielding the records while they are downloaded
 
     Returns:
         dict: result
 
     See: https://iextrading.com/developer/docs/#iex-listed-symbol-directory
     """
+    fetch = iter_json if stream else get_json
     if date:
         date = string_or_date(date)
-        return get_json('ref-data/daily-list/symbol-directory/' + date, filter)
-    return get_json('ref-data/daily-list/symbol-directory', filter)
+        return fetch('ref-data/daily-list/symbol-directory/' + date, filter)
+    return fetch('ref-data/daily-list/symbol-directory', filter)
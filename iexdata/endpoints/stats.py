@@ -23,17 +23,23 @@ def intraday(filter: str = ''):
     return get_json('stats/intraday', filter=filter)
 
 
-def recent(filter: str = ''):
+def recent(filter: str = '', as_arrays: bool = False, as_frame: bool = False):
     """
     https://iextrading.com/developer/docs/#recent
 
     Args:
         filter: https://iextrading.com/developer/docs/#filter-results
+        as_arrays: Return typed column arrays, see :mod:`iexdata.columnar`
+        as_frame: Return a pandas DataFrame, see :mod:`iexdata.columnar`
 
     Returns:
         dict: result
     """
-    return get_json('stats/recent', filter=filter)
+    result = get_json('stats/recent', filter=filter)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert, DAILY_STATS
+        return convert(result, DAILY_STATS, as_arrays, as_frame)
+    return result
 
 
 def records(filter: str = ''):
@@ -70,7 +76,7 @@ def historical_summary(date: Union[None, str, datetime] = None, filter: str = ''
     return get_json('stats/historical', filter=filter)
 
 
-def historical_daily(date=None, last='', filter: str = ''):
+def historical_daily(date=None, last='', filter: str = '', as_arrays: bool = False, as_frame: bool = False):
     """
     https://iextrading.com/developer/docs/#historical-daily
 
@@ -78,13 +84,20 @@ def historical_daily(date=None, last='', filter: str = ''):
         date: fixme
         last: fixme
         filter: https://iextrading.com/developer/docs/#filter-results
+        as_arrays: Return typed column arrays, see :mod:`iexdata.columnar`
+        as_frame: Return a pandas DataFrame, see :mod:`iexdata.columnar`
 
     Returns:
         dict: result
     """
     if date:
         date = string_or_date(date)
-        return get_json('stats/historical/daily?date=' + date, filter=filter)
+        result = get_json('stats/historical/daily?date=' + date, filter=filter)
     elif last:
-        return get_json('stats/historical/daily?last=' + last, filter=filter)
-    return get_json('stats/historical/daily', filter=filter)
+        result = get_json('stats/historical/daily?last=' + last, filter=filter)
+    else:
+        result = get_json('stats/historical/daily', filter=filter)
+    if as_arrays or as_frame:
+        from iexdata.columnar import convert, DAILY_STATS
+        return convert(result, DAILY_STATS, as_arrays, as_frame)
+    return result
@@ -0,0 +1,440 @@
+"""
+Decoder for IEX HIST files, the T+1 pcap captures of the TOPS and DEEP feeds listed by
+:func:`iexdata.endpoints.marketdata.hist`.
+
+Files are memory mapped and scanned packet by packet. Message type and symbol filters are applied to the raw bytes
+during the scan, only matching messages are copied and finally decoded with a single :func:`numpy.frombuffer` call
+per message type into structured arrays.
+
+Supports classic pcap and pcapng files with Ethernet, raw IP or Linux cooked captures (gzip compressed files are
+decompressed next to the original first) and the message types of the TOPS 1.6 and DEEP 1.0 specifications.
+
+Requires the optional ``numpy`` dependency (``pip install iex-data[columnar]``).
+
+See: https://iextrading.com/trading/market-data/
+
+Example:
+    >>> trades = read_hist(download('20190306', feed='TOPS'), symbols={'AAPL'}, message_types={'trade'})['trade']
+    >>> trades['price'].mean()
+"""
+import gzip
+import mmap
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from iexdata.client import get_client
+from iexdata.endpoints import marketdata
+
+# IEX-TP segment header: version, reserved, message protocol id, channel id, session id, payload length,
+# message count, stream offset, first message sequence number, send time
+SEGMENT_HEADER = struct.Struct('<BBHIIHHqqq')
+
+_PRICE = '<i8'
+_TIMESTAMP = '<i8'
+
+# wire layout of all supported messages, prices are fixed point with 4 decimals, timestamps ns since epoch
+MESSAGE_DTYPES = {
+    'system_event': (b'S', [('type', 'S1'), ('system_event', 'S1'), ('timestamp', _TIMESTAMP)]),
+    'security_directory': (b'D', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                                  ('round_lot_size', '<u4'), ('adjusted_poc_price', _PRICE), ('luld_tier', 'u1')]),
+    'trading_status': (b'H', [('type', 'S1'), ('trading_status', 'S1'), ('timestamp', _TIMESTAMP),
+                              ('symbol', 'S8'), ('reason', 'S4')]),
+    'operational_halt_status': (b'O', [('type', 'S1'), ('halt_status', 'S1'), ('timestamp', _TIMESTAMP),
+                                       ('symbol', 'S8')]),
+    'short_sale_price_test_status': (b'P', [('type', 'S1'), ('status', 'u1'), ('timestamp', _TIMESTAMP),
+                                            ('symbol', 'S8'), ('detail', 'S1')]),
+    'security_event': (b'E', [('type', 'S1'), ('security_event', 'S1'), ('timestamp', _TIMESTAMP),
+                              ('symbol', 'S8')]),
+    'price_level_update_buy': (b'8', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                                      ('size', '<u4'), ('price', _PRICE)]),
+    'price_level_update_sell': (b'5', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                                       ('size', '<u4'), ('price', _PRICE)]),
+    'quote_update': (b'Q', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                            ('bid_size', '<u4'), ('bid_price', _PRICE), ('ask_price', _PRICE), ('ask_size', '<u4')]),
+    'trade': (b'T', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'), ('size', '<u4'),
+                     ('price', _PRICE), ('trade_id', '<i8')]),
+    'official_price': (b'X', [('type', 'S1'), ('price_type', 'S1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                              ('price', _PRICE)]),
+    'trade_break': (b'B', [('type', 'S1'), ('flags', 'u1'), ('timestamp', _TIMESTAMP), ('symbol', 'S8'),
+                           ('size', '<u4'), ('price', _PRICE), ('trade_id', '<i8')]),
+    'auction_information': (b'A', [('type', 'S1'), ('auction_type', 'S1'), ('timestamp', _TIMESTAMP),
+                                   ('symbol', 'S8'), ('paired_shares', '<u4'), ('reference_price', _PRICE),
+                                   ('indicative_clearing_price', _PRICE), ('imbalance_shares', '<u4'),
+                                   ('imbalance_side', 'S1'), ('extension_number', 'u1'),
+                                   ('scheduled_auction_time', '<u4'), ('auction_book_clearing_price', _PRICE),
+                                   ('collar_reference_price', _PRICE), ('lower_auction_collar', _PRICE),
+                                   ('upper_auction_collar', _PRICE)]),
+}
+
+_WIRE = {name: np.dtype(fields) for name, (_, fields) in MESSAGE_DTYPES.items()}
+_NAMES = {code[0]: name for name, (code, _) in MESSAGE_DTYPES.items()}
+
+
+def _output_dtype(wire: np.dtype) -> np.dtype:
+    """Prices become float64 dollars, timestamps datetime64[ns]."""
+    fields = []
+    for name in wire.names:
+        if name == 'type':
+            continue
+        if name.endswith('price') or name.endswith('collar'):
+            fields.append((name, '<f8'))
+        elif name == 'timestamp':
+            fields.append((name, 'M8[ns]'))
+        else:
+            fields.append((name, wire.fields[name][0]))
+    return np.dtype(fields)
+
+
+DTYPES = {name: _output_dtype(wire) for name, wire in _WIRE.items()}
+"""Dtypes of the structured arrays returned by :func:`read_hist` per message type."""
+
+
+def _convert(name: str, raw: bytes) -> np.ndarray:
+    wire = np.frombuffer(raw, dtype=_WIRE[name])
+    out = np.empty(len(wire), dtype=DTYPES[name])
+    for field in DTYPES[name].names:
+        if DTYPES[name].fields[field][0] == np.float64:
+            out[field] = wire[field] / 1e4
+        elif field == 'timestamp':
+            out[field] = wire[field].view('M8[ns]')
+        elif field == 'symbol':
+            out[field] = np.char.rstrip(wire[field])
+        else:
+            out[field] = wire[field]
+    return out
+
+
+class Pcap:
+    """Memory mapped pcap or pcapng file, iterating the UDP payloads of the captured packets."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self.data[:4]
+        if magic == b'\x0a\x0d\x0d\x0a':
+            self.ng = True
+            self.endian = '<' if self.data[8:12] == b'\x4d\x3c\x2b\x1a' else '>'
+            self.start = 0
+            self.link_type = None
+        elif magic in (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\xc3\xd4', b'\xa1\xb2\x3c\x4d'):
+            self.ng = False
+            self.endian = '<' if magic[0] in (0xd4, 0x4d) else '>'
+            self.start = 24
+            self.link_type = struct.unpack_from(self.endian + 'I', self.data, 20)[0]
+        else:
+            self.close()
+            raise ValueError(f'Not a pcap file: {path}')
+        if self.ng:
+            # read the link type from the interface description preceding the first packet, so that
+            # iterating can start at any packet
+            next(self.records(), None)
+
+    def close(self):
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+        """Yield (record offset, frame offset, frame length) of all packet records starting in [start, end)."""
+        data, offset = self.data, self.start if start is None else start
+        end = len(data) if end is None else min(end, len(data))
+        if not self.ng:
+            header = struct.Struct(self.endian + 'IIII')
+            while offset + 16 <= end:
+                _, _, captured, _ = header.unpack_from(data, offset)
+                yield offset, offset + 16, captured
+                offset += 16 + captured
+            return
+        block = struct.Struct(self.endian + 'II')
+        while offset + 12 <= end:
+            kind, length = block.unpack_from(data, offset)
+            if kind == 0x0a0d0d0a:
+                self.endian = '<' if data[offset + 8:offset + 12] == b'\x4d\x3c\x2b\x1a' else '>'
+                block = struct.Struct(self.endian + 'II')
+                length = block.unpack_from(data, offset)[1]
+            elif kind == 1:  # interface description
+                self.link_type = struct.unpack_from(self.endian + 'H', data, offset + 8)[0]
+            elif kind == 6:  # enhanced packet
+                captured = struct.unpack_from(self.endian + 'I', data, offset + 20)[0]
+                yield offset, offset + 28, captured
+            elif kind == 3:  # simple packet
+                captured = min(struct.unpack_from(self.endian + 'I', data, offset + 8)[0], length - 16)
+                yield offset, offset + 12, captured
+            offset += length
+
+    def payloads(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """Yield (offset, length) of the UDP payloads of all IPv4 packets starting in [start, end)."""
+        data = self.data
+        for _, frame, length in self.records(start, end):
+            ip = frame
+            if self.link_type == 1:  # ethernet
+                ether_type = data[frame + 12:frame + 14]
+                ip = frame + 14
+                if ether_type == b'\x81\x00':  # vlan tag
+                    ether_type, ip = data[frame + 16:frame + 18], ip + 4
+                if ether_type != b'\x08\x00':
+                    continue
+            elif self.link_type == 113:  # linux cooked capture
+                ip = frame + 16
+            if data[ip] >> 4 != 4 or data[ip + 9] != 17:  # not IPv4 or not UDP
+                continue
+            udp = ip + (data[ip] & 0x0f) * 4
+            yield udp + 8, frame + length - udp - 8
+
+
+def decode(pcap: Pcap, symbols: Optional[Iterable[str]] = None, message_types: Optional[Iterable[str]] = None,
+           start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, bytes]:
+    """Scan the IEX-TP segments of the packets starting in [start, end) and return the raw bytes of all matching
+    messages, concatenated per message type."""
+    names = set(MESSAGE_DTYPES) if message_types is None else set(message_types)
+    unknown = names - set(MESSAGE_DTYPES)
+    if unknown:
+        raise ValueError(f'Unknown message types: {unknown}')
+    wanted = {MESSAGE_DTYPES[name][0][0]: _WIRE[name].itemsize for name in names}
+    wanted_symbols = None if symbols is None else {s.encode().ljust(8) for s in symbols}
+
+    chunks = {code: [] for code in wanted}
+    data = pcap.data
+    header_size, header = SEGMENT_HEADER.size, SEGMENT_HEADER.unpack_from
+    for offset, length in pcap.payloads(start, end):
+        if length < header_size:
+            continue
+        count = header(data, offset)[6]
+        position = offset + header_size
+        for _ in range(count):
+            size = data[position] | data[position + 1] << 8
+            message = position + 2
+            position = message + size
+            code = data[message]
+            itemsize = wanted.get(code)
+            if itemsize is None or size < itemsize:
+                continue
+            # all message types except system events carry the symbol at bytes 10 to 18
+            if wanted_symbols is not None and (code == 0x53 or data[message + 10:message + 18] not in wanted_symbols):
+                continue
+            chunks[code].append(data[message:message + itemsize])
+    return {_NAMES[code]: b''.join(parts) for code, parts in chunks.items()}
+
+
+def read_hist(path: str, symbols: Optional[Iterable[str]] = None,
+              message_types: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Decode a HIST pcap file into structured arrays per message type.
+
+    Args:
+        path: Local pcap or pcapng file, optionally gzip compressed
+        symbols: Only decode messages of these tickers, all if None. System events are dropped if given.
+        message_types: Only decode these message types (keys of :data:`MESSAGE_DTYPES`), all if None
+
+    Returns:
+        dict: Structured array with the dtype given in :data:`DTYPES` per requested message type
+    """
+    with Pcap(uncompressed(path)) as pcap:
+        raw = decode(pcap, symbols, message_types)
+    return {name: _convert(name, chunk) for name, chunk in raw.items()}
+
+
+def uncompressed(path: str) -> str:
+    """Return the path of the decompressed file if given path is gzip compressed, decompressing it if necessary."""
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\x1f\x8b':
+            return path
+    target = path[:-3] if path.endswith('.gz') else path + '.pcap'
+    if not os.path.exists(target):
+        with gzip.open(path, 'rb') as source, open(target + '.part', 'wb') as sink:
+            shutil.copyfileobj(source, sink, 1 << 20)
+        os.replace(target + '.part', target)
+    return target
+
+
+def download(date: Union[str, None] = None, feed: str = 'DEEP', directory: str = '.') -> str:
+    """Download the HIST file of given date and feed (TOPS or DEEP) into directory and return its decompressed path.
+
+    Already downloaded files are reused. Connect and read timeouts are those of the REST client, so a stalled
+    transfer fails instead of hanging.
+    """
+    links = marketdata.hist(date)
+    if isinstance(links, dict):
+        links = [link for entries in links.values() for link in entries]
+    links = [link for link in links if link.get('feed', '').upper() == feed.upper()]
+    if not links:
+        raise RuntimeError(f'No {feed} HIST file available for {date}')
+    link = links[0]
+    path = os.path.join(directory, '{}_{}_{}.pcap.gz'.format(link['date'], link['feed'], link['version']))
+    if not os.path.exists(path[:-3]) and not os.path.exists(path):
+        client = get_client()
+        with client.session.get(link['link'], stream=True, timeout=client.timeout) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(f'Response {resp.status_code}', resp.text)
+            with open(path + '.part', 'wb') as f:
+                for chunk in resp.iter_content(1 << 20):
+                    f.write(chunk)
+        os.replace(path + '.part', path)
+    return uncompressed(path) if os.path.exists(path) else path[:-3]
+
+
+def segments(pcap: Pcap) -> Iterator[Tuple[tuple, List[bytes]]]:
+    """Yield (header, messages) of all IEX-TP segments, mainly useful for inspection."""
+    for offset, length in pcap.payloads():
+        header = SEGMENT_HEADER.unpack_from(pcap.data, offset)
+        position, messages = offset + SEGMENT_HEADER.size, []
+        for _ in range(header[6]):
+            size = struct.unpack_from('<H', pcap.data, position)[0]
+            messages.append(pcap.data[position + 2:position + 2 + size])
+            position += 2 + size
+        yield header, messages
+
+
+def split(pcap: Pcap, parts: int) -> List[Tuple[int, int]]:
+    """Split the packets of a capture into `parts` (start, end) offset ranges of about the same size.
+
+    Ranges always start at a packet record, so they can be decoded independently.
+    """
+    first = pcap.start if not pcap.ng else next(pcap.records(), (len(pcap.data),))[0]
+    size = (len(pcap.data) - first) / max(parts, 1)
+    bounds, target = [first], first + size
+    for offset, _, _ in pcap.records():
+        if offset >= target:
+            bounds.append(offset)
+            target = offset + size
+    bounds.append(len(pcap.data))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _write(array: np.ndarray, path: str, format: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table({name: array[name] for name in array.dtype.names}), path + '.parquet')
+    else:
+        np.save(path + '.npy', array)
+
+
+def _decode_part(path: str, start: int, end: int, part: int, output: str, symbols: Optional[List[str]],
+                 message_types: Optional[List[str]], format: str,
+                 by_symbol: bool) -> Tuple[int, Dict[str, int]]:
+    """Decode a range of packets and write the messages of every message type, optionally split by symbol."""
+    with Pcap(path) as pcap:
+        raw = decode(pcap, symbols, message_types, start, end)
+    counts = {}
+    for name, chunk in raw.items():
+        array = _convert(name, chunk)
+        counts[name] = len(array)
+        if not len(array):
+            continue
+        if not by_symbol or 'symbol' not in array.dtype.names:
+            _write(array, os.path.join(output, name, f'part-{part:05d}'), format)
+            continue
+        # stable sort keeps the messages of each symbol in sequence
+        order = np.argsort(array['symbol'], kind='stable')
+        array = array[order]
+        keys, starts = np.unique(array['symbol'], return_index=True)
+        for key, begin, stop in zip(keys, starts, list(starts[1:]) + [len(array)]):
+            _write(array[begin:stop], os.path.join(output, name, 'symbol=' + key.decode(), f'part-{part:05d}'), format)
+    return end - start, counts
+
+
+def decode_parallel(path: str, output: str, symbols: Optional[Iterable[str]] = None,
+                    message_types: Optional[Iterable[str]] = None, workers: Optional[int] = None,
+                    parts: Optional[int] = None, format: Optional[str] = None,
+                    progress: Optional[Callable[[int, int], None]] = None, by_symbol: bool = False) -> Dict[str, int]:
+    """Decode a HIST file on a process pool into files partitioned by message type (and symbol).
+
+    The capture is split at packet boundaries into `parts` ranges decoded by `workers` processes. Every range writes
+    one file per message type to ``<output>/<message type>/part-<range>``, with the symbol as a column, so
+    concatenating the parts in the order of the ranges (see :func:`read_partitioned`) restores the sequence of the
+    messages. With `by_symbol`, every range writes one file per message type and symbol to
+    ``<output>/<message type>/symbol=<symbol>/part-<range>`` instead, which makes reading single symbols cheap but
+    creates many small files for a full day of all symbols.
+
+    Args:
+        path: Local pcap or pcapng file, optionally gzip compressed
+        output: Directory to write the partitions to
+        symbols: Only decode messages of these tickers, all if None
+        message_types: Only decode these message types (keys of :data:`MESSAGE_DTYPES`), all if None
+        workers: Number of processes, defaults to the number of cpus
+        parts: Number of ranges to split the file into, defaults to four times the number of workers
+        format: 'parquet' (requires pyarrow) or 'npy', defaults to parquet if pyarrow is installed
+        progress: Callback invoked with (decoded bytes, total bytes) whenever a range finished
+        by_symbol: Additionally partition the messages by symbol
+
+    Returns:
+        dict: Number of decoded messages per message type
+    """
+    if format is None:
+        try:
+            import pyarrow.parquet  # noqa: F401
+            format = 'parquet'
+        except ImportError:
+            format = 'npy'
+    if format not in ('parquet', 'npy'):
+        raise ValueError(f'Unknown format: {format}')
+    workers = workers or os.cpu_count() or 1
+    path = uncompressed(path)
+    with Pcap(path) as pcap:
+        ranges = split(pcap, parts or 4 * workers)
+        total = len(pcap.data)
+    symbols = None if symbols is None else list(symbols)
+    message_types = None if message_types is None else list(message_types)
+
+    counts, done = {}, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_decode_part, path, start, end, part, output, symbols, message_types, format,
+                               by_symbol) for part, (start, end) in enumerate(ranges)]
+        for future in as_completed(futures):
+            size, part_counts = future.result()
+            for name, count in part_counts.items():
+                counts[name] = counts.get(name, 0) + count
+            done += size
+            if progress is not None:
+                progress(done, total)
+    return counts
+
+
+def _read(path: str, message_type: str) -> np.ndarray:
+    if path.endswith('.npy'):
+        return np.load(path)
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f'Reading {path} requires pyarrow (pip install pyarrow)') from None
+    table = pq.read_table(path)
+    array = np.empty(table.num_rows, dtype=DTYPES[message_type])
+    for name in array.dtype.names:
+        array[name] = table.column(name).to_numpy(zero_copy_only=False)
+    return array
+
+
+def read_partitioned(output: str, message_type: str, symbol: Optional[str] = None) -> np.ndarray:
+    """Concatenate the parquet or npy partitions of a message type (and symbol) written by :func:`decode_parallel`.
+
+    Reads the partition of the symbol if the output was partitioned by symbol, else filters the parts of the message
+    type by their symbol column.
+    """
+    directory = os.path.join(output, message_type)
+    if symbol is not None and os.path.isdir(os.path.join(directory, 'symbol=' + symbol)):
+        directory, symbol = os.path.join(directory, 'symbol=' + symbol), None
+    if not os.path.isdir(directory):
+        return np.empty(0, dtype=DTYPES[message_type])
+    parts = []
+    for root, _, files in sorted(os.walk(directory)):
+        parts += [os.path.join(root, name) for name in files if name.endswith(('.npy', '.parquet'))]
+    parts.sort(key=os.path.basename)
+    if symbol is not None:
+        # symbol partitions of other symbols are not relevant
+        parts = [part for part in parts if not os.path.basename(os.path.dirname(part)).startswith('symbol=')]
+    if not parts:
+        return np.empty(0, dtype=DTYPES[message_type])
+    array = np.concatenate([_read(part, message_type) for part in parts])
+    return array if symbol is None else array[array['symbol'] == symbol.encode()]
@@ -0,0 +1,185 @@
+"""
+Instrumentation hooks of the REST client and the stream client.
+
+Hooks are callables registered with :func:`add_hook` and invoked with an event name and a dict of fields:
+
+- ``request``: ``endpoint``, ``status``, ``seconds`` (total), ``server`` (seconds until the response headers arrived,
+  including connect and TLS handshake if a new connection was needed), ``bytes``
+- ``decode``: ``endpoint``, ``seconds`` spent decoding the JSON body
+- ``messages``: ``counts`` (number of messages per channel of a delivered batch), ``seconds`` spent in the callbacks
+- ``dispatch``: ``wait`` (seconds the oldest message of a batch was queued), ``size`` (batch size), ``depth``
+  (messages still queued)
+
+Without registered hooks the instrumented code paths only test an empty list, nothing is measured.
+
+:class:`Recorder` is a hook aggregating the events into histograms, exported as dict or Prometheus text format.
+
+Example:
+    >>> recorder = enable()
+    >>> marketdata.tops('AAPL')
+    >>> print(recorder.to_prometheus())
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+Hook = Callable[[str, dict], None]
+
+hooks: List[Hook] = []
+
+
+def add_hook(hook: Hook):
+    """Invoke given callable with every instrumentation event."""
+    hooks.append(hook)
+
+
+def remove_hook(hook: Hook):
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def emit(event: str, **fields):
+    """Pass an event to all hooks. Callers check ``if hooks:`` first to skip measuring when nobody listens."""
+    for hook in list(hooks):
+        hook(event, fields)
+
+
+class Histogram:
+    """Log-linear histogram with a relative error of at most 9% for percentiles of positive values."""
+
+    GROWTH = 2 ** .125
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.
+        self.min = math.inf
+        self.max = -math.inf
+        self._buckets: Dict[int, int] = {}
+
+    def record(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = math.floor(math.log(value, self.GROWTH)) if value > 0 else -(1 << 30)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate value below which the fraction `q` (0 to 1) of the recorded values lie."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                upper = 0. if index == -(1 << 30) else self.GROWTH ** (index + 1)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles=(.5, .9, .99)) -> dict:
+        result = {'count': self.count, 'sum': self.sum, 'min': self.min if self.count else None,
+                  'max': self.max if self.count else None}
+        result.update((f'p{round(q * 100):d}', self.percentile(q)) for q in quantiles)
+        return result
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Recorder:
+    """Hook aggregating instrumentation events into histograms and counters."""
+
+    QUANTILES = (.5, .9, .99)
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.record(value)
+
+    def _count(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def __call__(self, event: str, fields: dict):
+        with self._lock:
+            if event == 'request':
+                endpoint = fields['endpoint']
+                self._observe('iexdata_request_seconds', fields['seconds'], endpoint=endpoint)
+                self._observe('iexdata_request_server_seconds', fields['server'], endpoint=endpoint)
+                self._observe('iexdata_response_bytes', fields['bytes'], endpoint=endpoint)
+                self._count('iexdata_requests_total', 1, endpoint=endpoint, status=str(fields['status']))
+            elif event == 'decode':
+                self._observe('iexdata_decode_seconds', fields['seconds'], endpoint=fields['endpoint'])
+            elif event == 'messages':
+                for channel, count in fields['counts'].items():
+                    self._count('iexdata_stream_messages_total', count, channel=str(channel))
+                self._observe('iexdata_stream_handle_seconds', fields['seconds'])
+            elif event == 'dispatch':
+                self._observe('iexdata_stream_queue_wait_seconds', fields['wait'])
+                self._observe('iexdata_stream_batch_size', fields['size'])
+                self._gauges[('iexdata_stream_queue_depth', ())] = fields['depth']
+
+    def reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def to_dict(self) -> dict:
+        """Summaries (count, sum, min, max, percentiles) of all histograms, counters with their rate per second since
+        start (or the last reset) and gauges, keyed by metric name and labels."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        result = {}
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                result.setdefault(name, {})[labels] = histogram.summary(self.QUANTILES)
+            for (name, labels), value in self._counters.items():
+                result.setdefault(name, {})[labels] = {'value': value, 'rate': value / elapsed}
+            for (name, labels), value in self._gauges.items():
+                result.setdefault(name, {})[labels] = {'value': value}
+        return result
+
+    def to_prometheus(self) -> str:
+        """Export in the Prometheus text exposition format, histograms as summaries."""
+        def format_labels(labels: Labels, **extra) -> str:
+            items = list(labels) + list(extra.items())
+            if not items:
+                return ''
+            return '{' + ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                                  for k, v in items) + '}'
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f'# TYPE {name} summary')
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for q in self.QUANTILES:
+                        lines.append(f'{name}{format_labels(labels, quantile=q)} {histogram.percentile(q)!r}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum!r}')
+                    lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f'# TYPE {name} {kind}')
+                    lines.extend(f'{name}{format_labels(labels)} {value!r}'
+                                 for (metric, labels), value in sorted(metrics.items()) if metric == name)
+        return '\n'.join(lines) + '\n'
+
+
+def enable() -> Recorder:
+    """Register and return a new :class:`Recorder`."""
+    recorder = Recorder()
+    add_hook(recorder)
+    return recorder
@@ -0,0 +1,66 @@
+"""
+Incremental decoding of large JSON array responses.
+
+Endpoints like :func:`iexdata.endpoints.marketdata.tops` or :func:`iexdata.endpoints.refdata.symbols` return the whole
+market as one JSON array. :func:`iter_items` decodes such a body element by element while it is received, so peak
+memory is bounded by the chunk size instead of the response size.
+"""
+import codecs
+import re
+from json import JSONDecoder, JSONDecodeError
+from typing import Iterable, Iterator, Union
+
+_SEPARATORS = re.compile(r'[\s,]*')
+_TERMINATORS = frozenset(', \t\r\n]')
+_decoder = JSONDecoder()
+
+
+def iter_items(chunks: Iterable[Union[bytes, str]]) -> Iterator:
+    """Yield the elements of a top level JSON array from given chunks of the encoded document.
+
+    If the document is not an array, the complete value is decoded and yielded as single element.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    array = None
+    for chunk in chunks:
+        buffer += utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if array is None:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            array = buffer[0] == '['
+            if array:
+                buffer = buffer[1:]
+        if array:
+            buffer = yield from _decode_available(buffer)
+
+    buffer += utf8.decode(b'', final=True)
+    if not array:
+        yield _decoder.decode(buffer)
+        return
+    buffer = buffer[_SEPARATORS.match(buffer).end():]
+    if buffer and buffer[0] != ']':
+        item, end = _decoder.raw_decode(buffer)
+        yield item
+        buffer = buffer[_SEPARATORS.match(buffer, end).end():]
+    if not buffer.startswith(']'):
+        raise JSONDecodeError('Unterminated array', buffer, 0)
+
+
+def _decode_available(buffer: str):
+    """Yield all complete array elements at the start of given buffer and return the remaining incomplete tail."""
+    pos = 0
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos == len(buffer) or buffer[pos] == ']':
+            break
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except JSONDecodeError:
+            break  # incomplete element, wait for the next chunk
+        if not isinstance(item, (dict, list)) and (end == len(buffer) or buffer[end] not in _TERMINATORS):
+            break  # a scalar like a number might continue in the next chunk
+        yield item
+        pos = end
+    return buffer[pos:]
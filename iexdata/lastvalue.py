@@ -0,0 +1,192 @@
+"""
+Last value cache of the top of book and last sale per symbol.
+
+:class:`LastValueCache` keeps the latest TOPS values of every symbol in fixed size NumPy arrays, fed by the DEEP stream
+(:meth:`LastValueCache.on_batch`) or by polling :func:`iexdata.endpoints.marketdata.tops`
+(:meth:`LastValueCache.poll`). Every slot is guarded by a sequence counter (seqlock): the writer makes it odd while
+updating the slot and even again afterwards, readers retry until they copied the slot without the counter changing.
+Reads never take a lock and never see half updated values.
+
+The arrays can be placed in :mod:`multiprocessing.shared_memory` (Python 3.8+), so the worker processes of a web
+server share one copy updated by a single feeding process.
+
+Only numeric fields are kept. Requires the optional ``numpy`` dependency (``pip install iex-data[columnar]``).
+
+Example:
+    >>> cache = LastValueCache(shared_memory='iex-tops')  # in the feeding process
+    >>> WebSocketClient(symbols={'AAPL'}, channels={Channel.BOOK, Channel.TRADES}, on_batch=cache.on_batch).start()
+    >>> LastValueCache(shared_memory='iex-tops', create=False).get('AAPL')  # in any worker process
+"""
+import threading
+from typing import Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+
+from iexdata.endpoints import marketdata
+
+FIELDS = np.dtype([('bidPrice', 'f8'), ('bidSize', 'i8'), ('askPrice', 'f8'), ('askSize', 'i8'),
+                   ('lastUpdated', 'i8'), ('lastSalePrice', 'f8'), ('lastSaleSize', 'i8'), ('lastSaleTime', 'i8'),
+                   ('volume', 'i8'), ('marketPercent', 'f8')])
+"""Fields kept per symbol, named like the fields of :func:`iexdata.endpoints.marketdata.tops`."""
+
+_SYMBOL = np.dtype('S16')
+_HEADER = 2  # capacity, number of used slots
+
+
+def _layout(capacity: int):
+    """Offsets of header, sequence counters, symbols and values in the shared buffer, and its total size."""
+    seq = _HEADER * 8
+    symbols = seq + capacity * 8
+    values = symbols + capacity * _SYMBOL.itemsize
+    return seq, symbols, values, values + capacity * FIELDS.itemsize
+
+
+class LastValueCache:
+
+    def __init__(self, capacity: int = 16384, shared_memory: Optional[str] = None, create: bool = True):
+        """
+        :param capacity: Maximum number of symbols.
+        :param shared_memory: Name of a shared memory block to keep the values in, private memory if None. Requires
+                              Python 3.8 (:mod:`multiprocessing.shared_memory`).
+        :param create: Create the shared memory block (the feeding process), else attach to an existing one and
+                       take its capacity.
+        """
+        self._shm = None
+        if shared_memory is None:
+            buffer = bytearray(_layout(capacity)[3])
+        elif create:
+            from multiprocessing.shared_memory import SharedMemory
+            self._shm = SharedMemory(shared_memory, create=True, size=_layout(capacity)[3])
+            buffer = self._shm.buf
+        else:
+            from multiprocessing.shared_memory import SharedMemory
+            self._shm = SharedMemory(shared_memory)
+            try:
+                # only the creator may remove the block, see https://bugs.python.org/issue39959
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+            except Exception:
+                pass
+            buffer = self._shm.buf
+            capacity = int(np.frombuffer(buffer, dtype=np.int64, count=1)[0])
+        self.capacity = capacity
+        seq, symbols, values, _ = _layout(capacity)
+        self._header = np.frombuffer(buffer, dtype=np.int64, count=_HEADER)
+        self._seq = np.frombuffer(buffer, dtype=np.int64, count=capacity, offset=seq)
+        self._symbols = np.frombuffer(buffer, dtype=_SYMBOL, count=capacity, offset=symbols)
+        self._values = np.frombuffer(buffer, dtype=FIELDS, count=capacity, offset=values)
+        if create:
+            self._header[0] = capacity
+        self._slots = {}
+        self._lock = threading.Lock()  # serializes writers of this process
+
+    def _refresh(self):
+        """Learn the slots of symbols added by the writer (possibly in another process)."""
+        for slot in range(len(self._slots), int(self._header[1])):
+            self._slots[self._symbols[slot].decode()] = slot
+
+    def _slot(self, symbol: str, create: bool = False) -> Optional[int]:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            self._refresh()
+            slot = self._slots.get(symbol)
+            if slot is None and create:
+                slot = int(self._header[1])
+                if slot >= self.capacity:
+                    raise RuntimeError(f'Last value cache is full ({self.capacity} symbols)')
+                self._symbols[slot] = symbol.encode()
+                self._header[1] = slot + 1  # publish the slot after its symbol is written
+                self._slots[symbol] = slot
+        return slot
+
+    def __len__(self):
+        return int(self._header[1])
+
+    def __contains__(self, symbol: str):
+        return self._slot(symbol) is not None
+
+    def __getitem__(self, symbol: str) -> dict:
+        value = self.get(symbol)
+        if value is None:
+            raise KeyError(symbol)
+        return value
+
+    def symbols(self) -> List[str]:
+        self._refresh()
+        return list(self._slots)
+
+    def update(self, symbol: str, **fields):
+        """Set some of the :data:`FIELDS` of given symbol."""
+        with self._lock:
+            slot = self._slot(symbol, create=True)
+            record = self._values[slot].copy()
+            for field, value in fields.items():
+                record[field] = value
+            self._seq[slot] += 1  # odd: update in progress
+            self._values[slot] = record
+            self._seq[slot] += 1
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """A consistent snapshot of the values of given symbol, None if unknown."""
+        slot = self._slot(symbol)
+        if slot is None:
+            return None
+        while True:
+            before = self._seq[slot]
+            if before & 1:
+                continue  # writer active
+            record = self._values[slot].copy()
+            if self._seq[slot] == before:
+                break
+        result = dict(zip(FIELDS.names, record.tolist()))
+        result['symbol'] = symbol
+        return result
+
+    def tops(self, symbols: Union[None, str, Iterable[str]] = None) -> List[dict]:
+        """Cached values in the format of :func:`iexdata.endpoints.marketdata.tops`, all symbols if None."""
+        symbols = self.symbols() if symbols is None else [symbols] if isinstance(symbols, str) else symbols
+        return [value for value in map(self.get, symbols) if value is not None]
+
+    def update_tops(self, records: Iterable[Mapping]):
+        """Store the result of :func:`iexdata.endpoints.marketdata.tops`."""
+        for record in records:
+            self.update(record['symbol'], **{k: v for k, v in record.items() if k in FIELDS.names and v is not None})
+
+    def poll(self, symbols: Union[None, str, Iterable[str]] = None):
+        """Fetch and store the current TOPS of given symbols (all if None) with a single bulk request."""
+        self.update_tops(marketdata.tops(symbols))
+
+    def on_message(self, message: Mapping):
+        """Apply a decoded DEEP stream message: trades update the last sale, books the top of book.
+
+        Can be passed as `on_message` callback to :class:`iexdata.stream.WebSocketClient`.
+        """
+        kind, data = message.get('messageType'), message.get('data')
+        if not data:
+            return
+        if kind == 'trades':
+            self.update(message['symbol'], lastSalePrice=data['price'], lastSaleSize=data['size'],
+                        lastSaleTime=data['timestamp'])
+        elif kind == 'book':
+            bids, asks = data.get('bids') or (), data.get('asks') or ()
+            best_bid, best_ask = bids[0] if bids else {}, asks[0] if asks else {}
+            timestamps = [level.get('timestamp') or 0 for level in (best_bid, best_ask) if level]
+            self.update(message['symbol'], bidPrice=best_bid.get('price', 0.), bidSize=best_bid.get('size', 0),
+                        askPrice=best_ask.get('price', 0.), askSize=best_ask.get('size', 0),
+                        **({'lastUpdated': max(timestamps)} if timestamps else {}))
+
+    def on_batch(self, messages: List[Mapping]):
+        """Apply a list of decoded DEEP stream messages, see :meth:`on_message`."""
+        for message in messages:
+            self.on_message(message)
+
+    def close(self):
+        """Detach from the shared memory block."""
+        if self._shm is not None:
+            self._header = self._seq = self._symbols = self._values = None
+            self._shm.close()
+
+    def unlink(self):
+        """Remove the shared memory block, to be called by the creating process."""
+        if self._shm is not None:
+            self._shm.unlink()
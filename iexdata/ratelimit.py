@@ -0,0 +1,157 @@
+"""
+Client side rate limiting and request accounting.
+
+A :class:`TokenBucket` passed to :class:`iexdata.client.Client` (or :class:`iexdata.aio.AsyncClient`) throttles all
+requests of all threads using that client. :class:`FileTokenBucket` keeps the bucket in a small file guarded by an
+exclusive lock instead, so several processes share one budget. When the API still answers with 429, the announced
+Retry-After period blocks the bucket for everyone.
+
+Example:
+    >>> from iexdata.client import Client, set_client
+    >>> set_client(Client(rate_limiter=FileTokenBucket('/tmp/iexdata.bucket', rate=50)))
+"""
+import os
+import struct
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Thread safe token bucket refilled with `rate` tokens per second up to `burst` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        :param rate: Sustained number of requests per second.
+        :param burst: Maximum number of requests sent at once after being idle, defaults to `rate`.
+        """
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._blocked_until = 0.
+        self._lock = threading.Lock()
+
+    def _take(self, tokens: float, now: float) -> float:
+        """Take tokens if available and return 0, else return the seconds until they will be available."""
+        if tokens > self.burst:
+            raise ValueError(f'Cannot take {tokens} tokens from a bucket holding at most {self.burst}')
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.
+        return (tokens - self._tokens) / self.rate
+
+    def _block(self, until: float):
+        self._blocked_until = max(self._blocked_until, until)
+
+    def reserve(self, tokens: float = 1.) -> float:
+        """Take tokens without waiting, returns 0 on success or the seconds to wait before trying again.
+
+        Raises:
+            ValueError: If more tokens than `burst` are requested, the bucket never holds that many
+        """
+        with self._lock:
+            return self._take(tokens, time.time())
+
+    def acquire(self, tokens: float = 1., timeout: Optional[float] = None) -> bool:
+        """Wait until tokens are available and take them.
+
+        Returns:
+            bool: False if the tokens could not be taken within `timeout` seconds
+
+        Raises:
+            ValueError: If more tokens than `burst` are requested
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.reserve(tokens)
+            if not wait:
+                return True
+            if deadline is not None:
+                if time.monotonic() + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Hand out no tokens for given seconds, e.g. after the server signaled to retry later."""
+        with self._lock:
+            self._block(time.time() + seconds)
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket persisted in a file, shared by all processes using the same path.
+
+    Uses :func:`fcntl.flock`, i.e. only available on POSIX systems.
+    """
+
+    _STATE = struct.Struct('<ddd')
+
+    def __init__(self, path: str, rate: float, burst: Optional[float] = None):
+        """
+        :param path: The state file, created if it does not exist.
+        :param rate: Sustained number of requests per second of all processes.
+        :param burst: Maximum number of requests sent at once after being idle, defaults to `rate`.
+        """
+        import fcntl  # noqa: F401, fail early on unsupported platforms
+        super().__init__(rate, burst)
+        self.path = os.path.expanduser(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _locked(self, action, *args):
+        import fcntl
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                state = os.pread(self._fd, self._STATE.size, 0)
+                if len(state) == self._STATE.size:
+                    self._tokens, self._updated, self._blocked_until = self._STATE.unpack(state)
+                result = action(*args)
+                os.pwrite(self._fd, self._STATE.pack(self._tokens, self._updated, self._blocked_until), 0)
+                return result
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reserve(self, tokens: float = 1.) -> float:
+        return self._locked(self._take, tokens, time.time())
+
+    def penalize(self, seconds: float):
+        self._locked(self._block, time.time() + seconds)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Usage:
+    """Thread safe request, byte and throttling counters per endpoint."""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """The endpoint of a relative url, i.e. its path without query."""
+        return url.split('?', 1)[0]
+
+    def record(self, url: str, status: int, size: int):
+        with self._lock:
+            counters = self._counters.get(self.endpoint(url))
+            if counters is None:
+                counters = self._counters[self.endpoint(url)] = {'requests': 0, 'bytes': 0, 'throttled': 0}
+            counters['requests'] += 1
+            counters['bytes'] += size
+            if status == 429:
+                counters['throttled'] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Number of requests, received bytes and 429 responses per endpoint."""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
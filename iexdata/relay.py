@@ -0,0 +1,306 @@
+"""
+Local fan-out of a single DEEP stream connection to many processes.
+
+A :class:`Relay` holds the upstream :class:`iexdata.stream.WebSocketClient`, encodes every received message once and
+republishes it over a Unix domain socket. Processes subscribe with a :class:`RelayClient`, which offers the callback
+API of the websocket client. Symbol and channel filters of every subscriber are applied by the relay, so subscribers
+only receive (and decode) the messages they asked for. Symbols requested by a subscriber are added to the upstream
+subscription.
+
+Wire protocol: the relay sends one JSON encoded message per line, a subscriber sends its filter as a JSON line
+``{"symbols": [...] or null, "channels": [...] or null}`` after connecting and whenever it changes.
+
+Example:
+    >>> relay = Relay('/tmp/deep.sock', symbols={'AAPL', 'SNAP'}, channels={Channel.TRADES})
+    >>> relay.start()
+    >>> # in other processes
+    >>> RelayClient('/tmp/deep.sock', symbols={'AAPL'}, on_batch=print).start()
+"""
+import logging
+import os
+import socket
+import threading
+from typing import Iterable, List, Mapping, Optional, Set, Union
+
+import ujson as json
+
+from iexdata.dispatch import BoundedQueue, Overflow
+from iexdata.stream import Channel, WebSocketClient
+
+logger = logging.getLogger(__name__)
+
+
+def _channel_values(channels: Optional[Iterable[Channel]]) -> Optional[Set[str]]:
+    """Message types of given channels, None (all) if no channels are given or they contain :attr:`Channel.ALL`."""
+    if channels is None:
+        return None
+    channels = {channels} if isinstance(channels, Channel) else set(channels)
+    return None if Channel.ALL in channels else {c.value for c in channels}
+
+
+class _Subscriber:
+    """Connection of a single subscriber, with a bounded queue of pending data decoupling slow readers."""
+
+    def __init__(self, relay: 'Relay', sock: socket.socket):
+        self.relay = relay
+        self.sock = sock
+        self.symbols: Optional[Set[str]] = None
+        self.channels: Optional[Set[str]] = None
+        self.subscribed = False  # nothing is sent before the subscriber told its filter
+        self.queue = BoundedQueue(relay.queue_size, relay.overflow)
+        self.closed = threading.Event()
+
+    def start(self):
+        """Start serving the connection, only after the subscriber was registered, so closing it unregisters it."""
+        threading.Thread(target=self._read, daemon=True).start()
+        threading.Thread(target=self._send, daemon=True).start()
+
+    def wants(self, symbol: Optional[str], kind: Optional[str]) -> bool:
+        return self.subscribed and (self.symbols is None or symbol in self.symbols) and \
+            (self.channels is None or kind in self.channels)
+
+    def _read(self):
+        buffer = b''
+        try:
+            while not self.closed.is_set():
+                chunk = self.sock.recv(1 << 16)
+                if not chunk:
+                    break
+                *lines, buffer = (buffer + chunk).split(b'\n')
+                for line in lines:
+                    subscription = json.loads(line)
+                    symbols, channels = subscription.get('symbols'), subscription.get('channels')
+                    self.symbols = None if symbols is None else set(symbols)
+                    self.channels = None if channels is None or Channel.ALL.value in channels else set(channels)
+                    self.subscribed = True
+                    self.relay._subscribed(self.symbols)
+        except (OSError, ValueError) as e:
+            logger.warning('Subscriber connection failed: %s', e)
+        self.close()
+
+    def _send(self):
+        while not self.closed.is_set():
+            items = self.queue.get_many(1000, timeout=.1)
+            if not items:
+                continue
+            try:
+                self.sock.sendall(b''.join(items))
+            except OSError:
+                break
+        self.close()
+
+    def close(self):
+        if not self.closed.is_set():
+            self.closed.set()
+            self.queue.close()
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.relay._unsubscribed(self)
+
+
+class Relay:
+
+    def __init__(self, path: str, symbols: Union[None, str, Set[str]] = None, channels: Set[Channel] = None,
+                 connect: bool = True, queue_size: int = 10000, overflow: Overflow = Overflow.DROP_OLDEST,
+                 **kwargs):
+        """
+        :param path: Path of the Unix domain socket to listen on, replaced if it exists.
+        :param symbols: Single symbol, or set of symbols to subscribe to upstream.
+        :param channels: The upstream channels.
+        :param connect: Connect upstream. If False, messages are only published by calling :meth:`publish`, e.g. to
+                        relay a :class:`iexdata.capture.ReplayClient`.
+        :param queue_size: Maximum number of batches pending per subscriber.
+        :param overflow: What to do when a subscriber falls behind and its queue is full, dropping its oldest batches
+                         by default so a slow subscriber never stalls the others.
+        :param kwargs: Further arguments of :class:`iexdata.stream.WebSocketClient`.
+        """
+        self.path = path
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.published = 0
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self.client = WebSocketClient(symbols, channels, on_batch=self.publish, **kwargs) if connect else None
+        self._server = None
+        self.__thread = threading.Thread(target=self.__accept, daemon=True)
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen()
+        self.__thread.start()
+        if self.client is not None:
+            self.client.start()
+
+    def __accept(self):
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                break  # closed by stop
+            subscriber = _Subscriber(self, sock)
+            with self._lock:
+                self._subscribers.append(subscriber)
+            subscriber.start()
+
+    def _subscribed(self, symbols: Optional[Set[str]]):
+        if self.client is not None and symbols:
+            self.client.add_symbols(symbols)
+
+    def _unsubscribed(self, subscriber: _Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, messages: List[Mapping]):
+        """Send decoded messages to all subscribers interested in them, each message is encoded once."""
+        encoded = [(m.get('symbol'), m.get('messageType'), json.dumps(m).encode() + b'\n') for m in messages]
+        self.published += len(encoded)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            data = b''.join(line for symbol, kind, line in encoded if subscriber.wants(symbol, kind))
+            if data:
+                subscriber.queue.put(None, data)
+
+    def on_message(self, message: Mapping):
+        self.publish([message])
+
+    # allow passing the relay as on_batch callback
+    on_batch = publish
+
+    def metrics(self) -> dict:
+        """Number of published messages and subscribers, and the batches dropped for slow subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return dict(published=self.published, subscribers=len(subscribers),
+                    dropped=sum(s.queue.dropped for s in subscribers))
+
+    def stop(self, join=True, timeout=None):
+        """Disconnect upstream and all subscribers."""
+        if self.client is not None:
+            self.client.stop(join=join, timeout=timeout)
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+        if join and self.__thread.is_alive():
+            self.__thread.join(timeout=timeout)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RelayClient:
+    """Subscriber of a :class:`Relay` with the callback API of :class:`iexdata.stream.WebSocketClient`."""
+
+    def __init__(self, path: str, symbols: Union[None, str, Set[str]] = None, channels: Set[Channel] = None,
+                 on_message=None, on_connect=None, on_disconnect=None, on_batch=None):
+        """
+        :param path: Path of the relay's Unix domain socket.
+        :param symbols: Single symbol, or set of symbols to receive messages of, all relayed symbols if None.
+        :param channels: The channels of interest, all relayed channels if None.
+        :param on_message: Callback to be invoked for every message
+        :param on_connect: Callback to be invoked when the connection is opened
+        :param on_disconnect: Callback to be invoked when the connection is closed
+        :param on_batch: Callback to be invoked with lists of messages instead of `on_message`
+        """
+        self.path = path
+        self.symbols = None if symbols is None else {symbols} if isinstance(symbols, str) else set(symbols)
+        self.channels = None if channels is None else {channels} if isinstance(channels, Channel) else set(channels)
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.on_batch = on_batch
+        self.received = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._send_subscription()
+        self.__thread = threading.Thread(target=self.__run)
+        self.__terminate = threading.Event()
+
+    def _send_subscription(self):
+        channels = _channel_values(self.channels)
+        subscription = {'symbols': None if self.symbols is None else sorted(self.symbols),
+                        'channels': None if channels is None else sorted(channels)}
+        self._sock.sendall(json.dumps(subscription).encode() + b'\n')
+
+    def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Receive messages of further symbols, a client receiving all relayed symbols keeps doing so."""
+        if self.symbols is None:
+            return
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        self.symbols |= symbols
+        self._send_subscription()
+
+    def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Stop receiving messages of given symbols, only possible if the client was created with symbols."""
+        if self.symbols is None:
+            raise ValueError('Cannot remove symbols from a subscription to all relayed symbols')
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        self.symbols -= symbols
+        self._send_subscription()
+
+    def set_channels(self, channels: Union[Channel, Iterable[Channel]]):
+        self.channels = {channels} if isinstance(channels, Channel) else set(channels)
+        self._send_subscription()
+
+    def start(self):
+        self.__thread.start()
+
+    def __run(self):
+        if self.on_connect is not None:
+            self.on_connect()
+        buffer = b''
+        self._sock.settimeout(.1)
+        while not self.__terminate.is_set():
+            try:
+                chunk = self._sock.recv(1 << 20)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not chunk:
+                break
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            if lines:
+                # decode all complete lines with a single call
+                messages = json.loads(b'[' + b','.join(lines) + b']')
+                self.received += len(messages)
+                if self.on_batch is not None:
+                    self.on_batch(messages)
+                elif self.on_message is not None:
+                    for message in messages:
+                        self.on_message(message)
+        self._sock.close()
+        if self.on_disconnect is not None:
+            self.on_disconnect()
+
+    def stop(self, join=True, timeout=None):
+        """Disconnect from the relay and terminate the handler thread."""
+        self.__terminate.set()
+        try:
+            # wakes up the handler thread blocked in recv
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # not connected anymore
+        if not self.__thread.is_alive():
+            self._sock.close()
+        elif join:
+            self.__thread.join(timeout=timeout)
+            if self.__thread.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
@@ -0,0 +1,203 @@
+"""
+Adaptive polling of the near real-time REST endpoints.
+
+A :class:`PollingScheduler` polls endpoints like :func:`iexdata.endpoints.marketdata.tops` on behalf of any number of
+subscribers:
+
+- The poll interval of every endpoint depends on the market session derived from
+  :func:`iexdata.endpoints.marketdata.system_event`, e.g. every second during regular hours, but only every five
+  minutes while the market is closed.
+- Subscribers of the same endpoint with the same arguments share a single poll at the shortest requested interval.
+- Subscribers are only called if the response differs from the previous one.
+
+Example:
+    >>> scheduler = PollingScheduler()
+    >>> scheduler.subscribe(marketdata.tops, print, 'AAPL', cadence=Cadence(regular=.5))
+    >>> scheduler.start()
+"""
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from iexdata.endpoints import marketdata
+
+logger = logging.getLogger(__name__)
+
+
+class Session(Enum):
+    CLOSED = 'closed'
+    EXTENDED = 'extended'  # pre- and post-market
+    REGULAR = 'regular'
+
+
+# system event codes: start of messages, start of system hours, start of regular market hours, end of regular market
+# hours, end of system hours, end of messages
+SESSIONS = {'O': Session.CLOSED, 'S': Session.EXTENDED, 'R': Session.REGULAR, 'M': Session.EXTENDED,
+            'E': Session.CLOSED, 'C': Session.CLOSED}
+
+
+def session_of(event: Optional[dict]) -> Session:
+    """The market session following given system event, closed if unknown."""
+    return SESSIONS.get((event or {}).get('systemEvent'), Session.CLOSED)
+
+
+class Cadence(NamedTuple):
+    """Poll interval in seconds per market session."""
+    regular: float = 1.
+    extended: float = 10.
+    closed: float = 300.
+
+    def interval(self, session: Session) -> float:
+        return getattr(self, session.value)
+
+
+class Subscription(NamedTuple):
+    key: Tuple
+    callback: Callable
+    cadence: Cadence
+
+
+class _Job:
+    """A distinct request shared by all its subscribers."""
+
+    def __init__(self, endpoint: Callable, args: tuple, kwargs: dict):
+        self.endpoint = endpoint
+        self.args = args
+        self.kwargs = kwargs
+        self.subscriptions: List[Subscription] = []
+        self.last_run = None
+        self.last_value = None
+
+    def interval(self, session: Session) -> float:
+        return min(s.cadence.interval(session) for s in self.subscriptions)
+
+    def due(self, session: Session) -> float:
+        return float('-inf') if self.last_run is None else self.last_run + self.interval(session)
+
+
+def _hashable(value):
+    """Canonical hashable form of an endpoint argument, symbol lists and sets in any order map to the same tuple."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = tuple(_hashable(v) for v in value)
+        try:
+            return tuple(sorted(items))
+        except TypeError:
+            return items
+    return value
+
+
+class PollingScheduler:
+
+    def __init__(self, session_interval: float = 60., clock: Callable[[], float] = time.monotonic):
+        """
+        :param session_interval: Seconds between two requests of the system event to determine the market session.
+        :param clock: Monotonic time source, replaceable for testing.
+        """
+        self.session_interval = session_interval
+        self.clock = clock
+        self.session = Session.CLOSED
+        self.requests = 0
+        self.unchanged = 0
+        self.delivered = 0
+        self._jobs: Dict[Tuple, _Job] = {}
+        self._session_checked = None
+        self._lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__terminate = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+
+    def subscribe(self, endpoint: Callable, callback: Callable, *args, cadence: Cadence = Cadence(),
+                  **kwargs) -> Subscription:
+        """Call `callback` with the result of ``endpoint(*args, **kwargs)`` whenever it changed.
+
+        Returns:
+            Subscription: Handle to pass to :meth:`unsubscribe`
+        """
+        key = (endpoint, tuple(_hashable(arg) for arg in args), _hashable(kwargs))
+        subscription = Subscription(key, callback, cadence)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                job = self._jobs[key] = _Job(endpoint, args, kwargs)
+            job.subscriptions.append(subscription)
+        self.__wakeup.set()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            job = self._jobs.get(subscription.key)
+            if job is not None and subscription in job.subscriptions:
+                job.subscriptions.remove(subscription)
+                if not job.subscriptions:
+                    del self._jobs[subscription.key]
+
+    def update_session(self) -> Session:
+        """Determine the market session from the latest system event."""
+        try:
+            self.session = session_of(marketdata.system_event())
+        except Exception as e:
+            logger.warning('Failed to determine the market session: %s', e)
+        self._session_checked = self.clock()
+        return self.session
+
+    def poll_due(self) -> float:
+        """Poll all due endpoints once and return the seconds until the next poll is due."""
+        now = self.clock()
+        if self._session_checked is None or now - self._session_checked >= self.session_interval:
+            self.update_session()
+        with self._lock:
+            due = [job for job in self._jobs.values() if job.due(self.session) <= now]
+        for job in due:
+            self._poll(job, now)
+        with self._lock:
+            next_due = min((job.due(self.session) for job in self._jobs.values()), default=now + self.session_interval)
+        next_due = min(next_due, self._session_checked + self.session_interval)
+        return max(0., next_due - self.clock())
+
+    def _poll(self, job: _Job, now: float):
+        job.last_run = now
+        try:
+            value = job.endpoint(*job.args, **job.kwargs)
+        except Exception as e:
+            logger.warning('Polling %s failed: %s', getattr(job.endpoint, '__name__', job.endpoint), e)
+            return
+        self.requests += 1
+        if value == job.last_value:
+            self.unchanged += 1
+            return
+        job.last_value = value
+        with self._lock:
+            subscriptions = list(job.subscriptions)
+        for subscription in subscriptions:
+            self.delivered += 1
+            try:
+                subscription.callback(value)
+            except Exception as e:
+                logger.warning('Callback of %s failed: %s', getattr(job.endpoint, '__name__', job.endpoint), e)
+
+    def metrics(self) -> dict:
+        """Current session, number of sent requests, of unchanged responses and of callback invocations."""
+        return dict(session=self.session.value, requests=self.requests, unchanged=self.unchanged,
+                    delivered=self.delivered, jobs=len(self._jobs))
+
+    def start(self):
+        self.__thread.start()
+
+    def __run(self):
+        while not self.__terminate.is_set():
+            delay = self.poll_due()
+            self.__wakeup.wait(delay)
+            self.__wakeup.clear()
+
+    def stop(self, join=True, timeout=None):
+        """Terminate the polling thread."""
+        self.__terminate.set()
+        self.__wakeup.set()
+        if join and self.__thread.is_alive():
+            self.__thread.join(timeout=timeout)
+            if self.__thread.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
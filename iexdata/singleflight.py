@@ -0,0 +1,74 @@
+"""
+Coalescing of concurrent identical requests.
+
+While a call for a key is in flight, further calls for the same key wait for it and share its result (or exception)
+instead of issuing their own request, so a burst of callers asking for the same url results in a single upstream
+request. Nothing is kept once the call completed, see :mod:`iexdata.cache` for that.
+
+Callers of a shared call receive the very same decoded object and must not modify it.
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces calls of threads."""
+
+    def __init__(self):
+        self.shared = 0  # number of calls served by the request of another caller
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable, *args, **kwargs):
+        """Return ``function(*args, **kwargs)``, or the result of the call in flight for given key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = function(*args, **kwargs)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Coalesces coroutine calls of the same event loop."""
+
+    def __init__(self):
+        self.shared = 0  # number of calls served by the request of another caller
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, function: Callable[..., Awaitable], *args, **kwargs):
+        """Return ``await function(*args, **kwargs)``, or the result of the call in flight for given key."""
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = self._calls[key] = asyncio.ensure_future(function(*args, **kwargs))
+            task.add_done_callback(lambda done: self._calls.pop(key) if self._calls.get(key) is done else None)
+        else:
+            self.shared += 1
+        # a cancelled caller must not cancel the request the others are waiting for
+        return await asyncio.shield(task)
@@ -0,0 +1,205 @@
+"""
+Local store of historical IEX statistics with incremental backfill.
+
+Results of :func:`iexdata.endpoints.stats.historical_daily` are persisted per trading day and results of
+:func:`iexdata.endpoints.stats.historical_summary` per month in a sqlite database. Range queries only request the
+days (or months) missing in the store, several at a time, and are answered from disk afterwards. Days without data
+(holidays) are remembered as well, so they are not requested again.
+
+Example:
+    >>> store = HistoricalStore('~/.cache/iexdata-history.sqlite')
+    >>> store.historical_daily('20190101', '20190331', as_frame=True)
+"""
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+import ujson as json
+
+from iexdata.cache import EASTERN
+from iexdata.endpoints import stats
+
+Day = Union[str, date, datetime]
+
+
+def _day(value: Day) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value.replace('-', ''), '%Y%m%d').date()
+    raise TypeError(f'Neither date, nor string: {value}')
+
+
+def _month(value: Day) -> str:
+    if isinstance(value, str) and len(value.replace('-', '')) == 6:
+        return value.replace('-', '')
+    return _day(value).strftime('%Y%m')
+
+
+def _weekdays(start: date, end: date) -> Iterable[date]:
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def _months(start: str, end: str) -> Iterable[str]:
+    year, month = int(start[:4]), int(start[4:])
+    while f'{year:04d}{month:02d}' <= end:
+        yield f'{year:04d}{month:02d}'
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _month_days(month: str) -> List[str]:
+    first = datetime.strptime(month, '%Y%m').date()
+    last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return [day.strftime('%Y%m%d') for day in _weekdays(first, last)]
+
+
+def _today() -> date:
+    return datetime.now(EASTERN).date()
+
+
+class HistoricalStore:
+
+    def __init__(self, path: str = '~/.cache/iexdata-history.sqlite', workers: int = 8):
+        """
+        :param path: The sqlite database file, created if it does not exist.
+        :param workers: Maximum number of concurrent requests while backfilling.
+        """
+        self.path = os.path.expanduser(path)
+        self.workers = workers
+        self._local = threading.local()
+        with self._connection() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS daily (date TEXT PRIMARY KEY, record TEXT)')
+            con.execute('CREATE TABLE IF NOT EXISTS summary (month TEXT PRIMARY KEY, record TEXT)')
+            # days and months completely fetched, including those without any data
+            con.execute('CREATE TABLE IF NOT EXISTS fetched (kind TEXT, key TEXT, PRIMARY KEY (kind, key))')
+
+    def _connection(self) -> sqlite3.Connection:
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(self.path, timeout=30)
+        return con
+
+    def _fetched(self, kind: str, start: str, end: str) -> set:
+        rows = self._connection().execute('SELECT key FROM fetched WHERE kind = ? AND key BETWEEN ? AND ?',
+                                          (kind, start, end))
+        return {key for key, in rows}
+
+    def missing_days(self, start: Day, end: Optional[Day] = None) -> List[str]:
+        """Weekdays (YYYYMMDD) in [start, end] not in the store yet, today and later days are always missing."""
+        start, end = _day(start), _day(end or start)
+        fetched = self._fetched('daily', start.strftime('%Y%m%d'), end.strftime('%Y%m%d'))
+        return [day for day in (d.strftime('%Y%m%d') for d in _weekdays(start, end)) if day not in fetched]
+
+    def missing_months(self, start: Day, end: Optional[Day] = None) -> List[str]:
+        """Months (YYYYMM) in [start, end] not in the store yet, the current month is always missing."""
+        start, end = _month(start), _month(end or start)
+        fetched = self._fetched('summary', start, end)
+        return [month for month in _months(start, end) if month not in fetched]
+
+    def backfill_daily(self, start: Day, end: Optional[Day] = None) -> int:
+        """Fetch the missing days in [start, end], months with several missing days with a single request.
+
+        Returns:
+            int: Number of requests sent
+        """
+        by_month = {}
+        for day in self.missing_days(start, end):
+            by_month.setdefault(day[:6], []).append(day)
+        # request key (day or month) -> days covered by the response
+        covered = {days[0] if len(days) == 1 else month: days if len(days) == 1 else _month_days(month)
+                   for month, days in by_month.items()}
+        keys = list(covered)
+        if not keys:
+            return 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda key: stats.historical_daily(date=key), keys))
+
+        today = _today().strftime('%Y%m%d')
+        with self._connection() as con:
+            for key, result in zip(keys, results):
+                records = result if isinstance(result, list) else [result] if result else []
+                con.executemany('INSERT OR REPLACE INTO daily VALUES (?, ?)',
+                                [(record['date'].replace('-', ''), json.dumps(record)) for record in records])
+                # an empty result for a past day means there was no trading, but today's data may still change
+                con.executemany('INSERT OR IGNORE INTO fetched VALUES (?, ?)',
+                                [('daily', day) for day in covered[key] if day < today])
+        return len(keys)
+
+    def backfill_summary(self, start: Day, end: Optional[Day] = None) -> int:
+        """Fetch the missing months in [start, end].
+
+        Returns:
+            int: Number of requests sent
+        """
+        months = self.missing_months(start, end)
+        if not months:
+            return 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda month: stats.historical_summary(date=month), months))
+
+        current = _today().strftime('%Y%m')
+        with self._connection() as con:
+            con.executemany('INSERT OR REPLACE INTO summary VALUES (?, ?)',
+                            [(month, json.dumps(result)) for month, result in zip(months, results)])
+            con.executemany('INSERT OR IGNORE INTO fetched VALUES (?, ?)',
+                            [('summary', month) for month in months if month < current])
+        return len(months)
+
+    def historical_daily(self, start: Day, end: Optional[Day] = None, as_arrays: bool = False,
+                         as_frame: bool = False, backfill: bool = True):
+        """
+        Daily stats of all days in [start, end], see :func:`iexdata.endpoints.stats.historical_daily`.
+
+        Args:
+            start: First day (YYYYMMDD or date)
+            end: Last day (YYYYMMDD or date), defaults to `start`
+            as_arrays: Return typed column arrays, see :mod:`iexdata.columnar`
+            as_frame: Return a pandas DataFrame, see :mod:`iexdata.columnar`
+            backfill: Fetch missing days first, else only return what is stored
+
+        Returns:
+            list: Records ordered by date
+        """
+        if backfill:
+            self.backfill_daily(start, end)
+        rows = self._connection().execute('SELECT record FROM daily WHERE date BETWEEN ? AND ? ORDER BY date',
+                                          (_day(start).strftime('%Y%m%d'), _day(end or start).strftime('%Y%m%d')))
+        result = [json.loads(record) for record, in rows]
+        if as_arrays or as_frame:
+            from iexdata.columnar import convert, DAILY_STATS
+            return convert(result, DAILY_STATS, as_arrays, as_frame)
+        return result
+
+    def historical_summary(self, start: Day, end: Optional[Day] = None, backfill: bool = True) -> Dict[str, object]:
+        """
+        Summary stats of all months in [start, end], see :func:`iexdata.endpoints.stats.historical_summary`.
+
+        Args:
+            start: First month (YYYYMM or date)
+            end: Last month (YYYYMM or date), defaults to `start`
+            backfill: Fetch missing months first, else only return what is stored
+
+        Returns:
+            dict: Result per month (YYYYMM)
+        """
+        if backfill:
+            self.backfill_summary(start, end)
+        rows = self._connection().execute(
+            'SELECT month, record FROM summary WHERE month BETWEEN ? AND ? ORDER BY month',
+            (_month(start), _month(end or start)))
+        return {month: json.loads(record) for month, record in rows}
+
+    def close(self):
+        con = getattr(self._local, 'con', None)
+        if con is not None:
+            con.close()
+            self._local.con = None
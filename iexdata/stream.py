@@ -1,10 +1,21 @@
+import logging
+import random
+import re
 import threading
+import time
 from enum import Enum
-from typing import Union, Set
+from typing import Union, Set, List, Iterable
 
 import ujson as json
 from socketIO_client_nexus import SocketIO, BaseNamespace
 
+from iexdata import instrument
+from iexdata.common import symbol_batches
+from iexdata.dispatch import Dispatcher, Overflow
+from iexdata.endpoints import marketdata
+
+logger = logging.getLogger(__name__)
+
 
 class Channel(Enum):
     TRADING_STATUS = 'tradingstatus'
@@ -19,10 +30,38 @@ class Channel(Enum):
     ALL = 'deep'
 
 
+# Bounds for the symbols sent with a single subscribe frame, keeping frames well below the server's size limit.
+MAX_FRAME_SYMBOLS = 500
+MAX_FRAME_LENGTH = 4000
+
+
+def subscription_frames(symbols: Iterable[str], channels: Iterable[Channel]) -> List[str]:
+    """Encode the (un-)subscribe payloads for given symbols and channels, as few frames as possible."""
+    channels = sorted(c.value for c in channels)
+    if not channels:
+        return []
+    return [json.dumps({'symbols': batch, 'channels': channels})
+            for batch in symbol_batches(sorted(symbols), MAX_FRAME_SYMBOLS, MAX_FRAME_LENGTH)]
+
+
+# Cheap extraction of the routing key from a raw message without decoding it on the socket thread.
+_SYMBOL = re.compile(r'"symbol"\s*:\s*"([^"]*)"')
+_MESSAGE_TYPE = re.compile(r'"messageType"\s*:\s*"([^"]*)"')
+
+
+def _message_key(data: str):
+    symbol = _SYMBOL.search(data)
+    kind = _MESSAGE_TYPE.search(data)
+    return symbol.group(1) if symbol else None, kind.group(1) if kind else None
+
+
 class WebSocketClient:
 
     def __init__(self, symbols: Union[str, Set[str]] = None, channels: Set[Channel] = None, on_message=None,
-                 on_connect=None, on_disconnect=None, port=443, url='https://ws-api.iextrading.com'):
+                 on_connect=None, on_disconnect=None, port=443, url='https://ws-api.iextrading.com', on_batch=None,
+                 batch_size: int = 1000, batch_interval: float = .05, batch_columns: bool = False, workers: int = 1,
+                 queue_size: int = 10000, overflow: Overflow = Overflow.DROP_OLDEST, reconnect: bool = True,
+                 backoff: float = .5, max_backoff: float = 30., on_resync=None, capture=None):
         """
         :param symbols: Single symbol, or set of symbols to subscribe to.
         :param channels: The channels of interest.
@@ -31,9 +70,44 @@ class WebSocketClient:
         :param on_disconnect: Callback to be invoked when the connection is closed
         :param port: The port to use for the connection
         :param url: The IEX websocket URL to use
+        :param on_batch: Callback to be invoked with a list of decoded messages instead of calling `on_message` once
+                         per message.
+        :param batch_size: Maximum number of messages decoded and delivered at once.
+        :param batch_interval: Seconds to wait for a batch to fill up before it is delivered to `on_batch`.
+        :param batch_columns: Deliver batches grouped by message type, with tabular message types converted to column
+                              arrays, see :func:`iexdata.columnar.message_columns`. Requires numpy.
+        :param workers: Number of threads invoking the callbacks. Messages of the same symbol are always handled by
+                        the same worker, in the order they were received.
+        :param queue_size: Maximum number of received messages pending per worker.
+        :param overflow: What to do when a worker falls behind and its queue is full, see
+                         :class:`iexdata.dispatch.Overflow`. Drops the oldest pending message by default.
+                         :attr:`iexdata.dispatch.Overflow.BLOCK` stalls the socket thread until the worker catches
+                         up, which also delays the socket.io heartbeats and can make the server drop the connection.
+        :param reconnect: Reconnect and re-subscribe automatically if the connection drops.
+        :param backoff: Initial delay in seconds between reconnect attempts, doubled (with jitter) on every failure.
+        :param max_backoff: Maximum delay in seconds between reconnect attempts.
+        :param on_resync: Callback to be invoked after a reconnect with the REST snapshots of the subscribed symbols,
+                          a dict with the results of :func:`iexdata.endpoints.marketdata.book` and
+                          :func:`iexdata.endpoints.marketdata.trading_status` keyed by 'book' and 'tradingstatus',
+                          if the respective channel is subscribed.
+        :param capture: Record all received messages to this sink, e.g. a :class:`iexdata.capture.CaptureWriter`.
         """
         self.port = port
         self.url = url
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.on_batch = on_batch
+        self.batch_columns = batch_columns
+        self.reconnect = reconnect
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_resync = on_resync
+        self.capture = capture
+        self.received = 0
+        self.malformed = 0
+        self.reconnects = 0
+        self.time_to_recover = None
 
         symbols = {} if symbols is None else symbols
         channels = {Channel.ALL} if channels is None else channels
@@ -41,44 +115,188 @@ class WebSocketClient:
         self.symbols = {symbols} if isinstance(symbols, str) else set(symbols)
         self.channels = {channels} if isinstance(channels, Channel) else set(channels)
 
+        client = self
+
         class Namespace(BaseNamespace):
-            count = 0
 
             def on_connect(self, *data):
-                if on_connect is not None:
-                    on_connect(*data)
-                    self.count = self.count + 1
+                client._on_connect(*data)
 
             def on_disconnect(self, *data):
-                if on_disconnect is not None:
-                    on_disconnect(*data)
-                    self.count = self.count + 1
+                client._on_disconnect(*data)
 
             def on_message(self, data):
-                if on_message is not None:
-                    on_message(json.loads(data))
-                    self.count = self.count + 1
+                client._on_message(data)
+
+        # socket i/o and message handling are decoupled, the socket thread only queues the raw messages
+        self.dispatcher = Dispatcher(self._handle, workers=workers, maxsize=queue_size, overflow=overflow,
+                                     batch_size=batch_size, linger=batch_interval if on_batch is not None else 0.)
 
-        self.socket = SocketIO(host=self.url, port=self.port)
-        self.namespace = self.socket.define(Namespace, '/1.0/deep')
+        self.__namespace = Namespace
+        self.__disconnected = threading.Event()
+        self.__disconnected_at = None
+        self.__connect()
 
         self.__thread = threading.Thread(target=self.__run)
         self.__terminate = threading.Event()
 
-        for symbol in self.symbols:
-            sendinit = {
-                "symbols": [symbol],
-                "channels": [c.value for c in channels]
-            }
-            self.namespace.emit('subscribe', json.dumps(sendinit))
+        self.__subscription_lock = threading.Lock()
+        self._emit('subscribe', self.symbols, self.channels)
+
+    def __connect(self, **kwargs):
+        self.socket = SocketIO(host=self.url, port=self.port, **kwargs)
+        self.namespace = self.socket.define(self.__namespace, '/1.0/deep')
+
+    def _emit(self, event: str, symbols: Iterable[str], channels: Iterable[Channel]):
+        for frame in subscription_frames(symbols, channels):
+            self.namespace.emit(event, frame)
+
+    def add_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Subscribe to additional symbols, only the not yet subscribed ones are sent to the server."""
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        with self.__subscription_lock:
+            added = symbols - self.symbols
+            self.symbols |= added
+            self._emit('subscribe', added, self.channels)
+
+    def remove_symbols(self, symbols: Union[str, Iterable[str]]):
+        """Unsubscribe from given symbols."""
+        symbols = {symbols} if isinstance(symbols, str) else set(symbols)
+        with self.__subscription_lock:
+            removed = symbols & self.symbols
+            self.symbols -= removed
+            self._emit('unsubscribe', removed, self.channels)
+
+    def set_channels(self, channels: Union[Channel, Iterable[Channel]]):
+        """Change the channels of all subscribed symbols, only added and removed channels are sent to the server."""
+        channels = {channels} if isinstance(channels, Channel) else set(channels)
+        with self.__subscription_lock:
+            added, removed = channels - self.channels, self.channels - channels
+            self.channels = channels
+            self._emit('unsubscribe', self.symbols, removed)
+            self._emit('subscribe', self.symbols, added)
+
+    def _on_connect(self, *data):
+        if self.on_connect is not None:
+            self.on_connect(*data)
+
+    def _on_disconnect(self, *data):
+        if self.__disconnected_at is None:
+            self.__disconnected_at = time.monotonic()
+        self.__disconnected.set()
+        if self.on_disconnect is not None:
+            self.on_disconnect(*data)
+
+    def _on_message(self, data: str):
+        self.received += 1
+        key = _message_key(data)
+        # captured messages are stamped on arrival, not when a (lingering) batch is handled
+        self.dispatcher.submit(key[0], key, data if self.capture is None else (data, time.time_ns()))
+
+    def _handle(self, pending: List):
+        """Decode and deliver a list of raw messages (with their receive time if captured) on a worker thread."""
+        if self.capture is not None:
+            pending, received = [data for data, _ in pending], [t for _, t in pending]
+        try:
+            # decode the whole batch with a single call instead of once per message
+            messages = json.loads('[' + ','.join(pending) + ']')
+        except ValueError:
+            # a malformed frame must not take the valid messages of its batch down with it
+            valid = []
+            for i, raw in enumerate(pending):
+                try:
+                    valid.append((i, json.loads(raw)))
+                except ValueError:
+                    self.malformed += 1
+                    logger.warning('Skipping malformed message: %.200s', raw)
+            messages = [message for _, message in valid]
+            pending = [pending[i] for i, _ in valid]
+            if self.capture is not None:
+                received = [received[i] for i, _ in valid]
+        started = time.perf_counter() if instrument.hooks else None
+        if self.capture is not None:
+            self.capture.write_many(messages, received)
+        if self.on_batch is not None:
+            if self.batch_columns:
+                from iexdata.columnar import message_columns
+                messages = message_columns(messages)
+            self.on_batch(messages)
+        elif self.on_message is not None:
+            for message in messages:
+                self.on_message(message)
+        if started is not None:
+            counts = {}
+            for raw in pending:
+                channel = _message_key(raw)[1]
+                counts[channel] = counts.get(channel, 0) + 1
+            instrument.emit('messages', counts=counts, seconds=time.perf_counter() - started)
+
+    def metrics(self) -> dict:
+        """Number of received and malformed messages and reconnects, the seconds it took to recover from the last
+        disconnect, plus delivery, queue depth, drop and lag metrics of the worker queues."""
+        return dict(received=self.received, malformed=self.malformed, reconnects=self.reconnects, time_to_recover=self.time_to_recover,
+                    **self.dispatcher.metrics())
 
     def start(self):
+        self.dispatcher.start()
         self.__thread.start()
 
     def __run(self):
         while not self.__terminate.is_set():
-            self.socket.wait(seconds=.1)
+            if self.__disconnected.is_set() and self.reconnect:
+                self.__reconnect()
+                continue
+            try:
+                self.socket.wait(seconds=.1)
+            except Exception as e:
+                logger.warning('Connection failed: %s', e)
+                self._on_disconnect()
+                if not self.reconnect:
+                    break
         self.namespace.disconnect()
+        self.dispatcher.stop()
+
+    def __reconnect(self):
+        """Reconnect with jittered exponential backoff, restore the subscriptions and resync the state."""
+        try:
+            self.socket.disconnect()
+        except Exception:
+            pass  # the old connection is gone anyway
+        attempt = 0
+        while True:
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(.5, 1.)
+            if self.__terminate.wait(delay):
+                return
+            attempt += 1
+            try:
+                self.__connect(wait_for_connection=False)
+                break
+            except Exception as e:
+                logger.warning('Reconnect attempt %d failed: %s', attempt, e)
+        with self.__subscription_lock:
+            self._emit('subscribe', self.symbols, self.channels)
+            symbols, channels = list(self.symbols), set(self.channels)
+        self.reconnects += 1
+        self.__disconnected.clear()
+        disconnected_at, self.__disconnected_at = self.__disconnected_at, None
+        threading.Thread(target=self.__resync, args=(symbols, channels, disconnected_at), daemon=True).start()
+
+    def __resync(self, symbols: List[str], channels: Set[Channel], disconnected_at: float):
+        """Fetch REST snapshots for the state that might have been missed while disconnected."""
+        if self.on_resync is not None and symbols:
+            snapshot = {}
+            try:
+                if channels & {Channel.BOOK, Channel.ALL}:
+                    snapshot['book'] = marketdata.book(symbols)
+                if channels & {Channel.TRADING_STATUS, Channel.ALL}:
+                    snapshot['tradingstatus'] = marketdata.trading_status(symbols)
+            except Exception as e:
+                logger.error('Resync after reconnect failed: %s', e)
+                return
+            self.time_to_recover = time.monotonic() - disconnected_at
+            self.on_resync(snapshot)
+        else:
+            self.time_to_recover = time.monotonic() - disconnected_at
 
     def stop(self, join=True, timeout=None):
         """Disconnect from the server and terminate the handler event loop"""
@@ -87,3 +305,6 @@ class WebSocketClient:
             self.__thread.join(timeout=timeout)
             if self.__thread.is_alive():
                 raise RuntimeError("Failed to join thread within timeout")
+            self.dispatcher.stop(timeout=timeout)
+            if self.dispatcher.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
@@ -0,0 +1,172 @@
+"""
+Indexed in-memory view of the symbols supported by IEX.
+
+:class:`SymbolUniverse` indexes the records of :func:`iexdata.endpoints.refdata.symbols` (or the symbol directory
+daily list) once, so validating tickers, mapping IEX IDs, searching by ticker or name prefix and filtering by type
+no longer scan the whole list.
+
+Example:
+    >>> universe = SymbolUniverse.load('~/.cache/iexdata-symbols.json.gz', max_age=86400)
+    >>> 'AAPL' in universe
+    >>> universe.search('APP')
+    >>> universe.filter(types={'cs'}, enabled=True)
+"""
+import gzip
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import ujson as json
+
+from iexdata.endpoints import refdata
+
+# field names of the symbol directory daily list mapped to the ones of the symbols endpoint
+SYMBOL_DIRECTORY_FIELDS = {'Symbol': 'symbol', 'SecurityName': 'name', 'SecurityType': 'type'}
+
+
+def _bits(mask: int) -> Iterable[int]:
+    """Indexes of the set bits of `mask`, ascending."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SymbolUniverse:
+
+    def __init__(self, records: Iterable[Mapping]):
+        """
+        :param records: Symbol records with at least a 'symbol' and optionally 'name', 'iexId', 'type' and
+                        'isEnabled' fields, as returned by :func:`iexdata.endpoints.refdata.symbols`.
+        """
+        self.records = list(records)
+        self._by_symbol = {}
+        self._by_iex_id = {}
+        self._types = {}
+        self._enabled = 0
+        tickers, names = [], []
+        for i, record in enumerate(self.records):
+            bit = 1 << i
+            symbol = record['symbol']
+            self._by_symbol[symbol] = i
+            if record.get('iexId'):
+                self._by_iex_id[record['iexId']] = i
+            kind = record.get('type')
+            self._types[kind] = self._types.get(kind, 0) | bit
+            if record.get('isEnabled', True):
+                self._enabled |= bit
+            tickers.append((symbol.upper(), i))
+            # every word of the name is searchable, so 'computer' finds 'Apple Computer Inc.'
+            name = (record.get('name') or '').lower()
+            names.extend((name[start:], i) for start in self._word_starts(name))
+        tickers.sort()
+        names.sort()
+        self._tickers, self._ticker_rows = [t for t, _ in tickers], [i for _, i in tickers]
+        self._names, self._name_rows = [n for n, _ in names], [i for _, i in names]
+
+    @staticmethod
+    def _word_starts(name: str) -> List[int]:
+        return [i for i, c in enumerate(name) if c.isalnum() and (i == 0 or not name[i - 1].isalnum())]
+
+    @classmethod
+    def from_api(cls) -> 'SymbolUniverse':
+        """Build the universe from :func:`iexdata.endpoints.refdata.symbols`."""
+        return cls(refdata.symbols(stream=True))
+
+    @classmethod
+    def from_symbol_directory(cls, date=None) -> 'SymbolUniverse':
+        """Build the universe from :func:`iexdata.endpoints.refdata.symbol_directory`, see
+        :data:`SYMBOL_DIRECTORY_FIELDS`."""
+        return cls({SYMBOL_DIRECTORY_FIELDS.get(k, k): v for k, v in record.items()}
+                   for record in refdata.symbol_directory(date, stream=True))
+
+    @classmethod
+    def load(cls, path: str, max_age: Optional[float] = None, fetch: bool = True) -> 'SymbolUniverse':
+        """Load the universe from a file written by :meth:`save`.
+
+        If the file does not exist or is older than `max_age` seconds, the universe is fetched with :meth:`from_api`
+        and saved to the file instead, unless `fetch` is False.
+        """
+        path = os.path.expanduser(path)
+        try:
+            if not fetch or max_age is None or time.time() - os.path.getmtime(path) <= max_age:
+                with gzip.open(path, 'rb') as f:
+                    table = json.loads(f.read())
+                fields = table['fields']
+                return cls(dict(zip(fields, row)) for row in table['rows'])
+        except FileNotFoundError:
+            if not fetch:
+                raise
+        universe = cls.from_api()
+        universe.save(path)
+        return universe
+
+    def save(self, path: str):
+        """Write the records as gzip compressed JSON rows, field names are stored only once."""
+        path = os.path.expanduser(path)
+        fields = list(dict.fromkeys(field for record in self.records for field in record))
+        table = {'fields': fields, 'rows': [[record.get(field) for field in fields] for record in self.records]}
+        with gzip.open(path + '.part', 'wb') as f:
+            f.write(json.dumps(table).encode())
+        os.replace(path + '.part', path)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, symbol: str):
+        return symbol in self._by_symbol
+
+    def __getitem__(self, symbol: str) -> Mapping:
+        return self.records[self._by_symbol[symbol]]
+
+    def get(self, symbol: str, default=None) -> Optional[Mapping]:
+        i = self._by_symbol.get(symbol)
+        return default if i is None else self.records[i]
+
+    def by_iex_id(self, iex_id: str) -> Optional[Mapping]:
+        i = self._by_iex_id.get(iex_id)
+        return None if i is None else self.records[i]
+
+    def validate(self, symbols: Iterable[str]) -> List[str]:
+        """Return the given symbols that are not part of the universe."""
+        return [symbol for symbol in symbols if symbol not in self._by_symbol]
+
+    @staticmethod
+    def _prefixed(keys: List[str], rows: List[int], prefix: str, limit: Optional[int]) -> List[int]:
+        found, i = {}, bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix) and (limit is None or len(found) < limit):
+            found.setdefault(rows[i])
+            i += 1
+        return list(found)
+
+    def search(self, prefix: str, limit: Optional[int] = None) -> List[Mapping]:
+        """Records whose ticker starts with given prefix (case insensitive), ordered by ticker."""
+        return [self.records[i] for i in self._prefixed(self._tickers, self._ticker_rows, prefix.upper(), limit)]
+
+    def search_name(self, prefix: str, limit: Optional[int] = None) -> List[Mapping]:
+        """Records with a word in their name starting with given prefix (case insensitive)."""
+        return [self.records[i] for i in self._prefixed(self._names, self._name_rows, prefix.lower(), limit)]
+
+    def mask(self, types: Optional[Iterable[str]] = None, enabled: Optional[bool] = None) -> int:
+        """Bitmap of the records matching the filters, bit `i` refers to ``records[i]``."""
+        mask = (1 << len(self.records)) - 1
+        if types is not None:
+            selected = 0
+            for kind in types:
+                selected |= self._types.get(kind, 0)
+            mask &= selected
+        if enabled is not None:
+            mask &= self._enabled if enabled else ~self._enabled
+        return mask
+
+    def filter(self, types: Optional[Iterable[str]] = None, enabled: Optional[bool] = None) -> List[Mapping]:
+        """Records of given types (e.g. 'cs' for common stock) and enabled state."""
+        return [self.records[i] for i in _bits(self.mask(types, enabled))]
+
+    def types(self) -> Dict[str, int]:
+        """Number of records per type."""
+        return {kind: bin(mask).count('1') for kind, mask in self._types.items()}
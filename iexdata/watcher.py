@@ -0,0 +1,130 @@
+"""
+Delta feed of the reference data daily lists.
+
+The daily lists are re-posted hourly, mostly unchanged. A :class:`RefDataWatcher` polls them with conditional
+requests, keeps the last snapshot of every list indexed by record ID and only reports the added, changed and deleted
+records.
+
+Example:
+    >>> watcher = RefDataWatcher(on_delta=lambda delta: print(delta.endpoint, len(delta.changed)))
+    >>> watcher.start()
+"""
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from iexdata.client import Client, get_client
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = {
+    'symbol_directory': 'ref-data/daily-list/symbol-directory',
+    'corporate_actions': 'ref-data/daily-list/corporate-actions',
+    'dividends': 'ref-data/daily-list/dividends',
+    'next_day_ex_date': 'ref-data/daily-list/next-day-ex-date',
+}
+
+
+def record_id(record: Mapping) -> str:
+    """The Record ID of a daily list record."""
+    return record['RecordID']
+
+
+class Delta(NamedTuple):
+    """Changes of a daily list since the previous poll."""
+    endpoint: str
+    added: List[Mapping]
+    changed: List[Mapping]
+    deleted: List[Mapping]
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.deleted)
+
+
+def diff(endpoint: str, previous: Mapping[str, Mapping], current: Mapping[str, Mapping]) -> Delta:
+    """Compare two snapshots indexed by record ID."""
+    added = [record for key, record in current.items() if key not in previous]
+    changed = [record for key, record in current.items() if key in previous and previous[key] != record]
+    deleted = [record for key, record in previous.items() if key not in current]
+    return Delta(endpoint, added, changed, deleted)
+
+
+class RefDataWatcher:
+
+    def __init__(self, endpoints: Optional[Iterable[str]] = None, on_delta: Callable[[Delta], None] = None,
+                 interval: float = 3600., key: Callable[[Mapping], str] = record_id,
+                 client: Optional[Client] = None):
+        """
+        :param endpoints: Names of the daily lists to watch (keys of :data:`ENDPOINTS`), all if None.
+        :param on_delta: Callback to be invoked with a :class:`Delta` whenever a list changed.
+        :param interval: Seconds between two polls of the background thread.
+        :param key: Extracts the ID of a record.
+        :param client: Use given client instead of the one used by the endpoint functions.
+        """
+        self.endpoints = list(ENDPOINTS) if endpoints is None else list(endpoints)
+        unknown = set(self.endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f'Unknown endpoints: {unknown}')
+        self.on_delta = on_delta
+        self.interval = interval
+        self.key = key
+        self.client = client
+        self.requests = 0
+        self.not_modified = 0
+        self._snapshots = {}
+        self._validators = {}
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__terminate = threading.Event()
+
+    def snapshot(self, endpoint: str) -> Dict[str, Mapping]:
+        """The last polled records of given list, indexed by record ID."""
+        return self._snapshots.get(endpoint, {})
+
+    def poll(self) -> List[Delta]:
+        """Poll all watched lists once and return (and pass to `on_delta`) the non-empty deltas.
+
+        The first poll of a list reports all its records as added.
+        """
+        deltas = []
+        for endpoint in self.endpoints:
+            delta = self.poll_endpoint(endpoint)
+            if delta:
+                deltas.append(delta)
+                if self.on_delta is not None:
+                    self.on_delta(delta)
+        return deltas
+
+    def poll_endpoint(self, endpoint: str) -> Delta:
+        """Poll a single list and return its delta without passing it to `on_delta`."""
+        client = self.client or get_client()
+        etag, last_modified = self._validators.get(endpoint, (None, None))
+        result = client.get_json_if_modified(ENDPOINTS[endpoint], etag=etag, last_modified=last_modified)
+        self.requests += 1
+        previous = self._snapshots.get(endpoint, {})
+        if not result.modified:
+            self.not_modified += 1
+            return Delta(endpoint, [], [], [])
+        records = result.value if isinstance(result.value, list) else [result.value] if result.value else []
+        current = {self.key(record): record for record in records}
+        self._snapshots[endpoint] = current
+        self._validators[endpoint] = (result.etag, result.last_modified)
+        return diff(endpoint, previous, current)
+
+    def start(self):
+        self.__thread.start()
+
+    def __run(self):
+        while not self.__terminate.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning('Polling the daily lists failed: %s', e)
+            self.__terminate.wait(self.interval)
+
+    def stop(self, join=True, timeout=None):
+        """Terminate the polling thread."""
+        self.__terminate.set()
+        if join and self.__thread.is_alive():
+            self.__thread.join(timeout=timeout)
+            if self.__thread.is_alive():
+                raise RuntimeError("Failed to join thread within timeout")
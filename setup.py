@@ -15,6 +15,7 @@ with open(path.join(here, 'README.md'), encoding='utf-8') as f:
 
 requires = [
     'requests>=2.21.0',
+    'urllib3>=1.26',  # Retry(allowed_methods=...)
     'socketIO-client-nexus>=0.7.6',
     'ujson>=1.35',
     'retry>=0.9.2'
@@ -38,5 +39,9 @@ setup(
     zip_safe=False,
     packages=find_packages(exclude=("test", "test.*")),
     install_requires=requires,
-    extras_require={'dev': requires + ['unittest']}
+    extras_require={
+        'aio': ['aiohttp>=3.5'],
+        'columnar': ['numpy>=1.16', 'pandas>=0.24'],
+        'dev': requires + ['unittest', 'aiohttp>=3.5', 'numpy>=1.16', 'pandas>=0.24']
+    }
 )
@@ -0,0 +1,45 @@
+import asyncio
+import functools
+from unittest import TestCase
+
+
+def _run_in_loop(test):
+    @functools.wraps(test)
+    def run(self):
+        self.loop.run_until_complete(test(self))
+    return run
+
+
+class AsyncTestCase(TestCase):
+    """Runs coroutine test methods, `asyncSetUp` and `asyncTearDown` on a new event loop per test.
+
+    Stand-in for :class:`unittest.IsolatedAsyncioTestCase`, which requires Python 3.8.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, value in list(vars(cls).items()):
+            if name.startswith('test') and asyncio.iscoroutinefunction(value):
+                setattr(cls, name, _run_in_loop(value))
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self._close_loop)
+        self.loop.run_until_complete(self.asyncSetUp())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.asyncTearDown())
+
+    def _close_loop(self):
+        try:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            self.loop.close()
+
+    async def asyncSetUp(self):
+        pass
+
+    async def asyncTearDown(self):
+        pass
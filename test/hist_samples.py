@@ -0,0 +1,74 @@
+"""Synthetic IEX-TP pcap files for the HIST decoder tests."""
+import struct
+
+SYMBOLS = ('AAPL', 'SNAP', 'ZIEXT')
+TIMESTAMP = 1551884400000000000
+
+
+def _symbol(symbol: str) -> bytes:
+    return symbol.encode().ljust(8)
+
+
+def system_event(event: bytes = b'O', timestamp: int = TIMESTAMP) -> bytes:
+    return struct.pack('<ccq', b'S', event, timestamp)
+
+
+def trade(symbol: str, price: float, size: int, trade_id: int = 1, timestamp: int = TIMESTAMP) -> bytes:
+    return struct.pack('<cBq8sIqq', b'T', 0, timestamp, _symbol(symbol), size, round(price * 1e4), trade_id)
+
+
+def quote(symbol: str, bid: float, ask: float, size: int = 100, timestamp: int = TIMESTAMP) -> bytes:
+    return struct.pack('<cBq8sIqqI', b'Q', 0, timestamp, _symbol(symbol), size, round(bid * 1e4),
+                       round(ask * 1e4), size)
+
+
+def price_level_update(symbol: str, buy: bool, price: float, size: int, timestamp: int = TIMESTAMP) -> bytes:
+    return struct.pack('<cBq8sIq', b'8' if buy else b'5', 1, timestamp, _symbol(symbol), size, round(price * 1e4))
+
+
+def trading_status(symbol: str, status: bytes = b'T', timestamp: int = TIMESTAMP) -> bytes:
+    return struct.pack('<ccq8s4s', b'H', status, timestamp, _symbol(symbol), b'    ')
+
+
+def segment(messages, sequence: int = 1) -> bytes:
+    payload = b''.join(struct.pack('<H', len(message)) + message for message in messages)
+    header = struct.pack('<BBHIIHHqqq', 1, 0, 0x8004, 1, 42, len(payload), len(messages), 0, sequence, TIMESTAMP)
+    return header + payload
+
+
+def _frame(payload: bytes) -> bytes:
+    udp = struct.pack('>HHHH', 10378, 10378, 8 + len(payload), 0) + payload
+    ip = struct.pack('>BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0, bytes(4), bytes(4)) + udp
+    return bytes(12) + b'\x08\x00' + ip
+
+
+def write_pcap(path: str, segments, ng: bool = False):
+    """Write given IEX-TP segments as UDP packets into a classic pcap or pcapng file."""
+    with open(path, 'wb') as f:
+        if not ng:
+            f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1))
+            for frame in map(_frame, segments):
+                f.write(struct.pack('<IIII', 0, 0, len(frame), len(frame)) + frame)
+            return
+        f.write(struct.pack('<IIIHHq', 0x0a0d0d0a, 28, 0x1a2b3c4d, 1, 0, -1) + struct.pack('<I', 28))
+        f.write(struct.pack('<IIHHII', 1, 20, 1, 0, 65535, 20))
+        for frame in map(_frame, segments):
+            padded = frame + bytes(-len(frame) % 4)
+            length = 32 + len(padded)
+            f.write(struct.pack('<IIIIIII', 6, length, 0, 0, 0, len(frame), len(frame)) + padded +
+                    struct.pack('<I', length))
+
+
+def sample_segments(count: int = 3):
+    """Segments with trades, quotes, book updates and status messages of all :data:`SYMBOLS`."""
+    segments = [segment([system_event()])]
+    for i in range(count):
+        messages = []
+        for j, symbol in enumerate(SYMBOLS):
+            messages += [trade(symbol, 100 + i + j / 100, 10 * (i + 1), trade_id=i, timestamp=TIMESTAMP + i),
+                         quote(symbol, 99.5 + i, 100.5 + i),
+                         price_level_update(symbol, True, 99.5 + i, 100),
+                         price_level_update(symbol, False, 100.5 + i, 200),
+                         trading_status(symbol)]
+        segments.append(segment(messages, sequence=2 + i))
+    return segments
@@ -7,7 +7,7 @@ import iexdata.endpoints.marketdata as mdata
 
 class TestMarketDataMocks(TestCase):
     def test_tops(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.tops()
@@ -16,7 +16,7 @@ class TestMarketDataMocks(TestCase):
             mdata.tops(symbols=['test', 'foo'])
 
     def test_last(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.last()
@@ -24,9 +24,18 @@ class TestMarketDataMocks(TestCase):
             mdata.last(symbols=['test'])
             mdata.last(symbols=['test', 'foo'])
 
+    def test_stream_conversion(self):
+        with patch('requests.Session.get') as mock:
+            for endpoint in (mdata.tops, mdata.last):
+                with self.assertRaises(ValueError):
+                    endpoint('test', as_arrays=True, stream=True)
+                with self.assertRaises(ValueError):
+                    endpoint(as_frame=True, stream=True)
+            mock.assert_not_called()
+
     def test_hist(self):
         from datetime import datetime
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.hist()
@@ -34,77 +43,96 @@ class TestMarketDataMocks(TestCase):
             mdata.hist(date=datetime.today())
 
     def test_deep(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.deep()
             mdata.deep(symbol='test')
 
     def test_book(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.book()
             mdata.book(symbol='test')
 
     def test_trades(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.trades()
             mdata.trades(symbol='test')
 
     def test_system_event(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.system_event()
 
     def test_trading_status(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.trading_status()
             mdata.trading_status(symbol='test')
 
     def test_operational_halt_status(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.operational_halt_status()
             mdata.operational_halt_status(symbol='test')
 
     def test_short_sell_price_test_status(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.short_sell_price_test_status()
             mdata.short_sell_price_test_status(symbol='test')
 
     def test_security_event(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.security_event()
             mdata.security_event(symbol='test')
 
     def test_trade_break(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.trade_break()
             mdata.trade_break(symbol='test')
 
     def test_auction(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.auction()
             mdata.auction(symbol='test')
 
     def test_official_price(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             mdata.official_price()
             mdata.official_price(symbol='test')
+
+    def test_batching(self):
+        symbols = [f'S{i}' for i in range(25)]
+        with patch('requests.Session.get') as mock:
+            mock.return_value = MagicMock()
+            mock.return_value.status_code = 200
+            mock.return_value.json = MagicMock(side_effect=lambda: {mock.call_args[0][0].rsplit('=')[-1]: []})
+            result = mdata.book(symbol=symbols)
+            self.assertEqual(3, mock.call_count)
+            self.assertEqual({'S0,S1,S2,S3,S4,S5,S6,S7,S8,S9', 'S10,S11,S12,S13,S14,S15,S16,S17,S18,S19',
+                              'S20,S21,S22,S23,S24'}, set(result))
+
+            mock.reset_mock()
+            result = mdata.deep(symbol=('AAPL', 'SNAP'))
+            self.assertEqual(2, mock.call_count)
+            self.assertEqual({'AAPL': {'AAPL': []}, 'SNAP': {'SNAP': []}}, result)
+
+            with self.assertRaises(TypeError):
+                mdata.trades(symbol=5)
@@ -6,7 +6,7 @@ import iexdata.endpoints.markets as markets
 
 class TestAll(TestCase):
     def test_markets(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             markets.market()
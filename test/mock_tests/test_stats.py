@@ -8,25 +8,25 @@ import iexdata.endpoints.stats as stats
 
 class TestAll(TestCase):
     def test_intraday(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             stats.intraday()
 
     def test_recent(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             stats.recent()
 
     def test_records(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             stats.records()
 
     def test_summary(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             stats.historical_summary()
@@ -36,7 +36,7 @@ class TestAll(TestCase):
                 stats.historical_summary(date=5)
 
     def test_daily(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
             stats.historical_daily()
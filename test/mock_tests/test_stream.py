@@ -0,0 +1,195 @@
+import threading
+import time
+from unittest import TestCase
+
+import ujson as json
+from mock import ANY, patch, MagicMock
+
+from iexdata.stream import WebSocketClient, Channel
+
+
+def message(symbol, kind='trades', **data):
+    return json.dumps({'symbol': symbol, 'messageType': kind, 'data': data})
+
+
+class TestWebSocketClientMocks(TestCase):
+    def setUp(self):
+        patcher = patch('iexdata.stream.SocketIO')
+        self.socket = patcher.start().return_value
+        self.socket.wait.side_effect = lambda seconds: time.sleep(seconds)
+        self.addCleanup(patcher.stop)
+
+    def test_on_message(self):
+        received = []
+        client = WebSocketClient(symbols='AAPL', channels={Channel.TRADES}, on_message=received.append)
+        client.start()
+        client._on_message(message('AAPL', price=1.5))
+        client.stop(timeout=2)
+        self.assertEqual([{'symbol': 'AAPL', 'messageType': 'trades', 'data': {'price': 1.5}}], received)
+        self.assertEqual(1, client.received)
+
+    def test_slow_callback_does_not_block(self):
+        handled = threading.Event()
+        client = WebSocketClient(symbols='AAPL', on_message=lambda m: handled.wait(2), queue_size=1)
+        client.start()
+        started = time.monotonic()
+        for i in range(5):
+            client._on_message(message('AAPL', price=float(i)))
+        self.assertLess(time.monotonic() - started, 1)
+        handled.set()
+        client.stop(timeout=2)
+        self.assertLess(0, client.metrics()['dropped'])
+
+    def test_malformed_message(self):
+        received = []
+        client = WebSocketClient(symbols='AAPL', channels={Channel.TRADES}, on_batch=received.extend,
+                                 batch_interval=.5)
+        client.start()
+        with self.assertLogs('iexdata.stream', 'WARNING'):
+            client._on_message(message('AAPL', price=1.))
+            client._on_message('{"symbol": "AAPL", "messageType": "trades", "data": {"pri')
+            client._on_message(message('AAPL', price=2.))
+            client.stop(timeout=2)
+        self.assertEqual([1., 2.], [m['data']['price'] for m in received])
+        self.assertEqual(1, client.metrics()['malformed'])
+        self.assertEqual(0, client.metrics()['errors'])
+
+    def test_instrumentation(self):
+        from iexdata import instrument
+        recorder = instrument.enable()
+        self.addCleanup(instrument.remove_hook, recorder)
+        client = WebSocketClient(symbols='AAPL', on_message=lambda m: None)
+        client.start()
+        client._on_message(message('AAPL', price=1.5))
+        client._on_message(message('AAPL', 'book', bids=[]))
+        client.stop(timeout=2)
+        metrics = recorder.to_dict()
+        self.assertEqual({(('channel', 'trades'),), (('channel', 'book'),)},
+                         set(metrics['iexdata_stream_messages_total']))
+        self.assertGreaterEqual(metrics['iexdata_stream_queue_wait_seconds'][()]['count'], 1)
+
+    def test_on_batch(self):
+        batches = []
+        delivered = threading.Event()
+
+        def on_batch(batch):
+            batches.append(batch)
+            if sum(map(len, batches)) == 5:
+                delivered.set()
+
+        client = WebSocketClient(symbols={'AAPL', 'SNAP'}, on_batch=on_batch, batch_size=3, batch_interval=.05)
+        client.start()
+        for i in range(5):
+            client._on_message(message('AAPL', tradeId=i))
+        self.assertTrue(delivered.wait(timeout=2))
+        client.stop(timeout=2)
+
+        self.assertEqual(5, client.received)
+        self.assertEqual(list(range(5)), [m['data']['tradeId'] for batch in batches for m in batch])
+        self.assertLessEqual(max(map(len, batches)), 3)
+
+    def test_on_batch_columns(self):
+        batches = []
+        client = WebSocketClient(symbols='AAPL', on_batch=batches.append, batch_columns=True, batch_interval=.01)
+        client.start()
+        client._on_message(message('AAPL', price=1.5, size=10, tradeId=1, timestamp=1551884400000))
+        client._on_message(message('SNAP', price=2.5, size=20, tradeId=2, timestamp=1551884400001))
+        client._on_message(message('SNAP', 'systemevent', systemEvent='O'))
+        client.stop(timeout=2)
+
+        merged = {}
+        for batch in batches:
+            merged.update(batch)
+        self.assertEqual(['AAPL', 'SNAP'], merged['trades']['symbol'].tolist())
+        self.assertEqual([1.5, 2.5], merged['trades']['price'].tolist())
+        self.assertEqual('O', merged['systemevent'][0]['data']['systemEvent'])
+
+    def test_workers_preserve_symbol_order(self):
+        received = {}
+        lock = threading.Lock()
+
+        def on_message(data):
+            time.sleep(.0001)
+            with lock:
+                received.setdefault(data['symbol'], []).append(data['data']['tradeId'])
+
+        client = WebSocketClient(symbols={'A', 'B', 'C'}, on_message=on_message, workers=3)
+        client.start()
+        for i in range(300):
+            client._on_message(message('ABC'[i % 3], tradeId=i))
+        client.stop(timeout=5)
+
+        self.assertEqual({s: list(range(k, 300, 3)) for k, s in enumerate('ABC')}, received)
+        metrics = client.metrics()
+        self.assertEqual(300, metrics['received'])
+        self.assertEqual(300, metrics['delivered'])
+        self.assertEqual(0, metrics['dropped'])
+
+    def test_bulk_subscribe(self):
+        symbols = {f'S{i:04}' for i in range(1200)}
+        client = WebSocketClient(symbols=symbols, channels={Channel.TRADES, Channel.BOOK})
+        emit = self.socket.define.return_value.emit
+        frames = [json.loads(call[0][1]) for call in emit.call_args_list]
+        self.assertEqual(3, len(frames))
+        self.assertEqual(symbols, {s for frame in frames for s in frame['symbols']})
+        self.assertEqual(['book', 'trades'], frames[0]['channels'])
+
+        emit.reset_mock()
+        client.add_symbols(['S0000', 'AAPL'])
+        client.remove_symbols({'S0001', 'SNAP'})
+        client.set_channels({Channel.TRADES, Channel.AUCTION})
+        calls = [(call[0][0], json.loads(call[0][1])) for call in emit.call_args_list]
+        self.assertEqual(('subscribe', {'symbols': ['AAPL'], 'channels': ['book', 'trades']}), calls[0])
+        self.assertEqual(('unsubscribe', {'symbols': ['S0001'], 'channels': ['book', 'trades']}), calls[1])
+        self.assertEqual(['unsubscribe'] * 3 + ['subscribe'] * 3, [event for event, _ in calls[2:]])
+        self.assertEqual({('book',), ('auction',)}, {tuple(frame['channels']) for _, frame in calls[2:]})
+        self.assertEqual(1200, len(client.symbols))
+
+    def test_reconnect(self):
+        resynced = threading.Event()
+        snapshots = []
+
+        def on_resync(snapshot):
+            snapshots.append(snapshot)
+            resynced.set()
+
+        with patch('iexdata.endpoints.marketdata.book', return_value={'AAPL': {}}) as book, \
+                patch('iexdata.endpoints.marketdata.trading_status', return_value={'AAPL': {}}) as status:
+            client = WebSocketClient(symbols={'AAPL'}, channels={Channel.BOOK}, on_resync=on_resync, backoff=.01)
+            connect = patch('iexdata.stream.SocketIO', side_effect=[ConnectionError(), self.socket])
+            client.start()
+            with connect as socket_io:
+                client._on_disconnect()
+                self.assertTrue(resynced.wait(timeout=2))
+                self.assertEqual(2, socket_io.call_count)
+            client.stop(timeout=2)
+
+        self.assertEqual([{'book': {'AAPL': {}}}], snapshots)
+        book.assert_called_once_with(['AAPL'])
+        status.assert_not_called()
+        self.assertEqual(('subscribe', {'symbols': ['AAPL'], 'channels': ['book']}),
+                         (self.socket.define.return_value.emit.call_args[0][0],
+                          json.loads(self.socket.define.return_value.emit.call_args[0][1])))
+        metrics = client.metrics()
+        self.assertEqual(1, metrics['reconnects'])
+        self.assertLess(0, metrics['time_to_recover'])
+
+    def test_no_reconnect(self):
+        client = WebSocketClient(symbols={'AAPL'}, reconnect=False)
+        self.socket.wait.side_effect = ConnectionError()
+        client.start()
+        client.stop(timeout=2)
+        self.assertEqual(0, client.metrics()['reconnects'])
+
+    def test_capture(self):
+        capture = MagicMock()
+        client = WebSocketClient(symbols='AAPL', capture=capture)
+        client.start()
+        before = time.time_ns()
+        client._on_message(message('AAPL', price=1.5))
+        client.stop(timeout=2)
+        capture.write_many.assert_called_once_with([{'symbol': 'AAPL', 'messageType': 'trades',
+                                                     'data': {'price': 1.5}}], ANY)
+        received = capture.write_many.call_args[0][1]
+        self.assertEqual(1, len(received))
+        self.assertLessEqual(before, received[0])
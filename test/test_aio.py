@@ -0,0 +1,76 @@
+import asyncio
+
+from aiohttp import web
+
+import iexdata.aio.endpoints.marketdata as mdata
+import iexdata.aio.endpoints.refdata as refdata
+from iexdata.aio import AsyncClient, gather_symbols, set_client
+from test.aio_case import AsyncTestCase
+
+
+class TestAsyncEndpoints(AsyncTestCase):
+    async def asyncSetUp(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.throttle = 0
+        self.requests = []
+
+        async def handler(request):
+            self.requests.append(request.path_qs)
+            if self.throttle:
+                self.throttle -= 1
+                return web.Response(status=429, headers={'Retry-After': '0.05'})
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(.01)
+            self.in_flight -= 1
+            return web.json_response({'symbols': request.query.get('symbols')})
+
+        app = web.Application()
+        app.router.add_get('/1.0/{tail:.*}', handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.client = AsyncClient(base_url=f'http://127.0.0.1:{port}/1.0/')
+        self.previous = set_client(self.client)
+
+    async def asyncTearDown(self):
+        set_client(self.previous)
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def test_endpoints(self):
+        self.assertEqual({'symbols': 'AAPL'}, await mdata.book('AAPL'))
+        await refdata.symbols(filter='symbol')
+        with self.assertRaises(TypeError):
+            await mdata.deep(5)
+        self.assertEqual(['/1.0/deep/book?symbols=AAPL', '/1.0/ref-data/symbols?filter=symbol'], self.requests)
+
+    async def test_coalesce(self):
+        results = await asyncio.gather(*[mdata.book('AAPL') for _ in range(5)], mdata.book('SNAP'))
+        self.assertEqual([{'symbols': 'AAPL'}] * 5 + [{'symbols': 'SNAP'}], results)
+        self.assertEqual(['/1.0/deep/book?symbols=AAPL', '/1.0/deep/book?symbols=SNAP'], self.requests)
+        self.assertEqual(4, self.client.flights.shared)
+
+        self.throttle = 1
+        results = await asyncio.gather(mdata.book('AAPL'), mdata.book('AAPL'), return_exceptions=True)
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertIs(results[0], results[1])
+
+    async def test_gather_symbols(self):
+        symbols = [f'S{i}' for i in range(50)]
+        result = await gather_symbols(mdata.book, symbols, max_in_flight=8)
+        self.assertEqual({s: {'symbols': s} for s in symbols}, result)
+        self.assertLessEqual(self.max_in_flight, 8)
+        self.assertLess(1, self.max_in_flight)
+
+    async def test_gather_symbols_rate_limited(self):
+        self.throttle = 3
+        result = await gather_symbols(mdata.trades, ['AAPL', 'SNAP'], max_in_flight=2)
+        self.assertEqual({'AAPL': {'symbols': 'AAPL'}, 'SNAP': {'symbols': 'SNAP'}}, result)
+
+        self.throttle = 10
+        with self.assertRaises(RuntimeError):
+            await gather_symbols(mdata.trades, ['AAPL'], retries=1)
@@ -0,0 +1,136 @@
+import asyncio
+
+import ujson as json
+from aiohttp import web
+
+from iexdata.aio.stream import AsyncWebSocketClient, _parse
+from iexdata.stream import Channel
+from test.aio_case import AsyncTestCase
+
+
+class SocketIOStandIn:
+    """Local socket.io (engine.io v3, websocket transport) server mimicking the IEX DEEP namespace.
+
+    Messages put into `outbox` are emitted to all connected clients, received events are recorded in `events`.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.pings = 0
+        self.outbox = asyncio.Queue()
+        self.sockets = set()
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        await ws.send_str('0' + json.dumps({'sid': 'test', 'pingInterval': 50, 'pingTimeout': 1000, 'upgrades': []}))
+        await ws.send_str('40')
+        async for frame in ws:
+            if frame.data == '2':
+                self.pings += 1
+                await ws.send_str('3')
+            elif frame.data.startswith('40/1.0/deep'):
+                await ws.send_str('40/1.0/deep,')
+            elif frame.data.startswith('42/1.0/deep,'):
+                event, payload = json.loads(frame.data[len('42/1.0/deep,'):])
+                self.events.append((event, json.loads(payload)))
+            elif frame.data.startswith('41/1.0/deep'):
+                break
+        self.sockets.discard(ws)
+        return ws
+
+    async def publish(self):
+        while True:
+            message = await self.outbox.get()
+            for ws in list(self.sockets):
+                await ws.send_str('42/1.0/deep,' + json.dumps(['message', json.dumps(message)]))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/socket.io/', self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', 0).start()
+        self.publisher = asyncio.ensure_future(self.publish())
+        self.url = 'http://127.0.0.1:{}'.format(self.runner.addresses[0][1])
+
+    async def stop(self):
+        self.publisher.cancel()
+        for ws in list(self.sockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+
+class TestAsyncWebSocketClient(AsyncTestCase):
+    async def asyncSetUp(self):
+        self.server = SocketIOStandIn()
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def test_parse(self):
+        self.assertEqual(('4', '2', '/1.0/deep', '["message","{}"]'), _parse('42/1.0/deep,["message","{}"]'))
+        self.assertEqual(('4', '0', '/', ''), _parse('40'))
+        self.assertEqual(('3', None, None, ''), _parse('3'))
+
+    async def test_iterate(self):
+        async with AsyncWebSocketClient('AAPL', {Channel.TRADES}, url=self.server.url) as client:
+            for i in range(3):
+                self.server.outbox.put_nowait({'symbol': 'AAPL', 'messageType': 'trades', 'data': {'tradeId': i}})
+            received = []
+            async for message in client:
+                received.append(message['data']['tradeId'])
+                if len(received) == 3:
+                    break
+            self.assertEqual([0, 1, 2], received)
+            await asyncio.sleep(.12)
+            self.assertLess(0, self.server.pings)
+        self.assertEqual([('subscribe', {'symbols': ['AAPL'], 'channels': ['trades']})], self.server.events)
+
+    async def test_dynamic_subscriptions(self):
+        async with AsyncWebSocketClient(url=self.server.url) as client:
+            await client.subscribe(['SNAP', 'FB'])
+            await client.unsubscribe('FB')
+            await asyncio.sleep(.05)
+            self.assertEqual({'SNAP'}, client.symbols)
+        self.assertEqual([('subscribe', {'symbols': ['FB', 'SNAP'], 'channels': ['deep']}),
+                          ('unsubscribe', {'symbols': ['FB'], 'channels': ['deep']})], self.server.events)
+
+    async def test_backpressure_and_end_of_stream(self):
+        client = AsyncWebSocketClient('AAPL', url=self.server.url, max_queue=2)
+        await client.connect()
+        for i in range(5):
+            self.server.outbox.put_nowait({'symbol': 'AAPL', 'data': i})
+        await asyncio.sleep(.1)
+        # the reader stops consuming the socket while the queue is full
+        self.assertEqual(3, client.received)
+        for ws in list(self.server.sockets):
+            await ws.close()
+        self.assertEqual([0, 1, 2, 3, 4], [message['data'] async for message in client])
+        await client.close()
+
+    def test_created_outside_loop(self):
+        client = AsyncWebSocketClient('AAPL', url=self.server.url)
+        # nothing is bound to an event loop before connecting
+        self.assertIsNone(client._queue)
+
+        async def consume():
+            await client.connect()
+            self.server.outbox.put_nowait({'symbol': 'AAPL', 'data': 1})
+            message = await client.__anext__()
+            await client.close()
+            return message
+
+        self.assertEqual(1, self.loop.run_until_complete(consume())['data'])
+
+    async def test_cancellation(self):
+        client = AsyncWebSocketClient('AAPL', url=self.server.url)
+        await client.connect()
+        consumer = asyncio.ensure_future(client.__anext__())
+        await asyncio.sleep(.01)
+        consumer.cancel()
+        await client.close()
+        self.assertTrue(consumer.cancelled())
+        self.assertEqual([], client._tasks)
@@ -0,0 +1,89 @@
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from iexdata.bars import BarBuilder
+
+T0 = 1551884400000  # 2019-03-06 15:00:00 UTC
+
+
+def trade(symbol, price, size, timestamp):
+    return {'symbol': symbol, 'messageType': 'trades',
+            'data': {'price': price, 'size': size, 'timestamp': timestamp, 'tradeId': 1}}
+
+
+class TestBarBuilder(TestCase):
+    def setUp(self):
+        self.closed = []
+        self.builder = BarBuilder(interval=60, history=3, on_bar=self.closed.append, capacity=1)
+
+    def test_bars(self):
+        self.builder.on_batch([trade('AAPL', 10., 100, T0), trade('AAPL', 12., 100, T0 + 1000),
+                               trade('SNAP', 5., 10, T0 + 2000), trade('AAPL', 9., 200, T0 + 3000),
+                               {'symbol': 'AAPL', 'messageType': 'book', 'data': {}}])
+        self.assertEqual([], self.closed)
+        current = self.builder.current('AAPL')
+        self.assertEqual((10., 12., 9., 9., 400, 3), tuple(current[['open', 'high', 'low', 'close', 'volume',
+                                                                    'count']].tolist()))
+        self.assertAlmostEqual(10., current['vwap'])
+
+        # merged into the open bar across batches
+        self.builder.on_message(trade('AAPL', 13., 100, T0 + 59999))
+        self.assertEqual(13., self.builder.current('AAPL')['high'])
+
+        # a trade of the next minute closes the open bars of all symbols
+        self.builder.on_message(trade('SNAP', 6., 10, T0 + 60000))
+        bars = np.concatenate(self.closed)
+        self.assertEqual(['AAPL', 'SNAP'], list(bars['symbol']))
+        self.assertEqual(np.datetime64(T0, 'ms'), bars['start'][0])
+        self.assertEqual((10., 13., 9., 13., 500, 4), tuple(bars[0][['open', 'high', 'low', 'close', 'volume',
+                                                                     'count']].tolist()))
+        self.assertIsNone(self.builder.current('AAPL'))
+        self.assertEqual(1, len(self.builder.bars('AAPL')))
+        self.assertEqual(0, len(self.builder.bars('MSFT')))
+
+    def test_multiple_intervals_in_one_batch(self):
+        symbols = ['AAPL'] * 5 + ['SNAP']
+        prices = [1., 2., 3., 4., 5., 6.]
+        timestamps = [T0, T0 + 60000, T0 + 120000, T0 + 180000, T0 + 240000, T0 + 240000]
+        self.builder.update(np.array(symbols), prices, [1] * 6, np.array(timestamps, dtype='M8[ms]'))
+        self.assertEqual([1., 2., 3., 4.], list(np.concatenate(self.closed)['close']))
+        # only the last `history` bars are kept
+        self.assertEqual([2., 3., 4.], list(self.builder.bars('AAPL')['close']))
+        self.assertEqual([4.], list(self.builder.bars('AAPL', n=1)['close']))
+        self.assertEqual(5., self.builder.current('AAPL')['close'])
+
+    def test_late_trade(self):
+        self.builder.on_message(trade('SNAP', 5., 10, T0))
+        self.builder.on_message(trade('AAPL', 10., 100, T0 + 60000))
+        self.builder.on_message(trade('SNAP', 6., 20, T0 + 30000))
+        # the closed SNAP bar is not reopened, the late trade counts towards the current interval
+        closed = np.concatenate(self.closed)
+        self.assertEqual([('SNAP', 5., 10)], [(b['symbol'], b['close'], b['volume']) for b in closed])
+        self.assertEqual(1, len(self.builder.bars('SNAP')))
+        current = self.builder.current('SNAP')
+        self.assertEqual((np.datetime64(T0 + 60000, 'ms'), 6., 20),
+                         (current['start'], current['close'], current['volume']))
+        self.assertEqual(1, self.builder.late)
+
+    def test_columns_and_snapshots(self):
+        self.builder.on_batch({'trades': {'symbol': np.array(['AAPL', 'AAPL']), 'price': np.array([1., 3.]),
+                                          'size': np.array([1, 3]),
+                                          'timestamp': np.array([T0, T0 + 1], dtype='M8[ms]')}})
+        self.builder.add_trades({'SNAP': [{'price': 2., 'size': 5, 'timestamp': T0 + 2},
+                                          {'price': 1., 'size': 5, 'timestamp': T0 + 1}]})
+        self.assertAlmostEqual(2.5, self.builder.current('AAPL')['vwap'])
+        self.assertEqual(1., self.builder.current('SNAP')['open'])
+        self.builder.advance(T0 / 1000 + 60)
+        self.assertEqual({'AAPL', 'SNAP'}, set(np.concatenate(self.closed)['symbol']))
+
+    def test_timer(self):
+        builder = BarBuilder(interval=.05, on_bar=self.closed.append)
+        builder.update(['AAPL'], [1.], [1], [int(time.time() * 1000)])
+        builder.start()
+        deadline = time.monotonic() + 5
+        while not self.closed and time.monotonic() < deadline:
+            time.sleep(.01)
+        builder.stop(timeout=5)
+        self.assertEqual(['AAPL'], list(np.concatenate(self.closed)['symbol']))
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from iexdata.book import BookManager, OrderBook
+
+
+def levels(*pairs):
+    return [{'price': price, 'size': size, 'timestamp': 1000 + i} for i, (price, size) in enumerate(pairs)]
+
+
+class TestOrderBook(TestCase):
+    def test_snapshot(self):
+        book = OrderBook('AAPL')
+        book.apply({'bids': levels((10.0, 100), (10.2, 50), (10.1, 10)), 'asks': levels((10.4, 5), (10.3, 7))})
+        self.assertEqual((10.2, 50), book.best_bid())
+        self.assertEqual((10.3, 7), book.best_ask())
+        self.assertEqual({'bids': [(10.2, 50), (10.1, 10)], 'asks': [(10.3, 7), (10.4, 5)]}, book.depth(2))
+        self.assertEqual(1002, book.timestamp)
+
+    def test_updates(self):
+        book = OrderBook('AAPL', max_levels=3)
+        self.assertIsNone(book.best_bid())
+        for price, size in ((10.0, 1), (10.3, 2), (10.1, 3), (10.2, 4)):
+            book.apply({'side': 'B', 'price': price, 'size': size})
+        # the worst level 10.0 was dropped
+        self.assertEqual([(10.3, 2), (10.2, 4), (10.1, 3)], book.bids.top(10))
+        book.apply({'side': 'buy', 'price': 10.3, 'size': 0})
+        book.apply({'side': 'B', 'price': 10.1, 'size': 9})
+        self.assertEqual([(10.2, 4), (10.1, 9)], book.bids.top(10))
+
+        book.apply({'side': 'S', 'price': 10.5, 'size': 1})
+        book.apply({'side': 'sell', 'price': 10.4, 'size': 2, 'timestamp': 5})
+        self.assertEqual((10.4, 2), book.best_ask())
+        self.assertEqual(5, book.timestamp)
+
+
+class TestBookManager(TestCase):
+    def test_messages(self):
+        books = BookManager(max_symbols=2)
+        books.on_batch([
+            {'symbol': 'AAPL', 'messageType': 'book', 'data': {'bids': levels((1.0, 1)), 'asks': []}},
+            {'symbol': 'SNAP', 'messageType': 'pricelevelupdate', 'data': {'side': 'S', 'price': 2.0, 'size': 3}},
+            {'symbol': 'SNAP', 'messageType': 'trades', 'data': {'price': 2.0, 'size': 3}},
+        ])
+        self.assertEqual((1.0, 1), books['AAPL'].best_bid())
+        self.assertEqual((2.0, 3), books['SNAP'].best_ask())
+
+        books.on_message({'symbol': 'AAPL', 'messageType': 'pricelevelupdate',
+                          'data': {'side': 'B', 'price': 1.5, 'size': 1}})
+        books.on_resync({'book': {'FB': {'bids': [], 'asks': levels((3.0, 1))}}})
+        # SNAP was the least recently updated book
+        self.assertEqual(2, len(books))
+        self.assertNotIn('SNAP', books)
+        self.assertEqual((1.5, 1), books['AAPL'].best_bid())
+        self.assertEqual((3.0, 1), books.get('FB').best_ask())
@@ -0,0 +1,88 @@
+import os
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from mock import patch, MagicMock
+
+from iexdata.cache import MemoryCache, SQLiteCache, NEVER, EASTERN, expires
+from iexdata.client import Client
+
+
+def timestamp(*args):
+    return datetime(*args, tzinfo=EASTERN).timestamp()
+
+
+class TestExpires(TestCase):
+    def test_uncached(self):
+        self.assertIsNone(expires('tops'))
+        self.assertIsNone(expires('deep/book?symbols=AAPL'))
+        self.assertIsNone(expires('stats/intraday'))
+
+    def test_past_dated(self):
+        now = timestamp(2019, 3, 6, 12)
+        self.assertEqual(NEVER, expires('ref-data/daily-list/dividends/20190305', now))
+        self.assertEqual(NEVER, expires('stats/historical?date=201902', now))
+        self.assertEqual(NEVER, expires('stats/historical/daily?date=20190305', now))
+        self.assertNotEqual(NEVER, expires('stats/historical?date=201903', now))
+        self.assertNotEqual(NEVER, expires('ref-data/daily-list/dividends/20190306', now))
+
+    def test_schedule(self):
+        self.assertEqual(timestamp(2019, 3, 7, 7, 45), expires('ref-data/symbols', timestamp(2019, 3, 6, 12)))
+        self.assertEqual(timestamp(2019, 3, 6, 7, 45), expires('ref-data/symbols', timestamp(2019, 3, 6, 1)))
+        self.assertEqual(timestamp(2019, 3, 6, 13), expires('ref-data/daily-list/dividends',
+                                                            timestamp(2019, 3, 6, 12, 30)))
+        self.assertEqual(timestamp(2019, 3, 7, 8), expires('ref-data/daily-list/dividends',
+                                                           timestamp(2019, 3, 6, 19)))
+        self.assertEqual(timestamp(2019, 3, 6, 20, 30), expires('ref-data/daily-list/symbol-directory',
+                                                                timestamp(2019, 3, 6, 19)))
+        self.assertEqual(timestamp(2019, 3, 6, 22), expires('ref-data/daily-list/symbol-directory',
+                                                            timestamp(2019, 3, 6, 21, 10)))
+        self.assertEqual(timestamp(2019, 3, 7), expires('stats/historical', timestamp(2019, 3, 6, 21, 10)))
+
+
+class TestBackends(TestCase):
+    def check_backend(self, cache):
+        self.assertEqual((False, None), cache.get('a', now=0))
+        cache.set('a', [{'symbol': 'AAPL'}], expires=10)
+        cache.set('b', 1, expires=NEVER)
+        self.assertEqual((True, [{'symbol': 'AAPL'}]), cache.get('a', now=5))
+        self.assertEqual((False, None), cache.get('a', now=10))
+        self.assertEqual((True, 1), cache.get('b', now=1e12))
+        self.assertEqual({'hits': 2, 'misses': 2}, cache.stats())
+
+        # touch b, then exceed the size bound, c is the least recently used entry
+        cache.set('c', 3, expires=NEVER)
+        cache.get('b', now=0)
+        cache.set('d', 4, expires=NEVER)
+        cache.set('e', 5, expires=NEVER)
+        self.assertEqual(3, len(cache))
+        self.assertFalse(cache.get('c', now=0)[0])
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_memory(self):
+        self.check_backend(MemoryCache(maxsize=3))
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            self.check_backend(SQLiteCache(path, maxsize=3))
+            SQLiteCache(path).set('shared', 'value', NEVER)
+            self.assertEqual((True, 'value'), SQLiteCache(path).get('shared'))
+
+
+class TestClientCache(TestCase):
+    def test_client(self):
+        client = Client(cache=MemoryCache())
+        with patch('requests.Session.get') as mock:
+            mock.return_value = MagicMock()
+            mock.return_value.status_code = 200
+            mock.return_value.json = MagicMock(return_value=[])
+            client.get_json('ref-data/symbols')
+            client.get_json('ref-data/symbols')
+            client.get_json('ref-data/symbols', filter='symbol')
+            client.get_json('tops')
+            client.get_json('tops')
+            self.assertEqual(4, mock.call_count)
+            self.assertEqual({'hits': 1, 'misses': 2}, client.cache.stats())
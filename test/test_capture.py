@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from iexdata.capture import CaptureWriter, ReplayClient, read_capture
+from iexdata.stream import Channel
+
+TRADE = {'price': 170.5, 'size': 100, 'tradeId': 123, 'isISO': True, 'isOddLot': False,
+         'isOutsideRegularHours': False, 'isSinglePriceCross': True, 'isTradeThroughExempt': False,
+         'timestamp': 1551884400000}
+MESSAGES = [
+    {'symbol': 'AAPL', 'messageType': 'trades', 'data': TRADE},
+    {'symbol': 'SNAP', 'messageType': 'tradingstatus', 'data': {'status': 'T', 'reason': '', 'timestamp': 1}},
+    {'symbol': 'AAPL', 'messageType': 'book', 'data': {'bids': [{'price': 1.0, 'size': 1}], 'asks': []}},
+    {'symbol': 'AAPL', 'messageType': 'trades', 'data': {'price': 1.0, 'size': 2}},
+    {'messageType': 'unknown', 'foo': 'bar'},
+]
+
+
+class TestCapture(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deep.cap')
+
+    def test_round_trip(self):
+        with CaptureWriter(self.path, index_every=2) as capture:
+            for i, message in enumerate(MESSAGES):
+                capture.write(message, received=i * 1000)
+        with CaptureWriter(self.path) as capture:
+            capture.on_batch(MESSAGES[:1])
+
+        records = list(read_capture(self.path))
+        self.assertEqual(MESSAGES + MESSAGES[:1], [message for _, message in records])
+        self.assertEqual([0, 1000, 2000, 3000, 4000], [t for t, _ in records[:5]])
+        # the typed trade record is smaller than its JSON
+        self.assertLess(os.path.getsize(self.path), 400)
+
+        self.assertEqual(MESSAGES[3:], [m for _, m in read_capture(self.path, start=2500)][:2])
+        # records 0, 2 and 4 of the first writer plus the first record of the second one are indexed
+        self.assertEqual(4, os.path.getsize(self.path + '.idx') // 16)
+
+    def test_round_trip_other_fields(self):
+        messages = [{'symbol': 'AAPL', 'messageType': 'book', 'seq': 5},
+                    {'messageType': 'systemevent', 'data': {'systemEvent': 'O'}},
+                    {'symbol': 'AAPL', 'messageType': 'trades', 'data': TRADE, 'seq': 6}]
+        with CaptureWriter(self.path) as capture:
+            capture.write_many(messages)
+        self.assertEqual(messages, [message for _, message in read_capture(self.path)])
+
+    def test_start_at_indexed_time(self):
+        with CaptureWriter(self.path, index_every=2) as capture:
+            capture.write_many([{'symbol': 'AAPL', 'messageType': 'trades', 'data': {'size': i}} for i in range(4)],
+                               received=100)
+            capture.write_many(MESSAGES[:2], received=[200, 300])
+        self.assertEqual([100] * 4 + [200, 300], [t for t, _ in read_capture(self.path, start=100)])
+        self.assertEqual([300], [t for t, _ in read_capture(self.path, start=300)])
+
+    def test_start_with_out_of_order_workers(self):
+        # batches of two dispatch workers are appended in handling, not receive order
+        with CaptureWriter(self.path, index_every=1) as capture:
+            capture.write_many(MESSAGES[:1], received=[100])
+            capture.write_many(MESSAGES[1:4], received=[50, 60, 70])
+        with CaptureWriter(self.path, index_every=1) as capture:
+            capture.write_many(MESSAGES[4:], received=[80])
+        self.assertEqual([100], [t for t, _ in read_capture(self.path, start=100)])
+        self.assertEqual([100, 70, 80], [t for t, _ in read_capture(self.path, start=70)])
+
+    def test_replay(self):
+        with CaptureWriter(self.path) as capture:
+            for i in range(5):
+                capture.write(dict(MESSAGES[0], data=dict(TRADE, tradeId=i)), received=i * 10 ** 8)
+            capture.write(MESSAGES[1], received=5 * 10 ** 8)
+
+        received, done = [], threading.Event()
+        client = ReplayClient(self.path, symbols='AAPL', channels={Channel.TRADES}, on_message=received.append,
+                              on_disconnect=done.set, speed=None)
+        client.start()
+        self.assertTrue(done.wait(timeout=2))
+        self.assertEqual(list(range(5)), [m['data']['tradeId'] for m in received])
+
+        batches = []
+        started = time.monotonic()
+        client = ReplayClient(self.path, on_batch=batches.append, speed=4)
+        client.start()
+        client.join(timeout=2)
+        self.assertGreater(time.monotonic() - started, .1)
+        self.assertEqual(6, sum(map(len, batches)))
+        self.assertEqual(6, client.received)
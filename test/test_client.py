@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from iexdata.client import Client, get_client, set_client
+from iexdata.common import get_json
+
+
+class StandInServer:
+    """Minimal local HTTP/1.1 server answering every GET with the requested path as JSON."""
+
+    def __init__(self, status=200, delay=0.):
+        self.status = status
+        self.delay = delay
+        self.connections = set()
+        self.paths = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.connections.add(self.client_address)
+                server.paths.append(self.path)
+                time.sleep(server.delay)
+                body = json.dumps({'path': self.path}).encode()
+                self.send_response(server.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/1.0/'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestClient(TestCase):
+    def test_keep_alive(self):
+        with StandInServer() as server, Client(base_url=server.url) as client:
+            for _ in range(5):
+                self.assertEqual({'path': '/1.0/tops'}, client.get_json('tops'))
+            self.assertEqual(1, len(server.connections))
+
+    def test_no_keep_alive(self):
+        with StandInServer() as server, Client(base_url=server.url, keep_alive=False) as client:
+            for _ in range(3):
+                client.get_json('tops')
+            self.assertEqual(3, len(server.connections))
+
+    def test_coalesce(self):
+        with StandInServer(delay=.2) as server, Client(base_url=server.url) as client:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(client.get_json('tops', 'symbol')))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual([{'path': '/1.0/tops?filter=symbol'}] * 8, results)
+            self.assertEqual(['/1.0/tops?filter=symbol'], server.paths)
+            self.assertEqual(7, client.flights.shared)
+            # completed requests are not reused
+            client.get_json('tops', 'symbol')
+            self.assertEqual(2, len(server.paths))
+
+    def test_filter(self):
+        with StandInServer() as server, Client(base_url=server.url) as client:
+            client.get_json('ref-data/symbols', filter='symbol')
+            client.get_json('stats/historical?date=201505', filter='symbol')
+            self.assertEqual(['/1.0/ref-data/symbols?filter=symbol', '/1.0/stats/historical?date=201505&filter=symbol'],
+                             server.paths)
+
+    def test_error(self):
+        with StandInServer(status=404) as server, Client(base_url=server.url, retries=0) as client:
+            with self.assertRaises(RuntimeError):
+                client.get_json('tops')
+
+    def test_injection(self):
+        with StandInServer() as server, Client(base_url=server.url) as client:
+            previous = set_client(client)
+            try:
+                self.assertIs(client, get_client())
+                self.assertEqual({'path': '/1.0/deep'}, get_json('deep'))
+            finally:
+                set_client(previous)
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+import numpy as np
+from mock import patch, MagicMock
+
+import iexdata.endpoints.marketdata as mdata
+import iexdata.endpoints.stats as stats
+from iexdata.columnar import to_arrays, TOPS
+
+QUOTES = [
+    {'symbol': 'AAPL', 'bidPrice': 170.5, 'bidSize': 100, 'askPrice': 170.6, 'askSize': 200,
+     'lastUpdated': 1551884400000, 'lastSalePrice': 170.55, 'lastSaleSize': 10, 'lastSaleTime': 1551884399000,
+     'volume': 12345, 'marketPercent': 0.02, 'sector': 'technologyhardwareequipment', 'securityType': 'commonstock'},
+    {'symbol': 'SNAP', 'bidPrice': 0, 'bidSize': 0, 'askPrice': 0, 'askSize': 0, 'lastUpdated': 1551884400001,
+     'lastSalePrice': None, 'lastSaleSize': None, 'lastSaleTime': 0, 'volume': 0, 'marketPercent': 0},
+]
+
+TRADES = {
+    'AAPL': [{'price': 170.5, 'size': 100, 'tradeId': 1, 'isISO': True, 'isOddLot': False,
+              'isOutsideRegularHours': False, 'isSinglePriceCross': False, 'isTradeThroughExempt': False,
+              'timestamp': 1551884400000},
+             {'price': 170.6, 'size': 5, 'tradeId': 2, 'isISO': False, 'isOddLot': True,
+              'isOutsideRegularHours': False, 'isSinglePriceCross': False, 'isTradeThroughExempt': False,
+              'timestamp': 1551884400001}],
+    'SNAP': [{'price': 10.1, 'size': 50, 'tradeId': 3, 'timestamp': 1551884400002}],
+}
+
+
+def response(result):
+    mock = MagicMock()
+    mock.status_code = 200
+    mock.json = MagicMock(return_value=result)
+    return mock
+
+
+class TestColumnar(TestCase):
+    def test_to_arrays(self):
+        arrays = to_arrays(QUOTES, TOPS)
+        self.assertEqual(np.float64, arrays['bidPrice'].dtype)
+        self.assertEqual(np.int64, arrays['volume'].dtype)
+        self.assertEqual(np.dtype('datetime64[ms]'), arrays['lastUpdated'].dtype)
+        self.assertEqual(np.datetime64(1551884400000, 'ms'), arrays['lastUpdated'][0])
+        self.assertTrue(np.isnat(arrays['lastSaleTime'][1]))
+        # missing sizes fall back to float with NaN
+        self.assertEqual(np.float64, arrays['lastSaleSize'].dtype)
+        self.assertTrue(np.isnan(arrays['lastSalePrice'][1]))
+        self.assertEqual(['AAPL', 'SNAP'], arrays['symbol'].tolist())
+
+    def test_tops(self):
+        with patch('requests.Session.get', return_value=response(QUOTES)):
+            self.assertEqual(QUOTES, mdata.tops())
+            frame = mdata.tops(as_frame=True)
+            self.assertEqual('category', frame['symbol'].dtype.name)
+            self.assertEqual(2, len(frame))
+            self.assertEqual(170.6, mdata.tops(as_arrays=True)['askPrice'][0])
+
+    def test_trades(self):
+        with patch('requests.Session.get', return_value=response(TRADES)):
+            arrays = mdata.trades(['AAPL', 'SNAP'], as_arrays=True)
+            self.assertEqual(['AAPL', 'AAPL', 'SNAP'], arrays['symbol'].tolist())
+            self.assertEqual([1, 2, 3], arrays['tradeId'].tolist())
+            self.assertEqual([True, False, False], arrays['isISO'].tolist())
+
+    def test_stats(self):
+        daily = [{'date': '2019-03-05', 'volume': 10, 'routedVolume': 5, 'marketShare': 0.01, 'isHalfday': False,
+                  'litVolume': 3}]
+        with patch('requests.Session.get', return_value=response(daily)):
+            frame = stats.historical_daily(last='1', as_frame=True)
+            self.assertEqual(np.datetime64('2019-03-05'), frame['date'].values[0])
+            self.assertEqual(10, stats.recent(as_arrays=True)['volume'][0])
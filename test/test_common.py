@@ -3,12 +3,12 @@ from unittest import TestCase
 
 from mock import patch, MagicMock
 
-from iexdata.common import get_json, string_or_date
+from iexdata.common import get_json, string_or_date, symbol_batches
 
 
 class TestCommon(TestCase):
     def test_get_json(self):
-        with patch('requests.get') as mock:
+        with patch('requests.Session.get') as mock:
             mock.return_value = MagicMock()
             mock.return_value.status_code = 200
 
@@ -27,3 +27,8 @@ class TestCommon(TestCase):
         string_or_date(datetime.now())
         with self.assertRaises(TypeError):
             string_or_date(s=5)
+
+    def test_symbol_batches(self):
+        self.assertEqual([], list(symbol_batches([], max_symbols=10)))
+        self.assertEqual([['A', 'B'], ['C']], list(symbol_batches(['A', 'B', 'A', 'C'], max_symbols=2)))
+        self.assertEqual([['AAPL'], ['SNAP', 'FB']], list(symbol_batches(['AAPL', 'SNAP', 'FB'], 10, max_length=7)))
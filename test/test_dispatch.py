@@ -0,0 +1,79 @@
+import threading
+from unittest import TestCase
+
+from iexdata.dispatch import BoundedQueue, Dispatcher, Overflow
+
+
+class TestBoundedQueue(TestCase):
+    def fill(self, overflow):
+        queue = BoundedQueue(maxsize=3, overflow=overflow)
+        for i, key in enumerate('ABAC'):
+            queue.put(key, i)
+        return queue
+
+    def test_drop_oldest(self):
+        queue = self.fill(Overflow.DROP_OLDEST)
+        self.assertEqual([1, 2, 3], queue.get_many(10))
+        self.assertEqual(1, queue.dropped)
+
+    def test_drop_newest(self):
+        queue = self.fill(Overflow.DROP_NEWEST)
+        self.assertEqual([0, 1, 2], queue.get_many(10))
+        self.assertEqual(1, queue.dropped)
+
+    def test_coalesce(self):
+        queue = BoundedQueue(maxsize=3, overflow=Overflow.COALESCE)
+        for i, key in enumerate('ABCAD'):
+            queue.put(key, i)
+        # A is replaced in place by its newer value, D has no pending predecessor and evicts the oldest entry
+        self.assertEqual([1, 2, 4], queue.get_many(10))
+        self.assertEqual((1, 1), (queue.coalesced, queue.dropped))
+
+    def test_block(self):
+        queue = BoundedQueue(maxsize=1, overflow=Overflow.BLOCK)
+        queue.put('A', 0)
+        self.assertFalse(queue.put('A', 1, timeout=.01))
+        threading.Timer(.05, queue.get_many, args=(1,)).start()
+        self.assertTrue(queue.put('A', 2, timeout=2))
+        self.assertEqual([2], queue.get_many(1))
+
+    def test_get_many(self):
+        queue = BoundedQueue()
+        self.assertEqual([], queue.get_many(10, timeout=.01))
+        queue.put('A', 0)
+        threading.Timer(.02, queue.put, args=('A', 1)).start()
+        self.assertEqual([0, 1], queue.get_many(2, timeout=1, linger=1))
+        self.assertEqual(0., queue.lag())
+
+
+class TestDispatcher(TestCase):
+    def test_dispatch(self):
+        handled = []
+        dispatcher = Dispatcher(handled.extend, workers=2)
+        dispatcher.start()
+        for i in range(100):
+            dispatcher.submit(i % 7, None, i)
+        dispatcher.stop(timeout=2)
+        self.assertFalse(dispatcher.is_alive())
+        self.assertEqual(list(range(100)), sorted(handled))
+        self.assertEqual({'delivered': 100, 'errors': 0, 'queue_depth': 0, 'dropped': 0, 'coalesced': 0, 'lag': 0.},
+                         dispatcher.metrics())
+
+    def test_handler_error(self):
+        handled = []
+
+        def handle(items):
+            if 0 in items:
+                raise ValueError('malformed')
+            handled.extend(items)
+
+        dispatcher = Dispatcher(handle, maxsize=1)
+        dispatcher.start()
+        with self.assertLogs('iexdata.dispatch', 'ERROR'):
+            self.assertTrue(dispatcher.submit(None, None, 0))
+            # the worker survives and keeps draining its (blocking) queue
+            for i in range(1, 20):
+                self.assertTrue(dispatcher.queues[0].put(None, i, timeout=2))
+            dispatcher.stop(timeout=2)
+        self.assertEqual(list(range(1, 20)), handled)
+        self.assertEqual(1, dispatcher.metrics()['errors'])
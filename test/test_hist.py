@@ -0,0 +1,141 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+import numpy as np
+
+from iexdata.client import get_client
+from iexdata.hist import Pcap, decode, decode_parallel, download, read_hist, read_partitioned, segments, split
+from test.hist_samples import SYMBOLS, TIMESTAMP, sample_segments, write_pcap
+
+
+class TestHist(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, 'tops.pcap')
+        write_pcap(self.path, sample_segments())
+
+    def test_read_all(self):
+        data = read_hist(self.path)
+        self.assertEqual(9, len(data['trade']))
+        self.assertEqual(9, len(data['quote_update']))
+        self.assertEqual(9, len(data['price_level_update_buy']))
+        self.assertEqual(9, len(data['price_level_update_sell']))
+        self.assertEqual(1, len(data['system_event']))
+        self.assertEqual(0, len(data['auction_information']))
+
+        trades = data['trade']
+        self.assertEqual([s.encode() for s in SYMBOLS] * 3, list(trades['symbol']))
+        np.testing.assert_allclose(trades['price'][:3], [100., 100.01, 100.02])
+        self.assertEqual([10, 10, 10, 20], list(trades['size'][:4]))
+        self.assertEqual(np.datetime64(TIMESTAMP + 2, 'ns'), trades['timestamp'][-1])
+        self.assertEqual(99.5, data['quote_update']['bid_price'][0])
+        self.assertEqual(b'T', data['trading_status']['trading_status'][0])
+
+    def test_filters(self):
+        data = read_hist(self.path, symbols={'SNAP'}, message_types={'trade', 'system_event'})
+        self.assertEqual({'trade', 'system_event'}, set(data))
+        self.assertEqual([b'SNAP'] * 3, list(data['trade']['symbol']))
+        self.assertEqual(0, len(data['system_event']))
+        self.assertRaises(ValueError, read_hist, self.path, message_types={'nope'})
+
+    def test_pcapng_and_gzip(self):
+        expected = read_hist(self.path)['trade']
+        ng = os.path.join(self.directory, 'tops.pcapng')
+        write_pcap(ng, sample_segments(), ng=True)
+        np.testing.assert_array_equal(expected, read_hist(ng)['trade'])
+
+        with open(self.path, 'rb') as source, gzip.open(self.path + '.gz', 'wb') as sink:
+            shutil.copyfileobj(source, sink)
+        os.remove(self.path)
+        np.testing.assert_array_equal(expected, read_hist(self.path + '.gz')['trade'])
+
+    def test_download(self):
+        with open(self.path, 'rb') as f:
+            content = gzip.compress(f.read())
+        resp = MagicMock(status_code=200)
+        resp.__enter__.return_value = resp
+        resp.iter_content.return_value = [content]
+        links = [{'link': 'https://example.com/hist.pcap.gz', 'date': '20190306', 'feed': 'TOPS', 'version': '1.6'}]
+        with patch('iexdata.hist.marketdata.hist', return_value=links), \
+                patch('requests.Session.get', return_value=resp) as get:
+            path = download('20190306', feed='TOPS', directory=self.directory)
+        get.assert_called_once_with(links[0]['link'], stream=True, timeout=get_client().timeout)
+        with open(self.path, 'rb') as expected, open(path, 'rb') as actual:
+            self.assertEqual(expected.read(), actual.read())
+
+    def test_segments(self):
+        with Pcap(self.path) as pcap:
+            parsed = list(segments(pcap))
+        self.assertEqual(4, len(parsed))
+        self.assertEqual(15, len(parsed[1][1]))
+        self.assertEqual(2, parsed[1][0][8])
+
+    def test_not_a_pcap(self):
+        path = os.path.join(self.directory, 'text')
+        with open(path, 'w') as f:
+            f.write('hello world')
+        self.assertRaises(ValueError, read_hist, path)
+
+    def test_split(self):
+        with Pcap(self.path) as pcap:
+            ranges = split(pcap, 3)
+            self.assertIn(len(ranges), (2, 3))
+            self.assertEqual(24, ranges[0][0])
+            self.assertEqual(len(pcap.data), ranges[-1][1])
+            self.assertEqual([end for _, end in ranges[:-1]], [start for start, _ in ranges[1:]])
+            parts = [decode(pcap, message_types={'trade'}, start=start, end=end)['trade'] for start, end in ranges]
+            self.assertEqual(decode(pcap, message_types={'trade'})['trade'], b''.join(parts))
+
+    def test_decode_parallel(self):
+        output = os.path.join(self.directory, 'out')
+        progress = []
+        counts = decode_parallel(self.path, output, workers=2, parts=3, format='npy',
+                                 progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(9, counts['trade'])
+        self.assertEqual(1, counts['system_event'])
+        self.assertEqual(os.path.getsize(self.path) - 24, progress[-1][0])
+
+        expected = read_hist(self.path)
+        for symbol in SYMBOLS:
+            trades = expected['trade'][expected['trade']['symbol'] == symbol.encode()]
+            np.testing.assert_array_equal(trades, read_partitioned(output, 'trade', symbol))
+        self.assertEqual(1, len(read_partitioned(output, 'system_event')))
+        self.assertEqual(0, len(read_partitioned(output, 'trade', 'NONE')))
+        np.testing.assert_array_equal(expected['trade'], read_partitioned(output, 'trade'))
+        # one file per range and message type, the symbol is a column
+        files = os.listdir(os.path.join(output, 'quote_update'))
+        self.assertLessEqual(len(files), 3)
+        self.assertTrue(all(name.startswith('part-') and name.endswith('.npy') for name in files))
+
+    def test_decode_parallel_by_symbol(self):
+        output = os.path.join(self.directory, 'out')
+        decode_parallel(self.path, output, workers=2, parts=3, format='npy', by_symbol=True)
+        expected = read_hist(self.path)
+        for symbol in SYMBOLS:
+            trades = expected['trade'][expected['trade']['symbol'] == symbol.encode()]
+            np.testing.assert_array_equal(trades, read_partitioned(output, 'trade', symbol))
+        self.assertEqual(1, len(read_partitioned(output, 'system_event')))
+        self.assertEqual(0, len(read_partitioned(output, 'trade', 'NONE')))
+        self.assertEqual({'symbol=' + s for s in SYMBOLS}, set(os.listdir(os.path.join(output, 'quote_update'))))
+
+    def test_decode_parallel_parquet(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        output = os.path.join(self.directory, 'out')
+        counts = decode_parallel(self.path, output, workers=2, parts=3)
+        self.assertEqual(9, counts['trade'])
+        self.assertTrue(all(name.endswith('.parquet') for name in os.listdir(os.path.join(output, 'trade'))))
+        expected = read_hist(self.path)
+        for symbol in SYMBOLS:
+            trades = expected['trade'][expected['trade']['symbol'] == symbol.encode()]
+            np.testing.assert_array_equal(trades, read_partitioned(output, 'trade', symbol))
+        self.assertEqual(1, len(read_partitioned(output, 'system_event')))
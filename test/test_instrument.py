@@ -0,0 +1,65 @@
+import threading
+from unittest import TestCase
+
+from iexdata import instrument
+from iexdata.client import Client
+from iexdata.dispatch import Dispatcher
+from iexdata.instrument import Histogram
+from test.test_client import StandInServer
+
+
+class TestHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(.5))
+        for value in range(1, 1001):
+            histogram.record(value / 1000)
+        self.assertEqual(1000, histogram.count)
+        self.assertAlmostEqual(.5, histogram.percentile(.5), delta=.05)
+        self.assertAlmostEqual(.99, histogram.percentile(.99), delta=.09)
+        self.assertEqual(1., histogram.percentile(1.))
+        histogram.record(0)
+        self.assertEqual(0, histogram.percentile(0))
+
+
+class TestRecorder(TestCase):
+    def setUp(self):
+        self.recorder = instrument.enable()
+        self.addCleanup(instrument.remove_hook, self.recorder)
+
+    def test_requests(self):
+        with StandInServer() as server, Client(base_url=server.url) as client:
+            for _ in range(3):
+                client.get_json('tops?symbols=AAPL')
+        metrics = self.recorder.to_dict()
+        self.assertEqual(3, metrics['iexdata_request_seconds'][(('endpoint', 'tops'),)]['count'])
+        self.assertEqual(3, metrics['iexdata_decode_seconds'][(('endpoint', 'tops'),)]['count'])
+        self.assertEqual(3, metrics['iexdata_requests_total'][(('endpoint', 'tops'), ('status', '200'))]['value'])
+        self.assertGreater(metrics['iexdata_response_bytes'][(('endpoint', 'tops'),)]['p50'], 10)
+
+        text = self.recorder.to_prometheus()
+        self.assertIn('# TYPE iexdata_request_seconds summary', text)
+        self.assertIn('iexdata_request_seconds_count{endpoint="tops"} 3', text)
+        self.assertIn('iexdata_requests_total{endpoint="tops",status="200"} 3', text)
+
+    def test_stream_events(self):
+        done = threading.Event()
+        dispatcher = Dispatcher(lambda items: done.set(), batch_size=10)
+        dispatcher.submit('AAPL', 'AAPL', 'message')
+        dispatcher.start()
+        self.assertTrue(done.wait(5))
+        dispatcher.stop(timeout=5)
+        instrument.emit('messages', counts={'trades': 2, 'book': 1}, seconds=.001)
+        metrics = self.recorder.to_dict()
+        self.assertEqual(1, metrics['iexdata_stream_queue_wait_seconds'][()]['count'])
+        self.assertEqual(2, metrics['iexdata_stream_messages_total'][(('channel', 'trades'),)]['value'])
+        self.assertIn('iexdata_stream_queue_depth 0', self.recorder.to_prometheus())
+
+        self.recorder.reset()
+        self.assertEqual({}, self.recorder.to_dict())
+
+    def test_disabled(self):
+        instrument.remove_hook(self.recorder)
+        with StandInServer() as server, Client(base_url=server.url) as client:
+            client.get_json('tops')
+        self.assertEqual({}, self.recorder.to_dict())
@@ -0,0 +1,48 @@
+import json
+from json import JSONDecodeError
+from unittest import TestCase
+
+from mock import patch, MagicMock
+
+import iexdata.endpoints.marketdata as mdata
+import iexdata.endpoints.refdata as refdata
+from iexdata.jsonstream import iter_items
+
+RECORDS = [{'symbol': f'S{i}', 'name': 'Ünïcode ' * i, 'isEnabled': True, 'price': i / 3} for i in range(200)]
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterItems(TestCase):
+    def test_chunk_boundaries(self):
+        items = RECORDS + [1, 2.5, 12345, 'text', None, True, [1, [2]], {}]
+        raw = json.dumps(items, ensure_ascii=False).encode()
+        for size in (1, 2, 7, 100, len(raw)):
+            self.assertEqual(items, list(iter_items(chunked(raw, size))), f'chunk size {size}')
+
+    def test_documents(self):
+        self.assertEqual([], list(iter_items([b' [', b' ] '])))
+        self.assertEqual([{'a': 1}], list(iter_items([b'{"a"', b': 1}'])))
+        with self.assertRaises(JSONDecodeError):
+            list(iter_items([b'[{"a": 1}, {"b"']))
+
+
+class TestStreamingEndpoints(TestCase):
+    def test_endpoints(self):
+        with patch('requests.Session.get') as mock:
+            mock.return_value = MagicMock()
+            mock.return_value.__enter__.return_value = mock.return_value
+            mock.return_value.status_code = 200
+            mock.return_value.iter_content = lambda size: chunked(json.dumps(RECORDS).encode(), 64)
+            records = mdata.tops(stream=True)
+            self.assertEqual(RECORDS[0], next(records))
+            self.assertEqual(RECORDS[1:], list(records))
+            self.assertEqual(RECORDS, list(refdata.symbols(stream=True)))
+            self.assertEqual(RECORDS, list(refdata.symbol_directory(date='20190305', stream=True)))
+            self.assertTrue(mock.call_args[1]['stream'])
+
+            mock.return_value.status_code = 500
+            with self.assertRaises(RuntimeError):
+                list(mdata.last(stream=True))
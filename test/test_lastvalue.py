@@ -0,0 +1,80 @@
+import sys
+import threading
+import uuid
+from unittest import TestCase, mock, skipIf
+
+from iexdata.lastvalue import LastValueCache
+
+
+def book(symbol, bid, ask, timestamp):
+    return {'symbol': symbol, 'messageType': 'book',
+            'data': {'bids': [{'price': bid, 'size': 100, 'timestamp': timestamp}],
+                     'asks': [{'price': ask, 'size': 200, 'timestamp': timestamp + 1}]}}
+
+
+class TestLastValueCache(TestCase):
+    def test_stream(self):
+        cache = LastValueCache(capacity=2)
+        cache.on_batch([book('AAPL', 10., 10.5, 1000),
+                        {'symbol': 'AAPL', 'messageType': 'trades', 'data': {'price': 10.2, 'size': 50,
+                                                                           'timestamp': 1002}},
+                        {'symbol': 'SNAP', 'messageType': 'book', 'data': {'bids': [], 'asks': []}},
+                        {'symbol': 'AAPL', 'messageType': 'systemEvent', 'data': {'systemEvent': 'R'}}])
+        aapl = cache['AAPL']
+        self.assertEqual((10., 100, 10.5, 200, 1001, 10.2, 50, 1002),
+                         tuple(aapl[f] for f in ('bidPrice', 'bidSize', 'askPrice', 'askSize', 'lastUpdated',
+                                                 'lastSalePrice', 'lastSaleSize', 'lastSaleTime')))
+        self.assertEqual(0., cache.get('SNAP')['bidPrice'])
+        self.assertEqual(['AAPL', 'SNAP'], cache.symbols())
+        self.assertIsNone(cache.get('MSFT'))
+        self.assertNotIn('MSFT', cache)
+        with self.assertRaises(RuntimeError):
+            cache.update('MSFT', bidPrice=1.)
+
+    def test_poll(self):
+        cache = LastValueCache()
+        records = [{'symbol': 'AAPL', 'sector': 'technology', 'bidPrice': 170., 'bidSize': 100, 'askPrice': 171.,
+                    'askSize': 100, 'lastUpdated': 1, 'lastSalePrice': 170.5, 'lastSaleSize': 10,
+                    'lastSaleTime': 1, 'volume': 1000, 'marketPercent': .02}]
+        with mock.patch('iexdata.endpoints.marketdata.tops', return_value=records) as tops:
+            cache.poll(['AAPL'])
+        tops.assert_called_once_with(['AAPL'])
+        self.assertEqual([{k: v for k, v in records[0].items() if k != 'sector'}], cache.tops('AAPL'))
+
+    def test_consistent_reads(self):
+        cache = LastValueCache()
+        cache.update('AAPL', bidPrice=0., askPrice=1.)
+        done = threading.Event()
+
+        def write():
+            for i in range(20000):
+                cache.update('AAPL', bidPrice=float(i), askPrice=i + 1.)
+            done.set()
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        reads = 0
+        while not done.is_set() or not reads:
+            value = cache.get('AAPL')
+            self.assertEqual(value['bidPrice'] + 1., value['askPrice'])
+            reads += 1
+        thread.join()
+        self.assertEqual(19999., cache.get('AAPL')['bidPrice'])
+
+    @skipIf(sys.version_info < (3, 8), 'multiprocessing.shared_memory requires Python 3.8')
+    def test_shared_memory(self):
+        name = 'iexdata-test-' + uuid.uuid4().hex[:8]
+        writer = LastValueCache(capacity=4, shared_memory=name)
+        try:
+            writer.update('AAPL', bidPrice=10.)
+            reader = LastValueCache(shared_memory=name, create=False)
+            self.assertEqual(4, reader.capacity)
+            self.assertEqual(10., reader.get('AAPL')['bidPrice'])
+            # symbols added later are found by attached readers
+            writer.update('SNAP', lastSalePrice=5.)
+            self.assertEqual(5., reader['SNAP']['lastSalePrice'])
+            self.assertEqual(2, len(reader))
+            reader.close()
+        finally:
+            writer.close()
+            writer.unlink()
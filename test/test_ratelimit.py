@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from iexdata.client import Client, RateLimitError
+from iexdata.ratelimit import FileTokenBucket, TokenBucket, Usage
+
+
+def _response(status, body=b'[]', headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.content = body
+    resp.headers = headers or {}
+    resp.json.return_value = []
+    return resp
+
+
+class TestTokenBucket(TestCase):
+    def test_rate(self):
+        bucket = TokenBucket(rate=100, burst=5)
+        for _ in range(5):
+            self.assertEqual(0, bucket.reserve())
+        self.assertGreater(bucket.reserve(), 0)
+        started = time.monotonic()
+        self.assertTrue(bucket.acquire())
+        self.assertTrue(bucket.acquire())
+        self.assertGreater(time.monotonic() - started, .01)
+        self.assertFalse(bucket.acquire(tokens=5, timeout=.01))
+        # more than burst tokens are never available
+        with self.assertRaises(ValueError):
+            bucket.acquire(tokens=50)
+
+    def test_penalize(self):
+        bucket = TokenBucket(rate=1000)
+        bucket.penalize(.05)
+        self.assertGreater(bucket.reserve(), .03)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreater(time.monotonic() - started, .03)
+
+    def test_file_bucket(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'bucket')
+        first, second = FileTokenBucket(path, rate=1, burst=3), FileTokenBucket(path, rate=1, burst=3)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertEqual(0, first.reserve())
+        self.assertEqual(0, second.reserve())
+        self.assertEqual(0, first.reserve())
+        # the budget is shared
+        self.assertGreater(second.reserve(), 0)
+        first.penalize(60)
+        self.assertGreater(second.reserve(), 50)
+        with self.assertRaises(ValueError):
+            first.reserve(4)
+
+
+class TestClientRateLimit(TestCase):
+    def test_retry_after(self):
+        responses = [_response(429, headers={'Retry-After': '0.01'}), _response(200, b'[1, 2]')]
+        bucket = TokenBucket(rate=1000)
+        with patch('requests.Session.get', side_effect=responses):
+            client = Client(rate_limiter=bucket)
+            self.assertEqual([], client.get_json('deep/book?symbols=AAPL'))
+        self.assertEqual({'deep/book': {'requests': 2, 'bytes': 8, 'throttled': 1}}, client.usage.snapshot())
+
+    def test_give_up(self):
+        with patch('requests.Session.get', side_effect=[_response(429, headers={'Retry-After': '7'})] * 2) as get, \
+                patch('iexdata.client.time.sleep') as sleep:
+            client = Client(rate_limit_retries=1)
+            with self.assertRaises(RateLimitError) as error:
+                client.get_json('tops')
+            self.assertEqual(7, error.exception.retry_after)
+            self.assertEqual(2, get.call_count)
+            sleep.assert_called_once_with(7.)
+
+    def test_usage(self):
+        usage = Usage()
+        usage.record('tops?symbols=AAPL', 200, 10)
+        usage.record('tops', 200, 5)
+        self.assertEqual({'tops': {'requests': 2, 'bytes': 15, 'throttled': 0}}, usage.snapshot())
+        usage.reset()
+        self.assertEqual({}, usage.snapshot())
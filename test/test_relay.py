@@ -0,0 +1,112 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from mock import patch
+
+from iexdata.relay import Relay, RelayClient
+from iexdata.stream import Channel
+
+MESSAGES = [
+    {'symbol': 'AAPL', 'messageType': 'trades', 'data': {'price': 1.}},
+    {'symbol': 'SNAP', 'messageType': 'trades', 'data': {'price': 2.}},
+    {'symbol': 'AAPL', 'messageType': 'book', 'data': {'bids': [], 'asks': []}},
+]
+
+
+def wait_for(condition, timeout=5.):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(.01)
+    return condition()
+
+
+class TestRelay(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deep.sock')
+
+    def _subscribed(self, relay, count):
+        return wait_for(lambda: relay.subscribers == count and all(s.subscribed for s in relay._subscribers))
+
+    def test_fan_out(self):
+        relay = Relay(self.path, connect=False)
+        relay.start()
+        self.addCleanup(relay.stop)
+        everything, trades = [], []
+        done = threading.Event()
+        first = RelayClient(self.path, on_batch=everything.extend)
+        second = RelayClient(self.path, symbols='AAPL', channels={Channel.TRADES},
+                             on_message=trades.append, on_disconnect=done.set)
+        first.start()
+        second.start()
+        self.assertTrue(self._subscribed(relay, 2))
+
+        relay.publish(MESSAGES)
+        self.assertTrue(wait_for(lambda: len(everything) == 3 and len(trades) == 1))
+        self.assertEqual(MESSAGES, everything)
+        self.assertEqual(MESSAGES[:1], trades)
+
+        # changed filters apply to later messages
+        second.add_symbols('SNAP')
+        self.assertTrue(wait_for(lambda: relay._subscribers[-1].symbols == {'AAPL', 'SNAP'}))
+        relay.on_message(MESSAGES[1])
+        self.assertTrue(wait_for(lambda: len(trades) == 2))
+        self.assertEqual(MESSAGES[1], trades[-1])
+        self.assertEqual(4, relay.metrics()['published'])
+        second.remove_symbols('SNAP')
+        self.assertTrue(wait_for(lambda: relay._subscribers[-1].symbols == {'AAPL'}))
+
+        # a subscriber of all symbols is not narrowed by adding symbols
+        first.add_symbols('MSFT')
+        self.assertIsNone(first.symbols)
+        with self.assertRaises(ValueError):
+            first.remove_symbols('AAPL')
+
+        first.stop(timeout=2)
+        self.assertTrue(wait_for(lambda: relay.subscribers == 1))
+        relay.stop()
+        self.assertTrue(done.wait(2))
+        second.stop(timeout=2)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_disconnects(self):
+        relay = Relay(self.path, connect=False)
+        relay.start()
+        self.addCleanup(relay.stop)
+        # peers going away at once are unregistered
+        for _ in range(20):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            sock.close()
+        self.assertTrue(wait_for(lambda: relay.subscribers == 0))
+
+        # stopping without joining still ends the connection promptly
+        done = threading.Event()
+        client = RelayClient(self.path, on_disconnect=done.set)
+        client.start()
+        self.assertTrue(self._subscribed(relay, 1))
+        client.stop(join=False)
+        self.assertTrue(done.wait(1))
+        self.assertTrue(wait_for(lambda: relay.subscribers == 0))
+
+    def test_upstream(self):
+        with patch('iexdata.stream.SocketIO') as socket_io:
+            socket_io.return_value.wait.side_effect = lambda seconds: time.sleep(seconds)
+            relay = Relay(self.path, symbols={'AAPL'}, channels={Channel.TRADES})
+            relay.start()
+            received = []
+            client = RelayClient(self.path, symbols={'AAPL', 'MSFT'}, on_message=received.append)
+            client.start()
+            self.assertTrue(self._subscribed(relay, 1))
+            self.assertEqual({'AAPL', 'MSFT'}, relay.client.symbols)
+
+            relay.client._on_message('{"symbol": "MSFT", "messageType": "trades", "data": {"price": 3.0}}')
+            self.assertTrue(wait_for(lambda: received))
+            self.assertEqual('MSFT', received[0]['symbol'])
+            client.stop(timeout=2)
+            relay.stop(timeout=2)
@@ -0,0 +1,114 @@
+import threading
+import time
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from iexdata.scheduler import Cadence, PollingScheduler, Session, session_of
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+class TestPollingScheduler(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.scheduler = PollingScheduler(session_interval=60., clock=self.clock)
+        patcher = patch('iexdata.scheduler.marketdata.system_event', return_value={'systemEvent': 'R'})
+        self.system_event = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_session_of(self):
+        self.assertEqual(Session.REGULAR, session_of({'systemEvent': 'R', 'timestamp': 1}))
+        self.assertEqual(Session.EXTENDED, session_of({'systemEvent': 'M'}))
+        self.assertEqual(Session.CLOSED, session_of({'systemEvent': 'C'}))
+        self.assertEqual(Session.CLOSED, session_of({}))
+
+    def test_coalesce_and_deduplicate(self):
+        endpoint = MagicMock(return_value=[{'symbol': 'AAPL', 'price': 1}])
+        first, second = [], []
+        self.scheduler.subscribe(endpoint, first.append, 'AAPL', cadence=Cadence(regular=2.))
+        self.scheduler.subscribe(endpoint, second.append, 'AAPL', cadence=Cadence(regular=1.))
+
+        self.assertEqual(1., self.scheduler.poll_due())
+        endpoint.assert_called_once_with('AAPL')
+        self.assertEqual(1, len(first))
+        self.assertEqual(1, len(second))
+
+        # not due yet
+        self.clock.now = .5
+        self.scheduler.poll_due()
+        self.assertEqual(1, endpoint.call_count)
+
+        # due at the shorter interval, unchanged response is not delivered
+        self.clock.now = 1.
+        self.scheduler.poll_due()
+        self.assertEqual(2, endpoint.call_count)
+        self.assertEqual(1, len(first))
+
+        endpoint.return_value = [{'symbol': 'AAPL', 'price': 2}]
+        self.clock.now = 2.
+        self.scheduler.poll_due()
+        self.assertEqual([1, 2], [value[0]['price'] for value in second])
+        self.assertEqual({'session': 'regular', 'requests': 3, 'unchanged': 1, 'delivered': 4, 'jobs': 1},
+                         self.scheduler.metrics())
+
+    def test_symbol_lists(self):
+        endpoint = MagicMock(return_value=[])
+        first = self.scheduler.subscribe(endpoint, lambda value: None, ['AAPL', 'MSFT'])
+        second = self.scheduler.subscribe(endpoint, lambda value: None, {'MSFT', 'AAPL'})
+        third = self.scheduler.subscribe(endpoint, lambda value: None, symbols=('MSFT', 'AAPL'))
+        self.assertEqual(first.key, second.key)
+        self.assertNotEqual(first.key, third.key)
+        self.assertEqual(2, self.scheduler.metrics()['jobs'])
+        self.scheduler.poll_due()
+        endpoint.assert_any_call(['AAPL', 'MSFT'])
+        endpoint.assert_any_call(symbols=('MSFT', 'AAPL'))
+
+    def test_callback_error(self):
+        endpoint = MagicMock(return_value=[1])
+        received = []
+        self.scheduler.subscribe(endpoint, MagicMock(side_effect=ValueError('broken')), 'AAPL')
+        self.scheduler.subscribe(endpoint, received.append, 'AAPL')
+        with self.assertLogs('iexdata.scheduler', 'WARNING'):
+            self.scheduler.poll_due()
+        self.assertEqual([[1]], received)
+
+    def test_session_cadence(self):
+        self.system_event.return_value = {'systemEvent': 'C'}
+        endpoint = MagicMock(return_value={})
+        subscription = self.scheduler.subscribe(endpoint, lambda value: None, cadence=Cadence(1., 10., 300.))
+        self.assertEqual(60., self.scheduler.poll_due())
+        self.assertEqual(Session.CLOSED, self.scheduler.session)
+
+        self.clock.now = 59.
+        self.scheduler.poll_due()
+        self.assertEqual(1, endpoint.call_count)
+
+        # the session is checked again and the market opened
+        self.system_event.return_value = {'systemEvent': 'R'}
+        self.clock.now = 60.
+        self.scheduler.poll_due()
+        self.assertEqual(Session.REGULAR, self.scheduler.session)
+        self.assertEqual(2, endpoint.call_count)
+        self.assertEqual(2, self.system_event.call_count)
+
+        self.scheduler.unsubscribe(subscription)
+        self.clock.now = 100.
+        self.scheduler.poll_due()
+        self.assertEqual(2, endpoint.call_count)
+        self.assertEqual(0, self.scheduler.metrics()['jobs'])
+
+    def test_thread(self):
+        endpoint = MagicMock(side_effect=range(1000))
+        self.scheduler.clock = time.monotonic
+        received = threading.Event()
+        self.scheduler.subscribe(endpoint, lambda value: received.set(), cadence=Cadence(regular=.01))
+        self.scheduler.start()
+        self.assertTrue(received.wait(5))
+        self.scheduler.stop(timeout=5)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import TestCase
+
+from mock import patch
+
+from iexdata.store import HistoricalStore
+
+
+def _daily(key):
+    first = date(int(key[:4]), int(key[4:6]), int(key[6:] or 1))
+    days = [first] if len(key) == 8 else [first + timedelta(days=i) for i in range(31)]
+    # no trading on the 1st and on weekends
+    return [{'date': d.isoformat(), 'volume': d.day, 'routedVolume': 1, 'marketShare': .1, 'isHalfday': False,
+             'litVolume': 2}
+            for d in days if d.month == first.month and d.day > 1 and d.weekday() < 5]
+
+
+class TestHistoricalStore(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = HistoricalStore(os.path.join(directory.name, 'history.sqlite'), workers=4)
+        self.addCleanup(self.store.close)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def _fetch(self, date):
+        with self.lock:
+            self.requests.append(date)
+        return _daily(date)
+
+    def test_historical_daily(self):
+        with patch('iexdata.store.stats.historical_daily', side_effect=self._fetch):
+            result = self.store.historical_daily('20190102', '20190104')
+            self.assertEqual(['20190102', '20190103', '20190104'], [r['date'].replace('-', '') for r in result])
+            self.assertEqual(['201901'], self.requests)
+
+            # served from disk, the single missing day is requested on its own
+            self.assertEqual(1, len(self.store.historical_daily('20190103')))
+            self.assertEqual(['201901'], self.requests)
+            self.store.historical_daily('20190131', '20190201')
+            self.assertEqual(['201901', '20190201'], self.requests)
+            self.assertEqual([], self.store.missing_days('20190101', '20190201'))
+
+            # days without data are not requested again
+            self.assertEqual([], self.store.historical_daily('20190101'))
+            self.assertEqual(2, len(self.requests))
+
+            self.store.historical_daily('20190201', '20190430')
+            self.assertEqual({'201902', '201903', '201904'}, set(self.requests[2:]))
+            frame = self.store.historical_daily('20190102', '20190430', as_frame=True, backfill=False)
+            self.assertEqual(82, len(frame))
+            self.assertEqual('int64', frame['volume'].dtype)
+
+    def test_today_is_refetched(self):
+        with patch('iexdata.store.stats.historical_daily', side_effect=lambda date: []) as mock, \
+                patch('iexdata.store._today', return_value=date(2019, 1, 3)):
+            self.store.backfill_daily('20190102', '20190103')
+            self.assertEqual(['20190103'], self.store.missing_days('20190102', '20190103'))
+            self.assertEqual(1, mock.call_count)
+
+    def test_historical_summary(self):
+        with patch('iexdata.store.stats.historical_summary', side_effect=lambda date: {'month': date}) as mock, \
+                patch('iexdata.store._today', return_value=date(2019, 3, 15)):
+            result = self.store.historical_summary('201901', date(2019, 3, 1))
+            self.assertEqual({'201901': {'month': '201901'}, '201902': {'month': '201902'},
+                              '201903': {'month': '201903'}}, result)
+            self.assertEqual(3, mock.call_count)
+            self.store.historical_summary('201812', '201903')
+            self.assertEqual({'201812', '201903'}, {call[1]['date'] for call in mock.call_args_list[3:]})
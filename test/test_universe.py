@@ -0,0 +1,59 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from mock import patch
+
+from iexdata.universe import SymbolUniverse
+
+RECORDS = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.', 'date': '2019-03-06', 'isEnabled': True, 'type': 'cs', 'iexId': '11'},
+    {'symbol': 'AAP', 'name': 'Advance Auto Parts Inc.', 'date': '2019-03-06', 'isEnabled': True, 'type': 'cs',
+     'iexId': '10'},
+    {'symbol': 'SPY', 'name': 'SPDR S&P 500', 'date': '2019-03-06', 'isEnabled': True, 'type': 'et', 'iexId': '2'},
+    {'symbol': 'ZIEXT', 'name': 'IEX Test Company', 'date': '2019-03-06', 'isEnabled': False, 'type': 'cs',
+     'iexId': '3'},
+]
+
+
+class TestSymbolUniverse(TestCase):
+    def setUp(self):
+        self.universe = SymbolUniverse(RECORDS)
+
+    def test_lookup(self):
+        self.assertEqual(4, len(self.universe))
+        self.assertIn('AAPL', self.universe)
+        self.assertNotIn('MSFT', self.universe)
+        self.assertEqual('Apple Inc.', self.universe['AAPL']['name'])
+        self.assertIsNone(self.universe.get('MSFT'))
+        self.assertEqual('SPY', self.universe.by_iex_id('2')['symbol'])
+        self.assertEqual(['MSFT'], self.universe.validate(['AAPL', 'MSFT']))
+
+    def test_search(self):
+        self.assertEqual(['AAP', 'AAPL'], [r['symbol'] for r in self.universe.search('aap')])
+        self.assertEqual(['AAP'], [r['symbol'] for r in self.universe.search('AA', limit=1)])
+        self.assertEqual([], self.universe.search('X'))
+        self.assertEqual(['AAPL'], [r['symbol'] for r in self.universe.search_name('app')])
+        self.assertEqual(['AAP'], [r['symbol'] for r in self.universe.search_name('parts')])
+        self.assertEqual(['ZIEXT'], [r['symbol'] for r in self.universe.search_name('test comp')])
+        # multiple matching words of one name yield the record once
+        self.assertEqual(['AAP', 'AAPL'], sorted(r['symbol'] for r in self.universe.search_name('inc')))
+
+    def test_filter(self):
+        self.assertEqual(['AAPL', 'AAP'], [r['symbol'] for r in self.universe.filter(types={'cs'}, enabled=True)])
+        self.assertEqual(['ZIEXT'], [r['symbol'] for r in self.universe.filter(enabled=False)])
+        self.assertEqual(['SPY'], [r['symbol'] for r in self.universe.filter(types=['et', 'unknown'])])
+        self.assertEqual(4, len(self.universe.filter()))
+        self.assertEqual({'cs': 3, 'et': 1}, self.universe.types())
+
+    def test_load(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'symbols.json.gz')
+        with patch('iexdata.universe.refdata.symbols', return_value=iter(RECORDS)) as symbols:
+            universe = SymbolUniverse.load(path, max_age=3600)
+            self.assertEqual(1, symbols.call_count)
+            self.assertEqual(RECORDS, SymbolUniverse.load(path, max_age=3600).records)
+            self.assertEqual(1, symbols.call_count)
+        self.assertEqual(RECORDS, universe.records)
+        self.assertRaises(FileNotFoundError, SymbolUniverse.load, path + '.missing', fetch=False)
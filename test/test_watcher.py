@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from iexdata.client import Client
+from iexdata.watcher import RefDataWatcher
+
+
+class DailyListServer:
+    """Local server answering with the records set per path, supporting conditional requests via ETag."""
+
+    def __init__(self):
+        self.lists = {}
+        self.statuses = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = json.dumps(server.lists.get(self.path, [])).encode()
+                etag = '"{}"'.format(hash(body))
+                if self.headers.get('If-None-Match') == etag:
+                    server.statuses.append(304)
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                server.statuses.append(200)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/1.0/'.format(self.httpd.server_address[1])
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+DIVIDENDS = '/1.0/ref-data/daily-list/dividends'
+
+
+class TestRefDataWatcher(TestCase):
+    def setUp(self):
+        self.server = DailyListServer()
+        self.addCleanup(self.server.close)
+        self.client = Client(base_url=self.server.url)
+        self.addCleanup(self.client.close)
+
+    def test_delta(self):
+        self.server.lists[DIVIDENDS] = [{'RecordID': 'DV1', 'Amount': 1}, {'RecordID': 'DV2', 'Amount': 2}]
+        deltas = []
+        watcher = RefDataWatcher(endpoints=['dividends'], on_delta=deltas.append, client=self.client)
+
+        watcher.poll()
+        self.assertEqual(1, len(deltas))
+        self.assertEqual(2, len(deltas[0].added))
+        self.assertEqual({'DV1', 'DV2'}, set(watcher.snapshot('dividends')))
+
+        # unchanged list is answered with 304 and yields no delta
+        self.assertEqual([], watcher.poll())
+        self.assertEqual([200, 304], self.server.statuses)
+        self.assertEqual(1, watcher.not_modified)
+
+        self.server.lists[DIVIDENDS] = [{'RecordID': 'DV2', 'Amount': 3}, {'RecordID': 'DV3', 'Amount': 4}]
+        delta, = watcher.poll()
+        self.assertEqual('dividends', delta.endpoint)
+        self.assertEqual([{'RecordID': 'DV3', 'Amount': 4}], delta.added)
+        self.assertEqual([{'RecordID': 'DV2', 'Amount': 3}], delta.changed)
+        self.assertEqual([{'RecordID': 'DV1', 'Amount': 1}], delta.deleted)
+        self.assertEqual(3, watcher.requests)
+
+    def test_thread(self):
+        self.server.lists['/1.0/ref-data/daily-list/symbol-directory'] = [{'RecordID': 'SD1'}]
+        event = threading.Event()
+        watcher = RefDataWatcher(on_delta=lambda delta: event.set(), interval=.01, client=self.client)
+        watcher.start()
+        self.assertTrue(event.wait(5))
+        deadline = time.monotonic() + 5
+        while watcher.not_modified < 4 and time.monotonic() < deadline:
+            time.sleep(.01)
+        watcher.stop(timeout=5)
+        self.assertGreaterEqual(watcher.not_modified, 4)
+
+    def test_unknown_endpoint(self):
+        self.assertRaises(ValueError, RefDataWatcher, endpoints=['nope'])